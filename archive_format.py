@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Compact binary archive format for the Jeopardy questions archive.
+
+Compiles jeopardy_questions_archive.json into a columnar file that can be
+memory-mapped instead of parsed, so generator and server processes start
+almost instantly and share the same pages.
+Usage: python archive_format.py [--archive jeopardy_questions_archive.json] [--output jeopardy_questions_archive.bin]
+
+File layout (little-endian, every section padded to 8 bytes):
+    header      magic, version, clue count, section count
+    sections    (offset, length) for each section below
+    string tables for categories, rounds, answers and images
+                (uint64 count and offsets followed by a UTF-8 blob)
+    columns     category id, round id, answer id, image id (uint32),
+                value, air date as YYYYMMDD, show number (int32)
+    clue text   string table with one entry per clue
+"""
+
+import json
+import mmap
+import struct
+import sys
+import argparse
+from collections.abc import Mapping, Sequence
+
+MAGIC = b'JEOPARC1'
+VERSION = 1
+
+HEADER = struct.Struct('<8sIII')
+SECTION = struct.Struct('<QQ')
+
+# Sections in file order: (name, memoryview format or None for string tables)
+SECTIONS = [
+    ('categories', None),
+    ('rounds', None),
+    ('answers', None),
+    ('images', None),
+    ('category_id', 'I'),
+    ('round_id', 'I'),
+    ('answer_id', 'I'),
+    ('image_id', 'I'),
+    ('value', 'i'),
+    ('air_date', 'i'),
+    ('show_number', 'i'),
+    ('questions', None),
+]
+
+# Marks a missing value, air date or show number in the integer columns
+MISSING = -1
+
+CLUE_FIELDS = ('category', 'air_date', 'question', 'value', 'answer', 'round', 'show_number', 'image')
+REQUIRED_FIELDS = ('category', 'round', 'question', 'answer')
+
+
+def is_complete_clue(clue):
+    """
+    Whether an archive dict has every field boards need. Board clues must also
+    have a 'value' key (it may be null); Final Jeopardy clues don't need one.
+    """
+    if not all(clue.get(k) is not None for k in REQUIRED_FIELDS):
+        return False
+    return 'value' in clue or 'Final' in clue['round']
+
+
+def is_compiled_archive(filepath):
+    """Check whether a file is a compiled archive (by its magic bytes)."""
+    try:
+        with open(filepath, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _parse_value(value_str):
+    """Parse '$1,200' into 1200, or MISSING if absent/unparsable."""
+    try:
+        return int(str(value_str).strip('$').replace(',', ''))
+    except (ValueError, TypeError):
+        return MISSING
+
+
+def _parse_date(date_str):
+    """Parse '2004-12-31' into 20041231, or MISSING if absent/unparsable."""
+    try:
+        return int(date_str.replace('-', ''))
+    except (ValueError, AttributeError):
+        return MISSING
+
+
+def _parse_int(text):
+    try:
+        return int(text)
+    except (ValueError, TypeError):
+        return MISSING
+
+
+class _Interner:
+    """Assign stable ids to repeated strings."""
+
+    def __init__(self, first=None):
+        self.ids = {}
+        self.strings = []
+        if first is not None:
+            self.add(first)
+
+    def add(self, text):
+        text_id = self.ids.get(text)
+        if text_id is None:
+            text_id = len(self.strings)
+            self.ids[text] = text_id
+            self.strings.append(text)
+        return text_id
+
+
+def _pack_strings(strings):
+    """Pack strings as a uint64 offset array followed by a UTF-8 blob."""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = [0]
+    for blob in encoded:
+        offsets.append(offsets[-1] + len(blob))
+    return struct.pack(f'<Q{len(offsets)}Q', len(strings), *offsets) + b''.join(encoded)
+
+
+def _pack_column(fmt, values):
+    return struct.pack(f'<{len(values)}{fmt}', *values)
+
+
+def compile_archive(archive_data, output_path):
+    """Write archive clues (a list of dicts) to the compiled binary format."""
+    tables = {
+        'categories': _Interner(),
+        'rounds': _Interner(),
+        'answers': _Interner(),
+        'images': _Interner(first=''),  # Id 0 means "no image"
+    }
+
+    columns = {name: [] for name, fmt in SECTIONS if fmt}
+    questions = []
+
+    for clue in archive_data:
+        if not is_complete_clue(clue):
+            continue
+
+        columns['category_id'].append(tables['categories'].add(clue['category']))
+        columns['round_id'].append(tables['rounds'].add(clue['round']))
+        columns['answer_id'].append(tables['answers'].add(clue['answer']))
+        columns['image_id'].append(tables['images'].add(clue.get('image') or ''))
+        columns['value'].append(_parse_value(clue.get('value')))
+        columns['air_date'].append(_parse_date(clue.get('air_date')))
+        columns['show_number'].append(_parse_int(clue.get('show_number')))
+        questions.append(clue['question'])
+
+    payloads = []
+    for name, fmt in SECTIONS:
+        if fmt:
+            payloads.append(_pack_column(fmt, columns[name]))
+        elif name == 'questions':
+            payloads.append(_pack_strings(questions))
+        else:
+            payloads.append(_pack_strings(tables[name].strings))
+
+    # Lay sections out after the header and section table, 8-byte aligned
+    position = HEADER.size + SECTION.size * len(SECTIONS)
+    table = []
+    for payload in payloads:
+        position += -position % 8
+        table.append((position, len(payload)))
+        position += len(payload)
+
+    with open(output_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(questions), len(SECTIONS)))
+        for offset, length in table:
+            f.write(SECTION.pack(offset, length))
+        for (offset, length), payload in zip(table, payloads):
+            f.write(b'\0' * (offset - f.tell()))
+            f.write(payload)
+
+    return len(questions)
+
+
+class StringTable(Sequence):
+    """Read-only view of a packed string table; decodes entries on access."""
+
+    def __init__(self, buffer):
+        self.count = struct.unpack_from('<Q', buffer, 0)[0]
+        offsets_end = 8 * (self.count + 2)
+        self.offsets = buffer[8:offsets_end].cast('Q')
+        self.blob = buffer[offsets_end:]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+
+class CompiledClue(Mapping):
+    """
+    Lazy, dict-like view of one clue in a compiled archive.
+    Text fields are decoded from the mapped file on access. The fields are
+    also available as attributes, with a missing value read as 0.
+    """
+
+    __slots__ = ('archive', 'row')
+
+    def __init__(self, archive, row):
+        self.archive = archive
+        self.row = row
+
+    def __getitem__(self, key):
+        archive = self.archive
+        row = self.row
+        if key == 'category':
+            return archive.categories[archive.category_id[row]]
+        if key == 'round':
+            return archive.rounds[archive.round_id[row]]
+        if key == 'question':
+            return archive.questions[row]
+        if key == 'answer':
+            return archive.answers[archive.answer_id[row]]
+        if key == 'value':
+            value = archive.value[row]
+            return None if value == MISSING else value
+        if key == 'air_date':
+            date = archive.air_date[row]
+            return '' if date == MISSING else f'{date // 10000:04d}-{date // 100 % 100:02d}-{date % 100:02d}'
+        if key == 'show_number':
+            show_number = archive.show_number[row]
+            return '' if show_number == MISSING else str(show_number)
+        if key == 'image':
+            image_id = archive.image_id[row]
+            if image_id:
+                return archive.images[image_id]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if key == 'image':
+            return self.archive.image_id[self.row] != 0
+        return key in CLUE_FIELDS
+
+    def __iter__(self):
+        return (key for key in CLUE_FIELDS if key in self)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    # Attribute access matching random_board_generator.Clue
+
+    @property
+    def category(self):
+        return self.archive.categories[self.archive.category_id[self.row]]
+
+    @property
+    def round(self):
+        return self.archive.rounds[self.archive.round_id[self.row]]
+
+    @property
+    def question(self):
+        return self.archive.questions[self.row]
+
+    @property
+    def answer(self):
+        return self.archive.answers[self.archive.answer_id[self.row]]
+
+    @property
+    def value(self):
+        value = self.archive.value[self.row]
+        return 0 if value == MISSING else value
+
+    @property
+    def air_date(self):
+        return self['air_date']
+
+    @property
+    def image(self):
+        image_id = self.archive.image_id[self.row]
+        return self.archive.images[image_id] if image_id else None
+
+
+class CompiledArchive(Sequence):
+    """
+    Memory-mapped compiled archive.
+    Behaves like the list of clue dicts returned by json.load.
+    """
+
+    def __init__(self, filepath):
+        with open(filepath, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        buffer = memoryview(self.mmap)
+        magic, version, count, section_count = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION or section_count != len(SECTIONS):
+            raise ValueError(f"{filepath} is not a version {VERSION} compiled archive")
+        self.count = count
+
+        for i, (name, fmt) in enumerate(SECTIONS):
+            offset, length = SECTION.unpack_from(buffer, HEADER.size + SECTION.size * i)
+            section = buffer[offset:offset + length]
+            setattr(self, name, section.cast(fmt) if fmt else StringTable(section))
+
+        # Categories and rounds are small and hit constantly, so decode them once
+        self.categories = [sys.intern(name) for name in self.categories]
+        self.rounds = [sys.intern(name) for name in self.rounds]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [CompiledClue(self, row) for row in range(*i.indices(self.count))]
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError('clue index out of range')
+        return CompiledClue(self, i)
+
+    def __iter__(self):
+        return (CompiledClue(self, row) for row in range(self.count))
+
+
+def load_compiled_archive(filepath):
+    """Memory-map a compiled archive."""
+    return CompiledArchive(filepath)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compile the Jeopardy archive JSON into the memory-mappable binary format'
+    )
+    parser.add_argument(
+        '--archive',
+        default='jeopardy_questions_archive.json',
+        help='Path to archive JSON file (default: jeopardy_questions_archive.json)'
+    )
+    parser.add_argument(
+        '--output',
+        default='jeopardy_questions_archive.bin',
+        help='Output filename (default: jeopardy_questions_archive.bin)'
+    )
+
+    args = parser.parse_args()
+
+    print(f"Loading archive from {args.archive}...")
+    with open(args.archive, 'r', encoding='utf-8') as f:
+        archive_data = json.load(f)
+
+    print(f"Compiling {len(archive_data)} questions...")
+    count = compile_archive(archive_data, args.output)
+
+    print(f"✓ Compiled {count} questions to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Streaming ingestion for the Jeopardy questions archive.
+
+iter_archive yields clues one at a time with ijson instead of json.load-ing
+the whole file, so callers can group or summarize clues without ever holding
+the raw list of dicts. Progress and peak memory are reported as it goes.
+"""
+
+import sys
+import json
+
+from archive_format import is_compiled_archive, load_compiled_archive
+
+# Try to import ijson, fall back to json.load if not available
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+PROGRESS_EVERY = 50000
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process in MB (None if unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _report(count, final=False):
+    peak = peak_memory_mb()
+    memory = f", peak memory {peak:.0f} MB" if peak is not None else ""
+    if final:
+        print(f"Read {count} clues{memory}")
+    else:
+        print(f"  {count} clues read{memory}")
+
+
+def iter_archive(filepath, progress_every=PROGRESS_EVERY):
+    """
+    Yield clue dicts from an archive file one at a time.
+    Compiled archives are already memory-mapped and are iterated directly.
+    """
+    count = 0
+
+    if is_compiled_archive(filepath):
+        clues = load_compiled_archive(filepath)
+    elif ijson is None:
+        print("Warning: ijson module not found. Loading the whole archive instead of streaming it.")
+        print("To install ijson: pip install ijson")
+        with open(filepath, 'r', encoding='utf-8') as f:
+            clues = json.load(f)
+    else:
+        clues = None
+
+    if clues is not None:
+        for clue in clues:
+            yield clue
+            count += 1
+            if progress_every and count % progress_every == 0:
+                _report(count)
+    else:
+        with open(filepath, 'rb') as f:
+            for clue in ijson.items(f, 'item', use_float=True):
+                yield clue
+                count += 1
+                if progress_every and count % progress_every == 0:
+                    _report(count)
+
+    _report(count, final=True)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for board generation, archive loading and semantic search.
+
+Builds a synthetic archive (so no real data is needed), times the generator,
+the archive loaders and vector search, load-tests the HTTP endpoints of an
+in-process server.py, and prints the results as JSON.
+Usage: python benchmark.py [--clues 200000] [--categories 40000] [--output benchmark_results.json]
+       python benchmark.py --compare benchmark_baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import subprocess
+import contextlib
+import urllib.request
+import urllib.error
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+
+import server
+from archive_format import compile_archive
+from embedding_store import save_embedding_store, load_embedding_store
+from vector_index import IVFIndex, VectorIndex
+from random_board_generator import (
+    DIFFICULTY_RANGES, BoardIndex, FinalJeopardyPool, compact_archive, load_archive,
+    organize_by_category, generate_board, select_final_jeopardy
+)
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Dollar values per round, before and after the 2001 doubling
+ERA_VALUES = {
+    'Jeopardy!': ([100, 200, 300, 400, 500], [200, 400, 600, 800, 1000]),
+    'Double Jeopardy!': ([200, 400, 600, 800, 1000], [400, 800, 1200, 1600, 2000]),
+}
+
+WORDS = ('potent potables', 'world capitals', 'u.s. presidents', 'opera', 'science',
+         'rhyme time', 'before & after', 'literature', 'state capitals', 'movies',
+         'the bible', 'word origins', 'sports', 'holidays', 'animals', 'art',
+         'food & drink', 'history', 'geography', 'music', 'television', 'religion')
+
+
+def make_synthetic_archive(num_clues=200000, num_categories=40000, seed=0):
+    """
+    Build a list of clue dicts shaped like jeopardy_questions_archive.json.
+    Each show has 6 Jeopardy and 6 Double Jeopardy categories of 5 clues plus one
+    Final Jeopardy clue; category names are drawn from num_categories names.
+    """
+    rng = random.Random(seed)
+    names = [f"{rng.choice(WORDS).upper()} {i}" for i in range(num_categories)]
+    clues = []
+    show = 0
+    while len(clues) < num_clues:
+        show += 1
+        year = 1984 + show * 40 // max(1, num_clues // 61)
+        air_date = f"{year:04d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        for round_name, (old_values, new_values) in ERA_VALUES.items():
+            values = old_values if year < 2001 else new_values
+            for category in rng.sample(names, 6):
+                for value in values:
+                    clues.append({
+                        'category': category,
+                        'air_date': air_date,
+                        'question': f"'Clue {len(clues)} in {category.lower()} about {rng.choice(WORDS)}'",
+                        'value': f"${value:,}",
+                        'answer': f"answer {len(clues)}",
+                        'round': round_name,
+                        'show_number': str(show)
+                    })
+        clues.append({
+            'category': rng.choice(names),
+            'air_date': air_date,
+            'question': f"'Final clue {show}'",
+            'value': None,
+            'answer': f"final answer {show}",
+            'round': 'Final Jeopardy!',
+            'show_number': str(show)
+        })
+    return clues[:num_clues]
+
+
+def summarize(samples):
+    """Timing summary in milliseconds."""
+    samples = sorted(samples)
+    count = len(samples)
+    return {
+        'count': count,
+        'min_ms': round(samples[0] * 1000, 3),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+        'p50_ms': round(samples[count // 2] * 1000, 3),
+        'p95_ms': round(samples[min(count - 1, int(count * 0.95))] * 1000, 3),
+        'p99_ms': round(samples[min(count - 1, int(count * 0.99))] * 1000, 3),
+        'max_ms': round(samples[-1] * 1000, 3)
+    }
+
+
+def measure(fn, repeat=1):
+    """Call fn repeat times; return (timing summary, last result)."""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples), result
+
+
+def quiet():
+    """Send the generator's progress output to stderr so stdout stays JSON."""
+    return contextlib.redirect_stdout(sys.stderr)
+
+
+def bench_archive(archive, workdir):
+    """Time loading the archive as JSON and as a compiled binary file."""
+    json_path = os.path.join(workdir, 'archive.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(archive, f)
+
+    bin_path = os.path.join(workdir, 'archive_compiled.bin')
+    with quiet():
+        compile_timing, _ = measure(lambda: compile_archive(archive, bin_path))
+        json_timing, _ = measure(lambda: load_archive(json_path), repeat=3)
+        bin_timing, _ = measure(lambda: load_archive(bin_path), repeat=3)
+
+    return {
+        'json_bytes': os.path.getsize(json_path),
+        'compiled_bytes': os.path.getsize(bin_path),
+        'load_archive_json': json_timing,
+        'compile_archive': compile_timing,
+        'load_archive_compiled': bin_timing
+    }, json_path
+
+
+def bench_generator(archive, boards):
+    """Time clue compaction, grouping, indexing, Final Jeopardy pool building and board assembly."""
+    results = {}
+    results['compact_archive'], archive = measure(lambda: compact_archive(archive), repeat=3)
+    results['organize_by_category'], by_category = measure(lambda: organize_by_category(archive), repeat=3)
+    results['build_index'], index = measure(lambda: BoardIndex(by_category), repeat=3)
+    results['build_final_pool'], finals = measure(lambda: FinalJeopardyPool(archive), repeat=3)
+
+    with quiet():
+        for difficulty in DIFFICULTY_RANGES:
+            results[f'generate_board_{difficulty}'], _ = measure(
+                lambda: generate_board(archive, difficulty, index=index, finals=finals, verbose=False),
+                repeat=boards
+            )
+        results['select_final_jeopardy'], _ = measure(lambda: select_final_jeopardy(archive, finals), repeat=boards)
+    return results
+
+
+def bench_search(num_categories, dimension, queries, top_k, workdir):
+    """Time embedding store loading and top-k search on random embeddings."""
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((num_categories, dimension)).astype(np.float32)
+    categories = [{'name': f'CATEGORY {i}', 'questions': [], 'round': 'jeopardy'} for i in range(num_categories)]
+    save_embedding_store(categories, embeddings, 'synthetic', workdir)
+    query_vectors = rng.standard_normal((queries, dimension)).astype(np.float32)
+
+    results = {}
+    results['load_embedding_store'], data = measure(lambda: load_embedding_store(workdir), repeat=3)
+    results['build_ivf'], ivf = measure(lambda: IVFIndex.build(data['embeddings']))
+    index = VectorIndex(data['embeddings'], ivf=ivf, normalized=True)
+    quantized = VectorIndex(data['embeddings'], quantize=True)
+
+    for name, search in (('search_exact', lambda q: index.search(q, top_k, exact=True)),
+                         ('search_ivf', lambda q: index.search(q, top_k)),
+                         ('search_int8', lambda q: quantized.search(q, top_k))):
+        vectors = iter(query_vectors)
+        results[name], _ = measure(lambda: search(next(vectors)), repeat=queries)
+    return results
+
+
+def load_test(url, requests, concurrency):
+    """Issue requests GETs with concurrency threads; return latency and status summary."""
+    def fetch(_):
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(fetch, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    statuses = {}
+    for _, status in outcomes:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    result = summarize([latency for latency, _ in outcomes])
+    result['requests_per_second'] = round(requests / elapsed, 1)
+    result['statuses'] = statuses
+    return result
+
+
+def bench_http(archive_path, requests, concurrency, board_pool_size):
+    """Start server.py's handler in-process on a free port and load-test its endpoints."""
+    server.ARCHIVE_FILE = archive_path
+    with quiet():
+        server.load_board_engine()
+        server.start_board_pool(board_pool_size)
+
+    handler = partial(server.JeopardyHandler, directory=REPO_DIR)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    base = f'http://127.0.0.1:{httpd.server_address[1]}'
+
+    try:
+        with contextlib.redirect_stderr(open(os.devnull, 'w')), quiet():
+            return {
+                'generate_board': load_test(f'{base}/api/generate-board?difficulty=medium', requests, concurrency),
+                'static_index_html': load_test(f'{base}/index.html', requests, concurrency)
+            }
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        if server.BOARD_POOL:
+            server.BOARD_POOL.stop()
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(baseline, current):
+    """Print p50 changes between two result files to stderr (positive = slower)."""
+    def timings(results, prefix=''):
+        for key, value in results.items():
+            if isinstance(value, dict) and 'p50_ms' in value:
+                yield prefix + key, value['p50_ms']
+            elif isinstance(value, dict):
+                yield from timings(value, f'{prefix}{key}.')
+
+    before = dict(timings(baseline['results']))
+    print(f"{'benchmark':<50} {'baseline':>10} {'current':>10} {'change':>8}", file=sys.stderr)
+    for name, p50 in timings(current['results']):
+        if name in before and before[name] > 0:
+            change = (p50 - before[name]) / before[name] * 100
+            print(f"{name:<50} {before[name]:>9.3f}ms {p50:>9.3f}ms {change:>+7.1f}%", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark board generation, archive loading and search')
+    parser.add_argument('--clues', type=int, default=200000, help='Synthetic archive size (default: 200000)')
+    parser.add_argument('--categories', type=int, default=40000, help='Distinct category names (default: 40000)')
+    parser.add_argument('--boards', type=int, default=50, help='Boards to time per difficulty (default: 50)')
+    parser.add_argument('--search-categories', type=int, default=50000, help='Embedding rows (default: 50000)')
+    parser.add_argument('--dimension', type=int, default=384, help='Embedding dimension (default: 384)')
+    parser.add_argument('--queries', type=int, default=200, help='Search queries to time (default: 200)')
+    parser.add_argument('--top-k', type=int, default=20, help='Results per search (default: 20)')
+    parser.add_argument('--requests', type=int, default=200, help='HTTP requests per endpoint (default: 200)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent HTTP clients (default: 8)')
+    parser.add_argument('--board-pool-size', type=int, default=0,
+                        help='Board pool size for the HTTP test (default: 0, measure generation)')
+    parser.add_argument('--skip', default='', help='Comma-separated sections to skip: archive,generator,search,http')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for synthetic data (default: 0)')
+    parser.add_argument('--output', default=None, help='Write results JSON here instead of stdout')
+    parser.add_argument('--compare', default=None, help='Previous results JSON to compare against')
+    args = parser.parse_args()
+
+    skip = set(filter(None, args.skip.split(',')))
+    random.seed(args.seed)
+
+    print(f"Building synthetic archive ({args.clues} clues, {args.categories} categories)...", file=sys.stderr)
+    archive = make_synthetic_archive(args.clues, args.categories, args.seed)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        json_path = os.path.join(workdir, 'archive.json')
+        if 'archive' not in skip:
+            print("Benchmarking archive loading...", file=sys.stderr)
+            results['archive'], json_path = bench_archive(archive, workdir)
+        elif 'http' not in skip:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(archive, f)
+
+        if 'generator' not in skip:
+            print("Benchmarking board generation...", file=sys.stderr)
+            results['generator'] = bench_generator(archive, args.boards)
+
+        if 'search' not in skip:
+            print("Benchmarking semantic search...", file=sys.stderr)
+            search_dir = os.path.join(workdir, 'embeddings')
+            os.makedirs(search_dir)
+            results['search'] = bench_search(args.search_categories, args.dimension,
+                                             args.queries, args.top_k, search_dir)
+
+        if 'http' not in skip:
+            print("Load-testing HTTP endpoints...", file=sys.stderr)
+            results['http'] = bench_http(json_path, args.requests, args.concurrency, args.board_pool_size)
+
+    output = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': vars(args),
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(output, f, indent=4)
+        print(f"✓ Saved results to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(output, indent=4))
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), output)
+
+
+if __name__ == '__main__':
+    main()
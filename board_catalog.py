@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+In-memory catalog of the saved boards in boards/ for /api/boards.
+
+The catalog holds each board's name, size, mtime and category names, so
+listing boards never touches the disk. It is kept current incrementally:
+saves are recorded as they happen, and a background thread polls the
+directory's own mtime, rescanning its files only when that changes (a file
+added, removed or renamed into place by anything else). Board bodies are
+served from a bounded LRU cache, checked against the file on each request,
+which also catches boards rewritten in place.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+BOARDS_DIR = 'boards'
+DEFAULT_BODY_CACHE_SIZE = 64
+DEFAULT_POLL_INTERVAL = 2.0
+# A directory mtime this recent may still change within the same timestamp, so it isn't trusted yet
+RACY_MTIME_NS = 1_000_000_000
+
+
+def board_name(filename):
+    """Board name for a file name or user-supplied name (no directories, no .json)."""
+    name = os.path.basename(filename)
+    if name.endswith('.json'):
+        name = name[:-5]
+    return name
+
+
+def summarize_board(board):
+    """Category names per round, for listing boards without loading them."""
+    if not isinstance(board, dict):
+        return {}
+    summary = {}
+    for round_key in ('jeopardy', 'double-jeopardy'):
+        categories = board.get(round_key)
+        if isinstance(categories, list):
+            summary[round_key] = [c.get('name', '') for c in categories if isinstance(c, dict)]
+    final = board.get('final-jeopardy')
+    if isinstance(final, dict):
+        summary['final-jeopardy'] = final.get('category', '')
+    return summary
+
+
+class BoardCatalog:
+    """
+    Catalog of boards/<name>.json files.
+    entries: name -> {'name', 'size', 'mtime', 'categories'}, plus the file's
+    (mtime_ns, size) key used to spot changes. dir_mtime_ns is the directory's
+    mtime at the last full scan.
+    """
+
+    def __init__(self, directory=BOARDS_DIR, body_cache_size=DEFAULT_BODY_CACHE_SIZE,
+                 poll_interval=DEFAULT_POLL_INTERVAL):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.entries = {}
+        self.keys = {}
+        self.dir_mtime_ns = None
+        self.bodies = OrderedDict()
+        self.body_cache_size = body_cache_size
+        self.lock = threading.Lock()
+        self.list_body = None
+        self.stopped = threading.Event()
+        self.thread = None
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, name):
+        return os.path.join(self.directory, f'{name}.json')
+
+    def refresh(self):
+        """
+        Rescan the directory if its mtime changed (or a file couldn't be read
+        last time), re-reading only files whose mtime or size changed.
+        """
+        try:
+            dir_mtime_ns = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            dir_mtime_ns = None
+        with self.lock:
+            unchanged = dir_mtime_ns is not None and dir_mtime_ns == self.dir_mtime_ns
+            if unchanged and len(self.keys) == len(self.entries):
+                return 0
+
+        try:
+            scan = {
+                board_name(entry.name): entry.stat()
+                for entry in os.scandir(self.directory)
+                if entry.name.endswith('.json') and entry.is_file()
+            }
+        except FileNotFoundError:
+            scan = {}
+
+        if dir_mtime_ns is not None and time.time_ns() - dir_mtime_ns < RACY_MTIME_NS:
+            dir_mtime_ns = None
+
+        with self.lock:
+            removed = [name for name in self.entries if name not in scan]
+            changed = [name for name, stat in scan.items()
+                       if self.keys.get(name) != (stat.st_mtime_ns, stat.st_size)]
+
+        updates = {}
+        for name in changed:
+            try:
+                with open(self.path(name), 'rb') as f:
+                    stat = os.fstat(f.fileno())
+                    categories = summarize_board(json.loads(f.read()))
+            except (OSError, ValueError):
+                # Unreadable or half-written; list it without categories and retry next poll
+                stat, categories = scan[name], None
+            updates[name] = (stat, categories)
+
+        with self.lock:
+            for name in removed:
+                self._forget(name)
+            for name, (stat, categories) in updates.items():
+                self._set(name, stat, categories if categories is not None else {},
+                          key=(stat.st_mtime_ns, stat.st_size) if categories is not None else None)
+            self.dir_mtime_ns = dir_mtime_ns
+        return len(removed) + len(updates)
+
+    def record_save(self, name, board, body=None):
+        """Update the catalog after boards/<name>.json was written with board (and its bytes)."""
+        stat = os.stat(self.path(name))
+        with self.lock:
+            self._set(name, stat, summarize_board(board), key=(stat.st_mtime_ns, stat.st_size))
+            if body is not None:
+                self._cache_body(name, (stat.st_mtime_ns, stat.st_size), body)
+
+    def _set(self, name, stat, categories, key):
+        self.entries[name] = {
+            'name': name,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'categories': categories
+        }
+        if key is None:
+            self.keys.pop(name, None)
+        else:
+            self.keys[name] = key
+        self.bodies.pop(name, None)
+        self.list_body = None
+
+    def _forget(self, name):
+        self.entries.pop(name, None)
+        self.keys.pop(name, None)
+        self.bodies.pop(name, None)
+        self.list_body = None
+
+    def _cache_body(self, name, key, body):
+        self.bodies[name] = (key, body)
+        self.bodies.move_to_end(name)
+        while len(self.bodies) > self.body_cache_size:
+            self.bodies.popitem(last=False)
+
+    def list(self):
+        """Board summaries, newest first."""
+        with self.lock:
+            return sorted(self.entries.values(), key=lambda e: e['mtime'], reverse=True)
+
+    def list_response(self):
+        """Serialized /api/boards response, rebuilt only after the catalog changes."""
+        with self.lock:
+            if self.list_body is not None:
+                return self.list_body
+        boards = self.list()
+        body = json.dumps({'success': True, 'boards': boards, 'count': len(boards)},
+                          separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        with self.lock:
+            self.list_body = body
+        return body
+
+    def get(self, name):
+        """
+        Return (body, key) for a board, where key is its (mtime_ns, size),
+        or None if it isn't in the catalog. The file is stat'ed on every call,
+        so a board rewritten in place is re-read (and its entry updated).
+        """
+        name = board_name(name)
+        with self.lock:
+            if name not in self.entries:
+                return None
+            cached = self.bodies.get(name)
+
+        if cached is not None:
+            try:
+                stat = os.stat(self.path(name))
+            except FileNotFoundError:
+                return None
+            if cached[0] == (stat.st_mtime_ns, stat.st_size):
+                with self.lock:
+                    if name in self.bodies:
+                        self.bodies.move_to_end(name)
+                    self.hits += 1
+                return cached[1], cached[0]
+
+        with self.lock:
+            self.misses += 1
+        try:
+            with open(self.path(name), 'rb') as f:
+                stat = os.fstat(f.fileno())
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        categories = None
+        with self.lock:
+            current = self.keys.get(name) == key
+        if not current:
+            try:
+                categories = summarize_board(json.loads(body))
+            except ValueError:
+                # Half-written; serve it as is and let the next read or poll catch up
+                return body, key
+        with self.lock:
+            if name in self.entries:
+                if categories is not None:
+                    self._set(name, stat, categories, key=key)
+                if self.keys.get(name) == key:
+                    self._cache_body(name, key, body)
+        return body, key
+
+    def stats(self):
+        with self.lock:
+            return {
+                'boards': len(self.entries),
+                'cached_bodies': len(self.bodies),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def start(self):
+        """Load the catalog and keep polling the directory in the background."""
+        self.refresh()
+        self.thread = threading.Thread(target=self._poll, name='board-catalog', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+
+    def _poll(self):
+        while not self.stopped.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing board catalog: {e}")
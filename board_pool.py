@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Pool of ready-made boards for /api/generate-board.
+
+A background thread keeps a ring buffer of pre-serialized responses per
+difficulty filled up to a high-water mark, so a request only has to write
+bytes that already exist. When a buffer is empty the caller generates the
+board itself, and the refill thread catches up.
+
+SeedCache remembers recently generated bodies by seed, so a board can be
+reloaded by its seed without generating it again.
+"""
+
+import threading
+from collections import OrderedDict, deque
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_SEED_CACHE_SIZE = 1024
+
+
+class BoardPool:
+    """
+    Per-difficulty buffers of response bodies produced by generate(difficulty) -> bytes.
+    """
+
+    def __init__(self, generate, difficulties, high_water=DEFAULT_POOL_SIZE):
+        self.generate = generate
+        self.high_water = high_water
+        self.buffers = {difficulty: deque(maxlen=high_water) for difficulty in difficulties}
+        self.condition = threading.Condition()
+        self.hits = 0
+        self.misses = 0
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        """Start the background refill thread."""
+        self.running = True
+        self.thread = threading.Thread(target=self._refill, name='board-pool', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+    def take(self, difficulty):
+        """Pop a ready response body, or return None if the buffer is empty."""
+        with self.condition:
+            buffer = self.buffers.get(difficulty)
+            if not buffer:
+                self.misses += 1
+                self.condition.notify()
+                return None
+            self.hits += 1
+            body = buffer.popleft()
+            self.condition.notify()
+            return body
+
+    def stats(self):
+        """Hit/miss counters and current fill level per difficulty."""
+        with self.condition:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'high_water': self.high_water,
+                'ready': {difficulty: len(buffer) for difficulty, buffer in self.buffers.items()}
+            }
+
+    def _next_difficulty(self):
+        """The emptiest difficulty below the high-water mark, or None if all are full."""
+        difficulty = min(self.buffers, key=lambda d: len(self.buffers[d]))
+        if len(self.buffers[difficulty]) >= self.high_water:
+            return None
+        return difficulty
+
+    def _refill(self):
+        while True:
+            with self.condition:
+                while self.running and self._next_difficulty() is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                difficulty = self._next_difficulty()
+
+            try:
+                body = self.generate(difficulty)
+            except Exception as e:
+                print(f"Error filling board pool: {e}")
+                with self.condition:
+                    # Don't spin on a persistent failure; wait for the next take()
+                    self.condition.wait()
+                continue
+
+            with self.condition:
+                self.buffers[difficulty].append(body)
+
+
+class SeedCache:
+    """
+    LRU of response bodies keyed by seed (plus whatever else shaped the board),
+    so replaying a seed that was already generated is a dictionary lookup.
+    """
+
+    def __init__(self, max_size=DEFAULT_SEED_CACHE_SIZE):
+        self.max_size = max_size
+        self.bodies = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            body = self.bodies.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self.bodies.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        with self.lock:
+            self.bodies[key] = body
+            self.bodies.move_to_end(key)
+            while len(self.bodies) > self.max_size:
+                self.bodies.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self.bodies),
+                'max_size': self.max_size
+            }
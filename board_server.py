@@ -8,29 +8,81 @@ Then open http://localhost:8000 in your browser.
 
 import json
 import random
+import argparse
 import time
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+import threading
+from http.server import ThreadingHTTPServer
 from urllib.parse import urlparse, parse_qs
 import os
 
 # Import the board generator functions
-from random_board_generator import load_archive, generate_board
+from random_board_generator import BoardEngine, normalize_text
+from serving import AdmissionLimiter, PoolSaturated, add_pool_arguments
+from board_pool import BoardPool, SeedCache, DEFAULT_POOL_SIZE
+from http_cache import CachingHandler, precompress
+from metrics import METRICS, lru_cache_stats
 
-# Global cache for archive data (load once, reuse for all requests)
-ARCHIVE_DATA = None
+# Global cache for the board engine (archive loaded and indexed once, reused for all requests)
+BOARD_ENGINE = None
+BOARD_ENGINE_LOCK = threading.Lock()
 
+# Stream the JSON archive instead of json.load-ing it (lower peak memory, needs ijson)
+STREAM_ARCHIVE = False
 
-def load_archive_cached():
-    """Load archive data once and cache it."""
-    global ARCHIVE_DATA
-    if ARCHIVE_DATA is None:
-        print("Loading archive data (this may take a moment)...")
-        ARCHIVE_DATA = load_archive('jeopardy_questions_archive.json')
-        print(f"Loaded {len(ARCHIVE_DATA)} questions.")
-    return ARCHIVE_DATA
+# Run all clue text through ftfy at startup instead of on first use
+FIX_TEXT_UPFRONT = False
 
+# Caps concurrent board generation (replaced in main() from CLI options)
+API_LIMITER = AdmissionLimiter()
 
-class JeopardyBoardHandler(SimpleHTTPRequestHandler):
+# Ready-made board responses, refilled in the background
+BOARD_POOL = None
+
+# Recently generated boards by (seed, difficulty), so ?seed= replays are a lookup
+SEED_CACHE = SeedCache()
+
+
+def load_engine_cached():
+    """Load the archive into a board engine once and cache it."""
+    global BOARD_ENGINE
+    with BOARD_ENGINE_LOCK:
+        if BOARD_ENGINE is None:
+            print("Loading archive data (this may take a moment)...")
+            start = time.perf_counter()
+            BOARD_ENGINE = BoardEngine.from_file('jeopardy_questions_archive.json', stream=STREAM_ARCHIVE,
+                                                 fix_text_upfront=FIX_TEXT_UPFRONT)
+            METRICS.set_gauge('archive_load_seconds', time.perf_counter() - start,
+                              'Seconds taken to load and index the archive.')
+            print(f"Loaded {len(BOARD_ENGINE.archive_data)} questions.")
+    return BOARD_ENGINE
+
+
+def generate_board_body(difficulty, seed=None):
+    """
+    Generate a board from a seed (a fresh one by default) and serialize it.
+    Returns (seed, body), body being precompress()ed variants; it is also
+    remembered in SEED_CACHE.
+    """
+    if seed is None:
+        seed = random.getrandbits(32)
+    board = load_engine_cached().generate(difficulty, seed=seed)
+    body = precompress(json.dumps(board, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+    SEED_CACHE.put((seed, difficulty), body)
+    return seed, body
+
+
+def register_metrics():
+    """Expose this server's caches and admission limiter on /api/metrics."""
+    METRICS.register_cache('seed', lambda: SEED_CACHE.stats())
+    METRICS.register_cache('board_pool', lambda: BOARD_POOL.stats() if BOARD_POOL else None)
+    METRICS.register_cache('fix_text', lru_cache_stats(normalize_text))
+    METRICS.register_value('api_limiter_in_flight', lambda: API_LIMITER.in_flight,
+                           'Board generation calls running or waiting for an admission slot.')
+    METRICS.register_value('api_limiter_rejected_total', lambda: API_LIMITER.rejected,
+                           'Board generation calls answered 503 because the admission limiter was full.', kind='counter')
+
+
+class JeopardyBoardHandler(CachingHandler):
     """Custom HTTP handler that generates random boards on demand."""
     
     def do_GET(self):
@@ -40,10 +92,19 @@ class JeopardyBoardHandler(SimpleHTTPRequestHandler):
         # Check if this is a request for a random board
         if parsed_path.path == '/api/generate-board':
             self.generate_random_board(parsed_path)
+        elif parsed_path.path == '/api/metrics':
+            self.send_metrics()
         else:
             # Serve static files normally
             super().do_GET()
     
+    def do_HEAD(self):
+        """Handle HEAD requests: metrics headers, otherwise static files."""
+        if urlparse(self.path).path == '/api/metrics':
+            self.send_metrics()
+        else:
+            super().do_HEAD()
+    
     def generate_random_board(self, parsed_path):
         """Generate a new random board and return it as JSON."""
         try:
@@ -55,28 +116,55 @@ class JeopardyBoardHandler(SimpleHTTPRequestHandler):
             if difficulty not in ['easy', 'medium', 'hard']:
                 difficulty = 'medium'
             
-            # Use a new random seed based on current time
-            seed = int(time.time() * 1000000) % (2**32)
-            random.seed(seed)
+            # A seed replays a known board; its body may still be cached
+            seed = query_params.get('seed', [''])[0]
+            if seed:
+                try:
+                    seed = int(seed)
+                except ValueError:
+                    self.send_response(400)
+                    self.send_header('Content-Type', 'application/json')
+                    self.end_headers()
+                    error_response = json.dumps({
+                        'error': 'seed must be an integer',
+                        'message': 'Invalid seed'
+                    })
+                    self.wfile.write(error_response.encode('utf-8'))
+                    return
+                body = SEED_CACHE.get((seed, difficulty))
+                source = 'seed cache'
+                if body is None:
+                    seed, body = API_LIMITER.run(generate_board_body, difficulty, seed)
+                    source = 'generated'
+            else:
+                # Serve a pre-generated board if one is ready, otherwise generate it (through the admission limiter)
+                pooled = BOARD_POOL.take(difficulty) if BOARD_POOL else None
+                source = 'pool'
+                if pooled is None:
+                    pooled = API_LIMITER.run(generate_board_body, difficulty)
+                    source = 'generated'
+                seed, body = pooled
             
-            # Load archive and generate board
-            archive = load_archive_cached()
-            board = generate_board(archive, difficulty)
+            # Send response (compressed if the browser accepts it)
+            self.send_body(body, headers={
+                'Cache-Control': 'no-cache, no-store, must-revalidate',
+                'Pragma': 'no-cache',
+                'Expires': '0',
+                'X-Board-Seed': str(seed)
+            })
             
-            # Send response
-            self.send_response(200)
+            print(f"Served {difficulty} board ({source})")
+            
+        except PoolSaturated as e:
+            self.send_response(503)
             self.send_header('Content-Type', 'application/json')
-            self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
-            self.send_header('Pragma', 'no-cache')
-            self.send_header('Expires', '0')
+            self.send_header('Retry-After', str(e.retry_after))
             self.end_headers()
-            
-            # Write board as JSON
-            board_json = json.dumps(board, indent=4, ensure_ascii=False)
-            self.wfile.write(board_json.encode('utf-8'))
-            
-            print(f"Generated {difficulty} board (seed: {seed})")
-            
+            error_response = json.dumps({
+                'error': str(e),
+                'message': 'Server is busy'
+            })
+            self.wfile.write(error_response.encode('utf-8'))
         except Exception as e:
             # Send error response
             self.send_response(500)
@@ -98,7 +186,39 @@ class JeopardyBoardHandler(SimpleHTTPRequestHandler):
 
 def main():
     """Start the HTTP server."""
-    PORT = 8000
+    global API_LIMITER, BOARD_POOL, STREAM_ARCHIVE, FIX_TEXT_UPFRONT
+    
+    parser = argparse.ArgumentParser(description='Jeopardy board server')
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8000,
+        help='Port to listen on (default: 8000)'
+    )
+    add_pool_arguments(parser)
+    parser.add_argument(
+        '--board-pool-size',
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help=f'Ready-made boards to keep per difficulty, 0 to disable (default: {DEFAULT_POOL_SIZE})'
+    )
+    parser.add_argument(
+        '--stream-archive',
+        action='store_true',
+        help='Stream the JSON archive at startup to lower peak memory (needs ijson)'
+    )
+    parser.add_argument(
+        '--fix-text-upfront',
+        action='store_true',
+        help='Run all clue text through ftfy in parallel at startup (slower start, faster boards)'
+    )
+    args = parser.parse_args()
+    
+    PORT = args.port
+    STREAM_ARCHIVE = args.stream_archive
+    FIX_TEXT_UPFRONT = args.fix_text_upfront
+    API_LIMITER = AdmissionLimiter(concurrency=args.concurrency, max_in_flight=args.max_in_flight)
+    register_metrics()
     
     print("=" * 60)
     print("Jeopardy Board Server")
@@ -117,8 +237,13 @@ def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     os.chdir(script_dir)
     
+    # Pre-generate boards in the background
+    if args.board_pool_size > 0:
+        BOARD_POOL = BoardPool(generate_board_body, ['easy', 'medium', 'hard'],
+                               high_water=args.board_pool_size).start()
+    
     # Create and start server
-    server = HTTPServer(('localhost', PORT), JeopardyBoardHandler)
+    server = ThreadingHTTPServer(('localhost', PORT), JeopardyBoardHandler)
     
     try:
         server.serve_forever()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Write-behind saving for /api/save-board.
+
+Requests hand boards to a BoardWriter and return right away; a single
+writer thread serializes each board, writes it to a temporary file, fsyncs
+it and renames it over boards/<name>.json, so readers only ever see a
+complete file. Saving the same board again before it has been written
+replaces the queued copy instead of writing twice (the creator autosaves
+often). When too many boards are waiting, save() blocks briefly and then
+raises PoolSaturated so the client retries.
+"""
+
+import os
+import json
+import threading
+from collections import OrderedDict
+
+from serving import PoolSaturated, DEFAULT_RETRY_AFTER
+
+BOARDS_DIR = 'boards'
+DEFAULT_MAX_PENDING = 64
+# How long save() waits for room in a full queue before giving up
+DEFAULT_SAVE_TIMEOUT = 2.0
+
+
+def write_atomic(path, data):
+    """Write bytes to path via a temporary file, fsync and rename."""
+    directory = os.path.dirname(path) or '.'
+    tmp_path = os.path.join(directory, f'.{os.path.basename(path)}.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    # Persist the rename itself (not possible on every platform)
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class BoardWriter:
+    """
+    Queue of boards waiting to be written, keyed by board name.
+    on_saved(name, board, body) is called on the writer thread after each write;
+    if it raises, the board still counts as saved and callback_errors goes up.
+    """
+
+    def __init__(self, directory=BOARDS_DIR, max_pending=DEFAULT_MAX_PENDING,
+                 save_timeout=DEFAULT_SAVE_TIMEOUT, on_saved=None):
+        self.directory = directory
+        self.max_pending = max_pending
+        self.save_timeout = save_timeout
+        self.on_saved = on_saved
+        self.pending = OrderedDict()
+        self.writing = None
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.saved = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.callback_errors = 0
+
+    def path(self, name):
+        return os.path.join(self.directory, f'{name}.json')
+
+    def start(self):
+        """Start the writer thread."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.running = True
+        self.thread = threading.Thread(target=self._write_loop, name='board-writer', daemon=True)
+        self.thread.start()
+        return self
+
+    def save(self, name, board):
+        """
+        Queue a board to be written to boards/<name>.json and return its path.
+        Raises PoolSaturated if the queue stays full for save_timeout seconds.
+        """
+        with self.condition:
+            if name in self.pending:
+                # Not written yet: the newer copy simply replaces it
+                self.pending[name] = board
+                self.coalesced += 1
+                return self.path(name)
+
+            if not self.condition.wait_for(lambda: len(self.pending) < self.max_pending,
+                                           timeout=self.save_timeout):
+                raise PoolSaturated(DEFAULT_RETRY_AFTER)
+
+            self.pending[name] = board
+            self.condition.notify_all()
+        return self.path(name)
+
+    def flush(self, timeout=None):
+        """Wait until every queued board has been written. Returns False on timeout."""
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.pending and self.writing is None,
+                                           timeout=timeout)
+
+    def stop(self, timeout=None):
+        """Write out everything still queued, then stop the writer thread."""
+        flushed = self.flush(timeout)
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join(timeout)
+        return flushed
+
+    def stats(self):
+        with self.condition:
+            return {
+                'pending': len(self.pending),
+                'saved': self.saved,
+                'coalesced': self.coalesced,
+                'errors': self.errors,
+                'callback_errors': self.callback_errors
+            }
+
+    def _write_loop(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending or not self.running)
+                if not self.pending:
+                    return
+                name, board = self.pending.popitem(last=False)
+                self.writing = name
+                # A slot just opened up for a waiting save()
+                self.condition.notify_all()
+
+            try:
+                body = json.dumps(board, indent=4, ensure_ascii=False).encode('utf-8')
+                write_atomic(self.path(name), body)
+                print(f"✓ Saved board to: {self.path(name)}")
+                ok = True
+            except Exception as e:
+                print(f"Error saving board {name}: {e}")
+                ok = False
+
+            callback_ok = True
+            if ok and self.on_saved:
+                try:
+                    self.on_saved(name, board, body)
+                except Exception as e:
+                    print(f"Error after saving board {name}: {e}")
+                    callback_ok = False
+
+            with self.condition:
+                self.writing = None
+                if ok:
+                    self.saved += 1
+                else:
+                    self.errors += 1
+                if not callback_ok:
+                    self.callback_errors += 1
+                self.condition.notify_all()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Clue-level semantic search over every clue in the archive.
+
+    clue_vectors_int8.bin           int8 matrix (count x dimension), scanned by searches
+    clue_scales.bin                 float32 scale per row (int8 * scale = unit vector)
+    clue_vectors_f16.bin            float16 copy of the unit vectors, read only to re-rank
+    clue_metadata.jsonl             one JSON object per clue, same row order
+    clue_metadata_offsets.npy       byte offset of each metadata row (plus the end)
+    clue_ivf.npz                    IVF clusters over the int8 rows
+    clue_embeddings.json            manifest: model name, row count, dimension
+
+All of it is memory-mapped. A search scores the int8 rows in the query's
+nearest IVF clusters, then re-ranks the best few hundred candidates exactly in
+float32 from their float16 rows, so only those pages of the larger file are touched.
+"""
+
+import os
+import json
+from array import array
+
+import numpy as np
+
+from embedding_store import CategoryMetadata
+from vector_index import IVFIndex, VectorIndex, normalize_rows, quantize_rows, top_k_indices
+
+CLUE_MANIFEST_FILE = 'clue_embeddings.json'
+CLUE_VECTORS_FILE = 'clue_vectors_int8.bin'
+CLUE_SCALES_FILE = 'clue_scales.bin'
+CLUE_RERANK_FILE = 'clue_vectors_f16.bin'
+CLUE_METADATA_FILE = 'clue_metadata.jsonl'
+CLUE_OFFSETS_FILE = 'clue_metadata_offsets.npy'
+CLUE_IVF_FILE = 'clue_ivf.npz'
+
+# Clues encoded (and written) per step while building
+CLUE_CHUNK_SIZE = 8192
+
+# Rows k-means is trained on; the rest are only assigned to the nearest cluster
+IVF_SAMPLE_SIZE = 65536
+
+# Candidates from the int8 pass that are re-ranked in float32
+RERANK_CANDIDATES = 200
+
+
+def clue_text(clue):
+    """Text embedded for a clue: its category, question and answer."""
+    return f"{clue.get('category') or ''}: {clue.get('question') or ''} {clue.get('answer') or ''}".strip()
+
+
+def clue_metadata(clue):
+    """Fields returned with a search result."""
+    return {
+        'category': clue.get('category') or '',
+        'round': clue.get('round') or '',
+        'value': clue.get('value') or '',
+        'question': clue.get('question') or '',
+        'answer': clue.get('answer') or '',
+        'air_date': clue.get('air_date') or ''
+    }
+
+
+def clue_index_exists(directory='.'):
+    return os.path.exists(os.path.join(directory, CLUE_MANIFEST_FILE))
+
+
+class ClueIndexWriter:
+    """
+    Appends encoded chunks of clues to the index files as they are produced,
+    so memory use is bounded by one chunk. Files are written under temporary
+    names and renamed into place (manifest last) by close().
+    """
+
+    def __init__(self, model_name, directory='.'):
+        self.model_name = model_name
+        self.directory = directory
+        self.count = 0
+        self.dimension = None
+        self.offsets = array('Q', [0])
+        self.files = {
+            name: open(self.path(name) + '.tmp', 'wb')
+            for name in (CLUE_VECTORS_FILE, CLUE_SCALES_FILE, CLUE_RERANK_FILE, CLUE_METADATA_FILE)
+        }
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def add(self, clues, embeddings):
+        """Write one chunk: clue dicts and their embeddings (any float dtype)."""
+        vectors = normalize_rows(embeddings)
+        quantized, scales = quantize_rows(vectors)
+        self.dimension = vectors.shape[1]
+        self.files[CLUE_VECTORS_FILE].write(quantized.tobytes())
+        self.files[CLUE_SCALES_FILE].write(scales.tobytes())
+        self.files[CLUE_RERANK_FILE].write(vectors.astype(np.float16).tobytes())
+
+        metadata = self.files[CLUE_METADATA_FILE]
+        for clue in clues:
+            line = json.dumps(clue_metadata(clue), ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+            metadata.write(line)
+            self.offsets.append(self.offsets[-1] + len(line))
+        self.count += len(clues)
+
+    def close(self):
+        """Build the IVF index and move every file into place."""
+        for f in self.files.values():
+            f.close()
+        with open(self.path(CLUE_OFFSETS_FILE) + '.tmp', 'wb') as f:
+            np.save(f, np.frombuffer(self.offsets, dtype=np.uint64))
+
+        vectors = np.memmap(self.path(CLUE_VECTORS_FILE) + '.tmp', dtype=np.int8, mode='r',
+                            shape=(self.count, self.dimension))
+        ivf = IVFIndex.build(vectors, sample_size=IVF_SAMPLE_SIZE)
+        with open(self.path(CLUE_IVF_FILE) + '.tmp', 'wb') as f:
+            ivf.save(f)
+        del vectors
+
+        with open(self.path(CLUE_MANIFEST_FILE) + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({
+                'model_name': self.model_name,
+                'count': self.count,
+                'dimension': int(self.dimension)
+            }, f, indent=4)
+
+        # Replace the manifest last so a partial index is never mistaken for a complete one
+        for name in (CLUE_VECTORS_FILE, CLUE_SCALES_FILE, CLUE_RERANK_FILE, CLUE_METADATA_FILE,
+                     CLUE_OFFSETS_FILE, CLUE_IVF_FILE, CLUE_MANIFEST_FILE):
+            os.replace(self.path(name) + '.tmp', self.path(name))
+        return ivf
+
+
+class ClueIndex:
+    """Memory-mapped clue index: int8 scan, float32 re-rank."""
+
+    def __init__(self, directory='.'):
+        def path(name):
+            return os.path.join(directory, name)
+
+        with open(path(CLUE_MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.model_name = manifest['model_name']
+        shape = (manifest['count'], manifest['dimension'])
+
+        vectors = np.memmap(path(CLUE_VECTORS_FILE), dtype=np.int8, mode='r', shape=shape)
+        scales = np.memmap(path(CLUE_SCALES_FILE), dtype=np.float32, mode='r', shape=(shape[0],))
+        self.rerank_vectors = np.memmap(path(CLUE_RERANK_FILE), dtype=np.float16, mode='r', shape=shape)
+        self.clues = CategoryMetadata(path(CLUE_METADATA_FILE), path(CLUE_OFFSETS_FILE))
+        if len(self.clues) != shape[0]:
+            raise ValueError(f"Clue index is inconsistent: manifest says {shape[0]} rows, "
+                             f"found {len(self.clues)} metadata rows")
+
+        ivf = IVFIndex.load(path(CLUE_IVF_FILE)) if os.path.exists(path(CLUE_IVF_FILE)) else None
+        self.index = VectorIndex.from_quantized(vectors, scales, ivf=ivf)
+
+    def __len__(self):
+        return self.index.num_rows
+
+    def search(self, query, top_k, nprobe=8, exact=False, candidates=RERANK_CANDIDATES):
+        """
+        Return (row ids, similarities) of the top_k clues for a query embedding.
+        The int8 pass picks max(top_k, candidates) rows; those are re-scored exactly.
+        """
+        query = normalize_rows(query)
+        rows, _ = self.index.search(query, max(top_k, candidates), nprobe=nprobe, exact=exact)
+        # Read the float16 rows in file order
+        rows = np.sort(rows)
+        scores = self.rerank_vectors[rows].astype(np.float32) @ query
+        best = top_k_indices(scores, top_k)
+        return rows[best], scores[best]
@@ -0,0 +1,2 @@
+# test_semantic_search.py is a manual script against a running server, not a pytest module
+collect_ignore = ['test_semantic_search.py']
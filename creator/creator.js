@@ -45,7 +45,7 @@ var app = angular.module('jeopardy-creator',[]);
                 board: $scope.board
             }).then(function(response) {
                 if (response.data.success) {
-                    alert('Board saved successfully to: ' + response.data.filepath);
+                    alert('Board queued for saving to: ' + response.data.filepath);
                 } else {
                     alert('Error saving board: ' + response.data.error);
                 }
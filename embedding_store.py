@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+On-disk storage for category embeddings.
+
+    category_embeddings.npy           float32 matrix (one unit-length row per category),
+                                      opened with mmap_mode='r' so processes share pages
+    category_metadata.jsonl           one JSON object per category, same row order
+    category_metadata_offsets.npy     byte offset of each metadata row (plus the end)
+    category_embeddings.json          manifest: model name, row count, dimension
+
+Metadata rows are only parsed when a search result needs them.
+"""
+
+import os
+import json
+import mmap
+import pickle
+import hashlib
+from collections.abc import Sequence
+
+import numpy as np
+
+EMBEDDINGS_FILE = 'category_embeddings.npy'
+METADATA_FILE = 'category_metadata.jsonl'
+OFFSETS_FILE = 'category_metadata_offsets.npy'
+MANIFEST_FILE = 'category_embeddings.json'
+
+# Pickle written by older versions of generate_embeddings.py
+LEGACY_PICKLE_FILE = 'category_embeddings.pkl'
+
+
+def store_exists(directory='.'):
+    """Check whether an embedding store (or the legacy pickle) is present."""
+    return (os.path.exists(os.path.join(directory, MANIFEST_FILE))
+            or os.path.exists(os.path.join(directory, LEGACY_PICKLE_FILE)))
+
+
+def text_hash(text):
+    """Content hash of a category's embedding text, used to reuse vectors."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def save_embedding_store(categories, embeddings, model_name, directory='.'):
+    """
+    Write normalized embeddings and category metadata in the split layout.
+    Each file is written to a temporary name and renamed into place, so
+    processes that still have the old files mapped keep a consistent view.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+
+    def path(name):
+        return os.path.join(directory, name)
+
+    with open(path(EMBEDDINGS_FILE) + '.tmp', 'wb') as f:
+        np.save(f, embeddings / norms)
+
+    offsets = [0]
+    with open(path(METADATA_FILE) + '.tmp', 'wb') as f:
+        for category in categories:
+            line = json.dumps(category, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    with open(path(OFFSETS_FILE) + '.tmp', 'wb') as f:
+        np.save(f, np.array(offsets, dtype=np.uint64))
+
+    with open(path(MANIFEST_FILE) + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({
+            'model_name': model_name,
+            'count': len(categories),
+            'dimension': int(embeddings.shape[1]),
+            'normalized': True
+        }, f, indent=4)
+
+    # Replace the manifest last so a partial store is never mistaken for a complete one
+    for name in (EMBEDDINGS_FILE, METADATA_FILE, OFFSETS_FILE, MANIFEST_FILE):
+        os.replace(path(name) + '.tmp', path(name))
+
+
+class CategoryMetadata(Sequence):
+    """Memory-mapped category metadata; rows are parsed on access."""
+
+    def __init__(self, metadata_path, offsets_path):
+        self.offsets = np.load(offsets_path, mmap_mode='r')
+        with open(metadata_path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('category index out of range')
+        return json.loads(self.mmap[int(self.offsets[i]):int(self.offsets[i + 1])])
+
+
+def load_embedding_store(directory='.'):
+    """
+    Open the embedding store without reading it into memory.
+    Returns a dict with 'embeddings', 'categories', 'model_name' and 'normalized'.
+    Falls back to the legacy pickle (fully loaded) if no store has been written.
+    """
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        legacy_path = os.path.join(directory, LEGACY_PICKLE_FILE)
+        print(f"Warning: {MANIFEST_FILE} not found, loading legacy {LEGACY_PICKLE_FILE}. "
+              f"Rerun generate_embeddings.py to switch to the memory-mapped format.")
+        with open(legacy_path, 'rb') as f:
+            data = pickle.load(f)
+        data['normalized'] = False
+        return data
+
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    embeddings = np.load(os.path.join(directory, EMBEDDINGS_FILE), mmap_mode='r')
+    categories = CategoryMetadata(os.path.join(directory, METADATA_FILE),
+                                  os.path.join(directory, OFFSETS_FILE))
+    if len(embeddings) != manifest['count'] or len(categories) != manifest['count']:
+        raise ValueError(f"Embedding store is inconsistent: manifest says {manifest['count']} rows, "
+                         f"found {len(embeddings)} embeddings and {len(categories)} metadata rows")
+
+    return {
+        'embeddings': embeddings,
+        'categories': categories,
+        'model_name': manifest['model_name'],
+        'normalized': manifest.get('normalized', False)
+    }
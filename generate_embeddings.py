@@ -2,32 +2,229 @@
 """
 Generate embeddings for all Jeopardy categories to enable semantic search.
 This script pre-computes embeddings and saves them for fast lookup.
+Usage: python generate_embeddings.py [--incremental] [--batch-size 64] [--chunk-size 4096] [--workers 1] [--clues]
+
+Texts are encoded in chunks (optionally across a pool of processes), and each
+finished chunk is saved under embedding_checkpoints/ right away, so a run that
+dies partway resumes from the last finished chunk when started again.
 """
 
-import json
-import pickle
+import os
+import time
+import argparse
+import multiprocessing
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, deque
+
+from vector_index import IVFIndex
+from lexical_index import LexicalIndexBuilder, LEXICAL_INDEX_FILE, NAME_WEIGHT
+from archive_stream import iter_archive, peak_memory_mb
+from clue_index import ClueIndexWriter, clue_text, CLUE_CHUNK_SIZE, CLUE_MANIFEST_FILE
+from embedding_store import (
+    save_embedding_store, load_embedding_store, text_hash,
+    EMBEDDINGS_FILE, METADATA_FILE, MANIFEST_FILE
+)
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Questions kept per category for display (the first 3 also go into the embedding text)
+MAX_DISPLAY_QUESTIONS = 5
+
+# Category texts encoded (and checkpointed) per chunk
+DEFAULT_CHUNK_SIZE = 4096
+
+# Finished chunks live here until the whole run has been saved
+CHECKPOINT_DIR = 'embedding_checkpoints'
+
+# Per-process model for the encode pool (loaded on first use)
+_ENCODE_MODEL = None
+
+
+def _init_encode_worker(threads):
+    """Pool initializer: split the CPU cores between workers instead of oversubscribing them."""
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _encode_model(model_name):
+    global _ENCODE_MODEL
+    if _ENCODE_MODEL is None:
+        print("Loading embedding model (this may take a moment on first run)...")
+        # Using a lightweight but effective model
+        _ENCODE_MODEL = SentenceTransformer(model_name)
+    return _ENCODE_MODEL
+
+
+def _encode_chunk(job):
+    """
+    Pool task: return (vectors, resumed) for one chunk of texts, loading
+    them from the chunk's checkpoint if an earlier run finished it.
+    """
+    model_name, batch_size, texts, path = job
+    if os.path.exists(path):
+        return np.load(path), True
+    
+    vectors = np.asarray(_encode_model(model_name).encode(texts, batch_size=batch_size), dtype=np.float32)
+    
+    # Write to a temporary name and rename, so a checkpoint is never half-written
+    with open(path + '.tmp', 'wb') as f:
+        np.save(f, vectors)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+    return vectors, False
+
+
+def checkpoint_path(prefix, number, texts, model_name):
+    """Checkpoint file for a chunk; the name includes a hash of its texts, so changed chunks are re-encoded."""
+    key = text_hash(model_name + '\n' + '\n'.join(texts))[:16]
+    return os.path.join(CHECKPOINT_DIR, f'{prefix}_{number:06d}_{key}.npy')
+
+
+def clear_checkpoints(prefix):
+    """Remove a finished run's checkpoints."""
+    if not os.path.isdir(CHECKPOINT_DIR):
+        return
+    for name in os.listdir(CHECKPOINT_DIR):
+        if name.startswith(prefix + '_'):
+            os.remove(os.path.join(CHECKPOINT_DIR, name))
+    if not os.listdir(CHECKPOINT_DIR):
+        os.rmdir(CHECKPOINT_DIR)
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
 
-def generate_embeddings():
-    """Generate embeddings for all categories in the historical questions file."""
+
+def encode_chunks(chunks, model_name=MODEL_NAME, batch_size=64, workers=1, prefix='chunk', total=None):
+    """
+    Encode an iterable of text lists, yielding each chunk's float32 vectors in order.
+    With workers > 1 chunks are encoded by a process pool (each worker loads
+    the model once); at most 2 chunks per worker are in flight, so memory
+    stays bounded. Every chunk is checkpointed as soon as it is encoded, and
+    chunks already checkpointed by an interrupted run are loaded instead.
+    Prints throughput and, when total (the number of texts) is known, an ETA.
+    """
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    jobs = (
+        (model_name, batch_size, texts, checkpoint_path(prefix, number, texts, model_name))
+        for number, texts in enumerate(chunks)
+    )
+    
+    workers = max(1, workers)
+    pool = None
+    if workers > 1:
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+        else:
+            context = multiprocessing.get_context()
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        pool = context.Pool(workers, initializer=_init_encode_worker, initargs=(threads,))
     
-    print("Loading historical questions from full archive...")
-    with open('jeopardy_questions_archive.json', 'r') as f:
-        questions = json.load(f)
+    pending = deque()
     
-    print(f"Loaded {len(questions)} questions")
+    def submit():
+        job = next(jobs, None)
+        if job is None:
+            return
+        pending.append(pool.apply_async(_encode_chunk, (job,)) if pool else job)
     
-    # Group questions by category and round
-    print("Grouping questions by category...")
-    category_map = defaultdict(lambda: {'questions': [], 'round': None})
+    for _ in range(workers * 2):
+        submit()
     
-    for q in questions:
+    start = time.perf_counter()
+    done = encoded = 0
+    try:
+        while pending:
+            item = pending.popleft()
+            vectors, resumed = item.get() if pool else _encode_chunk(item)
+            submit()
+            
+            done += len(vectors)
+            progress = f"  {done}/{total} texts" if total else f"  {done} texts"
+            if resumed:
+                progress += " (chunk resumed from checkpoint)"
+            else:
+                encoded += len(vectors)
+                rate = encoded / (time.perf_counter() - start)
+                progress += f", {rate:.0f} texts/s"
+                if total:
+                    progress += f", ETA {format_duration((total - done) / rate)}"
+            print(progress)
+            yield vectors
+        
+        if pool:
+            pool.close()
+            pool.join()
+    finally:
+        if pool:
+            pool.terminate()
+    
+    elapsed = time.perf_counter() - start
+    if encoded:
+        print(f"Encoded {encoded} texts with {workers} worker(s) in {format_duration(elapsed)} "
+              f"({encoded / elapsed:.0f} texts/s)")
+
+
+def load_reusable_embeddings(model_name):
+    """
+    Map text hash -> embedding row from the existing store, for incremental runs.
+    Returns an empty dict if there is no store or it was built with another model.
+    """
+    if not Path(MANIFEST_FILE).exists():
+        print("No existing embeddings found, encoding everything.")
+        return {}
+    
+    existing = load_embedding_store()
+    if existing['model_name'] != model_name:
+        print(f"Existing embeddings use {existing['model_name']}, encoding everything.")
+        return {}
+    
+    reusable = {}
+    for row, category in enumerate(existing['categories']):
+        key = category.get('text_hash') or text_hash(category['text'])
+        # Copy out of the memory map; the store is about to be replaced
+        reusable[key] = np.array(existing['embeddings'][row])
+    print(f"Found {len(reusable)} existing category embeddings")
+    return reusable
+
+
+def generate_embeddings(archive_path='jeopardy_questions_archive.json', incremental=False, batch_size=64,
+                        chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+    """
+    Generate embeddings for all categories in the historical questions file.
+    With incremental=True, categories whose embedding text is unchanged reuse
+    their stored vector; only new or changed categories are encoded.
+    Encoding is chunked and checkpointed (see encode_chunks).
+    """
+    
+    # Stream the archive and group questions by category and round as they arrive,
+    # keeping only the few questions per category that are displayed or embedded
+    print("Streaming historical questions from full archive...")
+    category_map = defaultdict(lambda: {'questions': [], 'round': None, 'total': 0})
+    
+    # BM25 index over category names and all of their clue text; document ids
+    # are category rows, which follow category_map's insertion order
+    lexical = LexicalIndexBuilder()
+    category_rows = {}
+    
+    for q in iter_archive(archive_path):
         category_name = q.get('category', '').strip()
         if not category_name:
             continue
+        
+        row = category_rows.get(category_name)
+        if row is None:
+            row = category_rows[category_name] = len(category_rows)
+            lexical.add(row, category_name, weight=NAME_WEIGHT)
+        lexical.add(row, f"{q.get('question') or ''} {q.get('answer') or ''}")
             
         # Clean up the round name
         round_name = q.get('round', '').lower()
@@ -40,13 +237,15 @@ def generate_embeddings():
         else:
             round_name = 'jeopardy'  # default
         
-        category_map[category_name]['questions'].append({
-            'question': q.get('question', ''),
-            'answer': q.get('answer', ''),
-            'value': str(q.get('value') or '$200').replace('$', '').replace(',', ''),
-            'air_date': q.get('air_date', ''),
-            'show_number': q.get('show_number', '')
-        })
+        category_map[category_name]['total'] += 1
+        if len(category_map[category_name]['questions']) < MAX_DISPLAY_QUESTIONS:
+            category_map[category_name]['questions'].append({
+                'question': q.get('question', ''),
+                'answer': q.get('answer', ''),
+                'value': str(q.get('value') or '$200').replace('$', '').replace(',', ''),
+                'air_date': q.get('air_date', ''),
+                'show_number': q.get('show_number', '')
+            })
         
         # Set round if not set, or use the most common round for this category
         if category_map[category_name]['round'] is None:
@@ -54,10 +253,6 @@ def generate_embeddings():
     
     print(f"Found {len(category_map)} unique categories")
     
-    print("Loading embedding model (this may take a moment on first run)...")
-    # Using a lightweight but effective model
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    
     # Collect all categories with their context
     categories = []
     
@@ -75,32 +270,152 @@ def generate_embeddings():
         
         categories.append({
             'name': category_name,
-            'questions': data['questions'][:5],  # Keep only first 5 questions for display
+            'questions': data['questions'],  # Only the first 5 questions are kept for display
             'round': data['round'],
             'text': text_for_embedding,
-            'total_questions': len(data['questions'])
+            'text_hash': text_hash(text_for_embedding),
+            'total_questions': data['total']
         })
     
-    print(f"Generating embeddings for {len(categories)} categories...")
+    reusable = load_reusable_embeddings(MODEL_NAME) if incremental else {}
+    to_encode = [i for i, cat in enumerate(categories) if cat['text_hash'] not in reusable]
+    print(f"Reusing {len(categories) - len(to_encode)} embeddings, encoding {len(to_encode)} new or changed categories...")
     
-    # Generate embeddings in batch for efficiency
-    texts = [cat['text'] for cat in categories]
-    embeddings = model.encode(texts, show_progress_bar=True)
+    encoded = {}
+    if to_encode:
+        texts = [categories[i]['text'] for i in to_encode]
+        chunks = (texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size))
+        vectors = np.concatenate(list(encode_chunks(
+            chunks, MODEL_NAME, batch_size=batch_size, workers=workers, prefix='category', total=len(texts)
+        )))
+        encoded = dict(zip(to_encode, vectors))
     
-    # Save the data
-    output_data = {
-        'categories': categories,
-        'embeddings': embeddings,
-        'model_name': 'all-MiniLM-L6-v2'
-    }
+    embeddings = np.stack([
+        encoded[i] if i in encoded else reusable[cat['text_hash']]
+        for i, cat in enumerate(categories)
+    ]).astype(np.float32)
     
+    # Save the data (categories no longer in the archive are dropped)
     print("Saving embeddings to file...")
-    with open('category_embeddings.pkl', 'wb') as f:
-        pickle.dump(output_data, f)
+    save_embedding_store(categories, embeddings, MODEL_NAME)
+    
+    print("Building approximate search index...")
+    ivf = IVFIndex.build(embeddings)
+    ivf.save('category_ivf.npz')
+    
+    print("Building lexical (BM25) index...")
+    bm25 = lexical.build(len(categories))
+    bm25.save(LEXICAL_INDEX_FILE)
     
     print(f"✓ Successfully generated embeddings for {len(categories)} categories")
-    print(f"✓ Saved to category_embeddings.pkl")
+    print(f"✓ Saved to {EMBEDDINGS_FILE} and {METADATA_FILE}")
+    print(f"✓ Saved search index ({len(ivf.centroids)} clusters) to category_ivf.npz")
+    print(f"✓ Saved lexical index ({len(bm25.terms)} terms) to {LEXICAL_INDEX_FILE}")
+    
+    # Everything is saved; the checkpoints are no longer needed
+    clear_checkpoints('category')
     print(f"✓ Embedding dimension: {embeddings.shape[1]}")
+    
+    peak = peak_memory_mb()
+    if peak is not None:
+        print(f"✓ Peak memory: {peak:.0f} MB")
+
+
+def generate_clue_embeddings(archive_path='jeopardy_questions_archive.json', batch_size=64,
+                             chunk_size=CLUE_CHUNK_SIZE, workers=1):
+    """
+    Embed every clue in the archive for /api/search-clues. Clues are streamed
+    and encoded chunk_size at a time (checkpointed like the categories), and
+    each chunk is quantized and appended to the index files in order.
+    """
+    writer = ClueIndexWriter(MODEL_NAME)
+    # Clue chunks waiting for their vectors (bounded by the chunks in flight)
+    clue_chunks = deque()
+    
+    def chunks():
+        chunk = []
+        for q in iter_archive(archive_path):
+            if not q.get('question'):
+                continue
+            chunk.append(q)
+            if len(chunk) >= chunk_size:
+                clue_chunks.append(chunk)
+                yield [clue_text(clue) for clue in chunk]
+                chunk = []
+        if chunk:
+            clue_chunks.append(chunk)
+            yield [clue_text(clue) for clue in chunk]
+    
+    print("Streaming clues from full archive...")
+    for vectors in encode_chunks(chunks(), MODEL_NAME, batch_size=batch_size, workers=workers, prefix='clue'):
+        writer.add(clue_chunks.popleft(), vectors)
+    
+    if writer.count == 0:
+        print("No clues found; clue index not written")
+        return
+    
+    print("Building clue search index...")
+    ivf = writer.close()
+    clear_checkpoints('clue')
+    print(f"✓ Saved {writer.count} clue embeddings ({len(ivf.centroids)} clusters), manifest {CLUE_MANIFEST_FILE}")
+    
+    peak = peak_memory_mb()
+    if peak is not None:
+        print(f"✓ Peak memory: {peak:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate category embeddings for semantic search'
+    )
+    parser.add_argument(
+        '--archive',
+        default='jeopardy_questions_archive.json',
+        help='Path to archive file (default: jeopardy_questions_archive.json)'
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Reuse existing embeddings for unchanged categories and only encode new or changed ones'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=64,
+        help='Encoding batch size (default: 64)'
+    )
+    
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f'Category texts encoded and checkpointed per chunk (default: {DEFAULT_CHUNK_SIZE})'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Encoding processes, each with its own copy of the model (default: 1)'
+    )
+    parser.add_argument(
+        '--clues',
+        action='store_true',
+        help='Also embed every clue for clue-level search (/api/search-clues)'
+    )
+    parser.add_argument(
+        '--clue-chunk-size',
+        type=int,
+        default=CLUE_CHUNK_SIZE,
+        help=f'Clues encoded and written per chunk (default: {CLUE_CHUNK_SIZE})'
+    )
+    
+    args = parser.parse_args()
+    generate_embeddings(args.archive, incremental=args.incremental, batch_size=args.batch_size,
+                        chunk_size=args.chunk_size, workers=args.workers)
+    if args.clues:
+        generate_clue_embeddings(args.archive, batch_size=args.batch_size, chunk_size=args.clue_chunk_size,
+                                 workers=args.workers)
+
 
 if __name__ == '__main__':
-    generate_embeddings()
+    main()
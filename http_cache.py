@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Response compression and conditional-request caching for server.py and board_server.py.
+
+CachingHandler serves static files (boards/, jquery, bootstrap, sounds, images)
+from an in-memory cache holding each file's bytes plus precompressed gzip (and
+brotli, if installed) variants, keyed by the file's mtime and size. Responses
+carry ETag and Last-Modified headers so browsers revalidate with a 304 instead
+of downloading again. API handlers use send_body() to get the same
+Accept-Encoding negotiation for their JSON; bodies that are cached and sent
+again (pooled and seed-cached boards) are precompress()ed once instead.
+"""
+
+import os
+import gzip
+import shutil
+import threading
+import email.utils
+from collections import OrderedDict
+from datetime import timezone
+
+from metrics import METRICS, InstrumentedHandler
+
+# brotli is optional; gzip is used when it isn't installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Memory budget for cached static files and their compressed variants
+STATIC_CACHE_BYTES = 64 * 1024 * 1024
+# Larger files are streamed from disk (still with ETag/Last-Modified)
+STATIC_MAX_FILE_SIZE = 4 * 1024 * 1024
+
+# Vendored assets that rarely change may be cached by browsers without revalidating;
+# everything else (pages, scripts, boards/) is revalidated on every load
+LONG_CACHE_DIRS = ('jquery', 'bootstrap-static', 'sounds', 'images')
+LONG_CACHE_MAX_AGE = 86400
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick the preferred supported encoding ('br' or 'gzip') from an Accept-Encoding header, or None."""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    """Compress body with 'gzip' or 'br'."""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def precompress(body):
+    """
+    {encoding: bytes} for a body that is sent many times: the raw bytes under
+    None plus every supported encoding that makes it smaller. send_body()
+    only picks from these, so cached responses are compressed once.
+    """
+    variants = {None: body}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        for encoding in ENCODINGS:
+            compressed = compress(body, encoding)
+            if len(compressed) < len(body):
+                variants[encoding] = compressed
+    return variants
+
+
+def is_compressible(content_type):
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class StaticEntry:
+    """One cached static file: validators plus its body in each encoding (None = stream from disk)."""
+
+    def __init__(self, path, stat, content_type, data=None):
+        self.path = path
+        self.key = (stat.st_mtime_ns, stat.st_size)
+        self.size = stat.st_size
+        self.content_type = content_type
+        self.etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        self.last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+        self.mtime = int(stat.st_mtime)
+
+        self.bodies = {}
+        if data is not None:
+            self.bodies = precompress(data) if is_compressible(content_type) else {None: data}
+
+    @property
+    def cached_bytes(self):
+        return sum(len(body) for body in self.bodies.values())
+
+    def variant_etag(self, encoding):
+        """Strong ETags differ per encoding."""
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def matches(self, if_none_match):
+        """Check an If-None-Match header against this file's ETags."""
+        if if_none_match.strip() == '*':
+            return True
+        etags = {self.variant_etag(encoding) for encoding in (None,) + ENCODINGS}
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            if tag in etags:
+                return True
+        return False
+
+
+class StaticCache:
+    """
+    Thread-safe LRU of StaticEntry objects, bounded by total cached bytes.
+    An entry is reloaded when the file's mtime or size changes.
+    """
+
+    def __init__(self, max_bytes=STATIC_CACHE_BYTES, max_file_size=STATIC_MAX_FILE_SIZE):
+        self.max_bytes = max_bytes
+        self.max_file_size = max_file_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, content_type):
+        """Return the entry for path, (re)loading it if the file changed. Raises OSError."""
+        stat = os.stat(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry.key == (stat.st_mtime_ns, stat.st_size):
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        if stat.st_size > self.max_file_size:
+            return StaticEntry(path, stat, content_type)
+
+        with open(path, 'rb') as f:
+            # Validators come from the open file so they always match the bytes read
+            stat = os.fstat(f.fileno())
+            data = f.read()
+        entry = StaticEntry(path, stat, content_type, data)
+
+        with self.lock:
+            old = self.entries.pop(path, None)
+            if old is not None:
+                self.total_bytes -= old.cached_bytes
+            self.entries[path] = entry
+            self.total_bytes += entry.cached_bytes
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted.cached_bytes
+        return entry
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'files': len(self.entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+
+# Shared by every handler in the process
+STATIC_CACHE = StaticCache()
+
+
+def static_cache_stats():
+    stats = STATIC_CACHE.stats()
+    stats['size'] = stats['files']
+    return stats
+
+
+METRICS.register_cache('static', static_cache_stats)
+
+
+class CachingHandler(InstrumentedHandler):
+    """
+    SimpleHTTPRequestHandler (with request metrics) plus cached, compressed static files and
+    ETag/Last-Modified revalidation. Subclasses call super().do_GET() for
+    static files as before, and send_body() for API responses.
+    """
+
+    def do_GET(self):
+        self.send_static()
+
+    def do_HEAD(self):
+        self.send_static(head=True)
+
+    def send_static(self, head=False):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            # Directory listings, redirects and 404s are handled as before
+            if head:
+                super().do_HEAD()
+            else:
+                super().do_GET()
+            return
+
+        try:
+            entry = STATIC_CACHE.get(path, self.guess_type(path))
+        except OSError:
+            self.send_error(404, 'File not found')
+            return
+
+        encoding = None
+        if is_compressible(entry.content_type):
+            encoding = negotiate_encoding(self.headers.get('Accept-Encoding'))
+            if encoding not in entry.bodies:
+                encoding = None
+
+        if self.not_modified(entry):
+            self.send_response(304)
+            if is_compressible(entry.content_type):
+                self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('ETag', entry.variant_etag(encoding))
+            self.send_header('Last-Modified', entry.last_modified)
+            self.send_header('Cache-Control', self.cache_control())
+            self.end_headers()
+            return
+
+        body = entry.bodies.get(encoding)
+
+        self.send_response(200)
+        self.send_header('Content-Type', entry.content_type)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        if is_compressible(entry.content_type):
+            self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(body) if body is not None else entry.size))
+        self.send_header('ETag', entry.variant_etag(encoding))
+        self.send_header('Last-Modified', entry.last_modified)
+        self.send_header('Cache-Control', self.cache_control())
+        self.end_headers()
+
+        if head:
+            return
+        if body is not None:
+            self.wfile.write(body)
+        else:
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, self.wfile)
+
+    def not_modified(self, entry):
+        """Evaluate If-None-Match (preferred) or If-Modified-Since."""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            return entry.matches(if_none_match)
+
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since is None:
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return entry.mtime <= since.timestamp()
+        return False
+
+    def cache_control(self):
+        first = self.path.lstrip('/').split('/', 1)[0]
+        if first in LONG_CACHE_DIRS:
+            return f'public, max-age={LONG_CACHE_MAX_AGE}'
+        return 'no-cache'
+
+    def send_body(self, body, status=200, content_type='application/json', headers=None):
+        """
+        Send a complete response body, compressed if the client accepts it.
+        body is bytes (compressed here) or a precompress() dict (a variant is picked).
+        """
+        encoding = None
+        if isinstance(body, dict):
+            encoding = negotiate_encoding(self.headers.get('Accept-Encoding'))
+            if encoding not in body:
+                encoding = None
+            body = body[encoding]
+        elif len(body) >= MIN_COMPRESS_SIZE:
+            encoding = negotiate_encoding(self.headers.get('Accept-Encoding'))
+            if encoding:
+                body = compress(body, encoding)
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        if self.command != 'HEAD':
+            self.wfile.write(body)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+BM25 inverted index for lexical category search.
+
+generate_embeddings.py feeds every category's name and clue text into a
+LexicalIndexBuilder while it streams the archive, and saves the result next
+to the embeddings as category_bm25.npz. Postings are stored in CSR layout
+with their BM25 weights precomputed, so a query is just a few array slices
+and a bincount; no model is involved.
+"""
+
+import re
+from array import array
+
+import numpy as np
+
+from vector_index import top_k_indices
+
+LEXICAL_INDEX_FILE = 'category_bm25.npz'
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Category name tokens count this many times, so names outrank clue text
+NAME_WEIGHT = 3
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he',
+    'her', 'his', 'in', 'is', 'it', 'its', 'of', 'on', 'or', 'she', 'that', 'the',
+    'this', 'to', 'was', 'were', 'with', 'you', 'your'
+))
+
+
+def tokenize(text):
+    """Lowercase word tokens of text, minus stopwords."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class LexicalIndexBuilder:
+    """Collects (term, document) occurrences; documents are category rows."""
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.terms = array('I')
+        self.docs = array('I')
+
+    def add(self, doc, text, weight=1):
+        """Add the tokens of text to document doc, each counted weight times."""
+        for token in tokenize(text):
+            term = self.vocabulary.setdefault(token, len(self.vocabulary))
+            for _ in range(weight):
+                self.terms.append(term)
+                self.docs.append(doc)
+
+    def build(self, num_docs, k1=BM25_K1, b=BM25_B):
+        """Compute term frequencies and per-posting BM25 weights."""
+        num_terms = len(self.vocabulary)
+        terms = np.frombuffer(self.terms, dtype=np.uint32).astype(np.int64)
+        docs = np.frombuffer(self.docs, dtype=np.uint32).astype(np.int64)
+
+        # Sorted by term, then document: exactly the CSR posting order
+        keys, term_freqs = np.unique(terms * max(num_docs, 1) + docs, return_counts=True)
+        posting_terms = keys // max(num_docs, 1)
+        posting_docs = (keys % max(num_docs, 1)).astype(np.int32)
+
+        doc_lengths = np.bincount(docs, minlength=num_docs).astype(np.float64)
+        avg_length = doc_lengths.mean() if num_docs and doc_lengths.any() else 1.0
+        doc_freqs = np.bincount(posting_terms, minlength=num_terms)
+        idf = np.log(1.0 + (num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5))
+
+        norms = k1 * (1.0 - b + b * doc_lengths[posting_docs] / avg_length)
+        weights = idf[posting_terms] * term_freqs * (k1 + 1.0) / (term_freqs + norms)
+
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        offsets = np.concatenate([[0], np.cumsum(doc_freqs)])
+        return LexicalIndex(vocabulary, offsets, posting_docs, weights.astype(np.float32), num_docs)
+
+
+class LexicalIndex:
+    """
+    BM25 postings per term: documents docs[offsets[t]:offsets[t + 1]] with
+    precomputed weights in the same slice.
+    """
+
+    def __init__(self, vocabulary, offsets, docs, weights, num_docs):
+        self.terms = {term: i for i, term in enumerate(vocabulary)}
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.docs = np.asarray(docs, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.num_docs = int(num_docs)
+
+    def save(self, filepath=LEXICAL_INDEX_FILE):
+        """Save the index as an .npz file (vocabulary as newline-separated UTF-8)."""
+        vocabulary = sorted(self.terms, key=self.terms.get)
+        blob = np.frombuffer('\n'.join(vocabulary).encode('utf-8'), dtype=np.uint8)
+        np.savez(filepath, vocabulary=blob, offsets=self.offsets, docs=self.docs,
+                 weights=self.weights, num_docs=np.int64(self.num_docs))
+
+    @classmethod
+    def load(cls, filepath=LEXICAL_INDEX_FILE):
+        """Load an index saved with save()."""
+        with np.load(filepath) as data:
+            text = data['vocabulary'].tobytes().decode('utf-8')
+            vocabulary = text.split('\n') if text else []
+            return cls(vocabulary, data['offsets'], data['docs'], data['weights'], data['num_docs'])
+
+    def search(self, query, top_k):
+        """Return (document ids, BM25 scores) of the top_k documents for query, best first."""
+        terms = {self.terms[token] for token in tokenize(query) if token in self.terms}
+        if not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        docs = np.concatenate([self.docs[self.offsets[t]:self.offsets[t + 1]] for t in terms])
+        weights = np.concatenate([self.weights[self.offsets[t]:self.offsets[t + 1]] for t in terms])
+        if len(terms) == 1:
+            candidates, scores = docs, weights
+        else:
+            candidates, inverse = np.unique(docs, return_inverse=True)
+            scores = np.bincount(inverse, weights=weights)
+
+        best = top_k_indices(scores, top_k)
+        return candidates[best].astype(np.int64), scores[best]
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Prometheus metrics for server.py and board_server.py (GET /api/metrics).
+
+InstrumentedHandler counts and times every request by route, so a scrape
+shows whether slowness comes from board generation, search or static files.
+Servers also register their caches (hit/miss counters), admission limiters and
+load times with the shared METRICS registry; registered values are read
+only when /api/metrics is scraped.
+"""
+
+import time
+import bisect
+import threading
+import http.server
+from collections import defaultdict
+from urllib.parse import urlparse
+
+METRICS_PREFIX = 'jeopardy'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Request latency histogram buckets (seconds)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# /api/<name> routes reported by name; other API paths are 'other-api', everything else 'static'
+API_ROUTES = ('generate-board', 'search-categories', 'search-clues', 'save-board', 'boards', 'metrics')
+
+
+def route_label(path):
+    """Route label for a request path (a fixed set, so label cardinality stays bounded)."""
+    path = urlparse(path).path
+    if path.startswith('/api/'):
+        name = path[5:].split('/', 1)[0]
+        return name if name in API_ROUTES else 'other-api'
+    return 'static'
+
+
+def lru_cache_stats(fn):
+    """Stats function for a functools.lru_cache-wrapped fn, for Metrics.register_cache."""
+    def stats():
+        info = fn.cache_info()
+        return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize}
+    return stats
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-on-render latency histogram."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(le, cumulative count) pairs, ending with +Inf."""
+        total = 0
+        for le, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield le, total
+
+
+class Metrics:
+    """
+    Thread-safe registry of request metrics plus registered caches and values.
+    Cache stats functions return a dict with 'hits', 'misses' and optionally
+    'size', or None while the cache doesn't exist yet.
+    """
+
+    def __init__(self, prefix=METRICS_PREFIX):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(Histogram)
+        self.in_flight = defaultdict(int)
+        self.gauges = {}
+        self.values = {}
+        self.caches = {}
+        self.started = time.time()
+
+    def request_started(self, route):
+        with self.lock:
+            self.in_flight[route] += 1
+
+    def request_finished(self, route, method, status, seconds):
+        with self.lock:
+            self.in_flight[route] -= 1
+            self.requests[(route, method, status)] += 1
+            self.latency[route].observe(seconds)
+
+    def set_gauge(self, name, value, help_text):
+        """Set a fixed value, e.g. how long the archive took to load."""
+        with self.lock:
+            self.gauges[name] = (help_text, value)
+
+    def register_value(self, name, fn, help_text, kind='gauge'):
+        """Report fn() (skipped when it returns None) as a gauge or counter on every scrape."""
+        with self.lock:
+            self.values[name] = (help_text, kind, fn)
+
+    def register_cache(self, name, stats_fn):
+        with self.lock:
+            self.caches[name] = stats_fn
+
+    def render(self):
+        """The registry in Prometheus text exposition format, as bytes."""
+        with self.lock:
+            requests = dict(self.requests)
+            latency = {route: (list(h.cumulative()), h.sum, h.count) for route, h in self.latency.items()}
+            in_flight = dict(self.in_flight)
+            gauges = dict(self.gauges)
+            values = dict(self.values)
+            caches = dict(self.caches)
+
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            name = f'{self.prefix}_{name}'
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for suffix, labels, value in samples:
+                lines.append(f'{name}{suffix}{format_labels(labels)} {format_value(value)}')
+
+        family('uptime_seconds', 'gauge', 'Seconds since the server started.',
+               [('', {}, time.time() - self.started)])
+
+        family('http_requests_total', 'counter', 'HTTP requests by route, method and status.', [
+            ('', {'route': route, 'method': method, 'status': status}, count)
+            for (route, method, status), count in sorted(requests.items())
+        ])
+
+        samples = []
+        for route, (buckets, total, count) in sorted(latency.items()):
+            for le, cumulative in buckets:
+                samples.append(('_bucket', {'route': route, 'le': le}, cumulative))
+            samples.append(('_sum', {'route': route}, total))
+            samples.append(('_count', {'route': route}, count))
+        family('http_request_duration_seconds', 'histogram', 'HTTP request latency by route.', samples)
+
+        family('http_requests_in_flight', 'gauge', 'HTTP requests currently being handled, by route.', [
+            ('', {'route': route}, count) for route, count in sorted(in_flight.items())
+        ])
+
+        cache_stats = {}
+        for name, stats_fn in sorted(caches.items()):
+            try:
+                stats = stats_fn()
+            except Exception:
+                stats = None
+            if stats is not None:
+                cache_stats[name] = stats
+        family('cache_hits_total', 'counter', 'Cache hits by cache.', [
+            ('', {'cache': name}, stats['hits']) for name, stats in cache_stats.items()
+        ])
+        family('cache_misses_total', 'counter', 'Cache misses by cache.', [
+            ('', {'cache': name}, stats['misses']) for name, stats in cache_stats.items()
+        ])
+        family('cache_entries', 'gauge', 'Entries currently held by each cache.', [
+            ('', {'cache': name}, stats['size']) for name, stats in cache_stats.items() if 'size' in stats
+        ])
+
+        for name, (help_text, value) in sorted(gauges.items()):
+            family(name, 'gauge', help_text, [('', {}, value)])
+
+        for name, (help_text, kind, fn) in sorted(values.items()):
+            try:
+                value = fn()
+            except Exception:
+                value = None
+            if value is not None:
+                family(name, kind, help_text, [('', {}, value)])
+
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+# Shared by every handler in the process
+METRICS = Metrics()
+
+
+class InstrumentedHandler(http.server.SimpleHTTPRequestHandler):
+    """
+    SimpleHTTPRequestHandler that records every request's route, status and
+    latency in METRICS. Subclasses answer /api/metrics with send_metrics().
+    """
+
+    metrics_start = None
+
+    def parse_request(self):
+        if not super().parse_request():
+            return False
+        self.metrics_route = route_label(self.path)
+        self.metrics_status = None
+        self.metrics_start = time.perf_counter()
+        METRICS.request_started(self.metrics_route)
+        return True
+
+    def send_response_only(self, code, message=None):
+        self.metrics_status = code
+        super().send_response_only(code, message)
+
+    def handle_one_request(self):
+        try:
+            super().handle_one_request()
+        finally:
+            if self.metrics_start is not None:
+                # No status means the client went away before a response was sent
+                status = str(self.metrics_status) if self.metrics_status else 'aborted'
+                METRICS.request_finished(self.metrics_route, self.command, status,
+                                         time.perf_counter() - self.metrics_start)
+                self.metrics_start = None
+
+    def send_metrics(self):
+        body = METRICS.render()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
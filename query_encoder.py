@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Cached, micro-batched query encoding for semantic search.
+
+A handful of queries dominate search traffic, so embeddings are kept in an
+LRU cache keyed by normalized query text. Cache misses that arrive within a
+short window are encoded together in one model.encode call. A caller waits
+at most timeout seconds for its batch and then gets EncodeTimeout, which
+servers answer with a 503 like any other busy condition.
+"""
+
+import time
+import threading
+import queue
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError
+
+from serving import PoolSaturated, DEFAULT_RETRY_AFTER
+
+# Longest a caller waits for its query to be encoded
+DEFAULT_ENCODE_TIMEOUT = 10.0
+
+
+class EncodeTimeout(PoolSaturated):
+    """Raised when a query isn't encoded within the encoder's timeout."""
+
+
+def normalize_query(query):
+    """Cache key for a query: lowercased with whitespace collapsed."""
+    return ' '.join(query.lower().split())
+
+
+class QueryEncoder:
+    """
+    Wraps a SentenceTransformer-like model (anything with encode(list of str)).
+    encode() is thread-safe; concurrent misses are batched by a worker thread.
+    """
+
+    def __init__(self, model, cache_size=1024, batch_window=0.005, max_batch=32,
+                 timeout=DEFAULT_ENCODE_TIMEOUT):
+        self.model = model
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+
+        self.pending = queue.Queue()
+        self.worker = None
+
+    def encode(self, query):
+        """
+        Return the embedding for query, from the cache when possible.
+        Raises EncodeTimeout if the batching thread doesn't answer in time.
+        """
+        key = normalize_query(query)
+
+        with self.lock:
+            embedding = self.cache.get(key)
+            if embedding is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return embedding
+            self.misses += 1
+
+            # Restart the batching thread if it died, rather than leave callers waiting
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self._run_batches, daemon=True)
+                self.worker.start()
+
+        future = Future()
+        self.pending.put((key, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            # Too late for this caller; the batching thread skips cancelled futures
+            future.cancel()
+            raise EncodeTimeout(DEFAULT_RETRY_AFTER)
+
+    def stats(self):
+        """Cache and batching counters."""
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self.cache),
+                'max_size': self.cache_size,
+                'batches': self.batches
+            }
+
+    def _store(self, key, embedding):
+        with self.lock:
+            self.cache[key] = embedding
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def _run_batches(self):
+        """Worker loop: collect misses for batch_window, then encode them together."""
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.batch_window
+            try:
+                while len(batch) < self.max_batch:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    batch.append(self.pending.get(timeout=timeout))
+            except queue.Empty:
+                pass
+
+            # The same query may have missed several times within the window;
+            # callers that already timed out are dropped
+            waiting = OrderedDict()
+            for key, future in batch:
+                if future.set_running_or_notify_cancel():
+                    waiting.setdefault(key, []).append(future)
+            if not waiting:
+                continue
+
+            try:
+                embeddings = self.model.encode(list(waiting))
+            except Exception as e:
+                for futures in waiting.values():
+                    for future in futures:
+                        future.set_exception(e)
+                continue
+
+            with self.lock:
+                self.batches += 1
+            for (key, futures), embedding in zip(waiting.items(), embeddings):
+                self._store(key, embedding)
+                for future in futures:
+                    future.set_result(embedding)
@@ -4,12 +4,26 @@ Random Jeopardy Board Generator
 
 Generates a random Jeopardy board from the archive dataset with difficulty filtering.
 Usage: python random_board_generator.py --difficulty easy|medium|hard [--output filename.json]
+Batch: python random_board_generator.py --count N --difficulties easy,medium,hard --seed S
+       (--output-dir DIR | --jsonl FILE) [--workers W]
 """
 
+import os
+import re
+import sys
 import json
+import time
+import bisect
 import random
 import argparse
-from collections import defaultdict
+import functools
+import itertools
+import threading
+import multiprocessing
+from collections import OrderedDict, defaultdict
+
+from archive_format import CompiledArchive, is_compiled_archive, is_complete_clue, load_compiled_archive
+from archive_stream import iter_archive
 
 # Try to import ftfy, use fallback if not available
 try:
@@ -24,6 +38,15 @@ except ImportError:
         # Basic cleanup - decode unicode escapes and strip whitespace
         return text.strip()
 
+# Distinct texts whose fix_text output is kept between boards
+FIX_TEXT_CACHE_SIZE = 32768
+
+
+@functools.lru_cache(maxsize=FIX_TEXT_CACHE_SIZE)
+def normalize_text(text, upper=False):
+    """fix_text (optionally uppercasing first), memoized so popular clues are only fixed once."""
+    return fix_text(text.upper() if upper else text)
+
 
 # Difficulty level value ranges (in dollars)
 DIFFICULTY_RANGES = {
@@ -44,147 +67,567 @@ DIFFICULTY_RANGES = {
     }
 }
 
+# Board round keys -> round names used in the archive
+ROUND_NAMES = {
+    'jeopardy': 'Jeopardy!',
+    'double-jeopardy': 'Double Jeopardy!'
+}
+
+BOARD_ROUNDS = ('jeopardy', 'double-jeopardy', 'final-jeopardy')
+
+# Fewest categories BoardIndex keeps viable per difficulty and round; below this
+# it accepts categories holding fewer of the ladder's exact values
+MIN_LADDER_CATEGORIES = 12
+
+# Sessions tracked by a BoardEngine before the least recently used is forgotten
+MAX_SESSIONS = 4096
+
+# Random draws tried per value bucket before scanning it for a clue that is still allowed
+PICK_TRIES = 8
+
+
+def resolve_archive_path(filepath='jeopardy_questions_archive.json'):
+    """
+    Prefer the compiled archive (same name with a .bin extension, see
+    archive_format.py) when it exists and is at least as new as the JSON file.
+    """
+    compiled_path = os.path.splitext(filepath)[0] + '.bin'
+    if compiled_path != filepath and os.path.exists(compiled_path):
+        if not os.path.exists(filepath) or os.path.getmtime(compiled_path) >= os.path.getmtime(filepath):
+            return compiled_path
+    return filepath
+
+
+def get_value_from_string(value_str):
+    """Extract numeric value from string like '$200' (compiled archives store ints)."""
+    if isinstance(value_str, int):
+        return value_str
+    try:
+        return int(value_str.strip('$').replace(',', ''))
+    except (ValueError, AttributeError):
+        return 0
+
+
+class Clue:
+    """
+    Compact in-memory clue.
+    Category, round and air date strings are interned so every clue shares one
+    copy, the dollar value is parsed to an int once, and fields boards don't
+    use (like show_number) are dropped.
+    """
+    
+    __slots__ = ('category', 'round', 'value', 'question', 'answer', 'air_date', 'image')
+    
+    def __init__(self, category, round, value, question, answer, air_date='', image=None):
+        self.category = category
+        self.round = round
+        self.value = value
+        self.question = question
+        self.answer = answer
+        self.air_date = air_date
+        self.image = image
+    
+    @classmethod
+    def from_dict(cls, clue):
+        """Build a Clue from an archive dict, or return None if required fields are missing."""
+        if not is_complete_clue(clue):
+            return None
+        return cls(
+            sys.intern(clue['category']),
+            sys.intern(clue['round']),
+            get_value_from_string(clue.get('value')),
+            clue['question'],
+            clue['answer'],
+            sys.intern(clue.get('air_date') or ''),
+            clue.get('image') or None
+        )
+
+
+class FixedClue(Clue):
+    """A Clue whose question and answer already hold their fixed board text (see fix_archive_text)."""
+    
+    __slots__ = ()
+
+
+def clue_text(clue):
+    """Board question and answer text for a clue."""
+    if isinstance(clue, FixedClue):
+        return clue.question, clue.answer
+    return normalize_text(clue.question, True), normalize_text(clue.answer)
+
+
+def _fix_texts(job):
+    """Pool task: fix a chunk of (text, upper) pairs."""
+    return [fix_text(text.upper() if upper else text) for text, upper in job]
+
+
+def fix_archive_text(archive_data, workers=None, chunk_size=2000):
+    """
+    Run every clue's question and answer through fix_text up front, spread
+    across a process pool. Returns FixedClues, so boards built from them
+    only look up text instead of fixing it per board.
+    """
+    clues = compact_archive(archive_data)
+    # Each distinct text is fixed once; answers in particular repeat a lot
+    texts = list(dict.fromkeys(
+        pair for clue in clues for pair in ((clue.question, True), (clue.answer, False))
+    ))
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(chunks)))
+    
+    print(f"Fixing {len(texts)} distinct texts with {workers} worker(s)...")
+    start = time.perf_counter()
+    if workers == 1:
+        results = map(_fix_texts, chunks)
+        fixed = [text for chunk in results for text in chunk]
+    else:
+        with multiprocessing.get_context().Pool(workers) as pool:
+            fixed = [text for chunk in pool.imap(_fix_texts, chunks) for text in chunk]
+    fixed = dict(zip(texts, fixed))
+    print(f"Fixed clue text in {time.perf_counter() - start:.1f}s")
+    
+    return [
+        FixedClue(clue.category, clue.round, clue.value, fixed[(clue.question, True)],
+                  fixed[(clue.answer, False)], clue.air_date, clue.image)
+        for clue in clues
+    ]
+
+
+def compact_archive(archive_data):
+    """
+    Convert archive dicts to Clues, skipping incomplete ones.
+    Compiled archives and lists that are already compact are returned unchanged.
+    """
+    if isinstance(archive_data, CompiledArchive):
+        return archive_data
+    clues = []
+    for clue in archive_data:
+        if not isinstance(clue, Clue):
+            clue = Clue.from_dict(clue)
+            if clue is None:
+                continue
+        clues.append(clue)
+    return clues
+
 
 def load_archive(filepath='jeopardy_questions_archive.json'):
-    """Load the Jeopardy questions archive."""
+    """Load the Jeopardy questions archive (JSON or compiled binary format) as compact clues."""
+    filepath = resolve_archive_path(filepath)
     print(f"Loading archive from {filepath}...")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    if is_compiled_archive(filepath):
+        data = load_compiled_archive(filepath)
+    else:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = compact_archive(json.load(f))
     print(f"Loaded {len(data)} questions from archive.")
     return data
 
 
+def stream_archive(filepath='jeopardy_questions_archive.json'):
+    """
+    Stream the archive into a list of compact clues without ever holding the
+    full parsed JSON (see archive_stream.py). Compiled archives are returned as-is.
+    """
+    filepath = resolve_archive_path(filepath)
+    print(f"Streaming archive from {filepath}...")
+    if is_compiled_archive(filepath):
+        return load_compiled_archive(filepath)
+    return compact_archive(iter_archive(filepath))
+
+
 def organize_by_category(archive_data):
     """Organize questions by category and round."""
     by_category = defaultdict(lambda: defaultdict(list))
     
-    for question in archive_data:
-        if not all(k in question for k in ['category', 'round', 'value', 'question', 'answer']):
-            continue
-        
-        category = question['category']
-        round_name = question['round']
-        
+    for question in compact_archive(archive_data):
         # Skip Final Jeopardy for now (we'll handle separately)
-        if 'Final' in round_name:
+        if 'Final' in question.round:
             continue
             
-        by_category[category][round_name].append(question)
+        by_category[question.category][question.round].append(question)
     
     return by_category
 
 
-def get_value_from_string(value_str):
-    """Extract numeric value from string like '$200'."""
-    try:
-        return int(value_str.strip('$').replace(',', ''))
-    except (ValueError, AttributeError):
-        return 0
+def category_words(name):
+    """Lowercase words in a category name, for keyword matching."""
+    return re.findall(r'\w+', name.lower())
+
+
+def nearest_values(values, target):
+    """Bucket values ordered by distance from target (lower value first on ties)."""
+    return tuple(sorted(values, key=lambda value: (abs(value - target), value)))
+
+
+class BoardIndex:
+    """
+    Precomputed lookup tables for board assembly, built once from organize_by_category.
+    
+    questions: question id -> Clue (unique question text per category and round)
+    buckets: (round, category) -> {value: [question ids]}
+    nearest: (round, category) -> {ladder value: bucket values, closest first}
+    viable: (difficulty, round) -> categories with enough unique clues holding that
+        difficulty's value ladder (or as many of its values as MIN_LADDER_CATEGORIES allow)
+    category_ids: category -> category id (position in category_names)
+    keywords: category word -> categories containing it (in category id order)
+    aired: round -> (air dates, categories) of each category's appearances, sorted by date
+    """
+    
+    def __init__(self, by_category):
+        self.questions = []
+        self.buckets = {}
+        self.category_names = list(by_category)
+        self.category_ids = {category: i for i, category in enumerate(self.category_names)}
+        self.keywords = defaultdict(list)
+        unique_counts = defaultdict(dict)
+        appearances = defaultdict(set)
+        
+        for category, rounds in by_category.items():
+            for word in set(category_words(category)):
+                self.keywords[word].append(category)
+            
+            for round_name, questions in rounds.items():
+                buckets = defaultdict(list)
+                seen = set()  # Track question text to avoid duplicates
+                
+                for q in questions:
+                    if q.question in seen:
+                        continue
+                    seen.add(q.question)
+                    buckets[q.value].append(len(self.questions))
+                    self.questions.append(q)
+                    appearances[round_name].add((q.air_date or '', category))
+                
+                self.buckets[(round_name, category)] = dict(buckets)
+                unique_counts[round_name][category] = len(seen)
+        
+        # Bucket fallback order for every ladder value, shared by categories with the same values
+        ladders = {round_name: sorted({value for ranges in DIFFICULTY_RANGES.values() for value in ranges[round_key]})
+                   for round_key, round_name in ROUND_NAMES.items()}
+        orders = {}
+        self.nearest = {}
+        for (round_name, category), buckets in self.buckets.items():
+            values = tuple(sorted(buckets))
+            key = (round_name, values)
+            if key not in orders:
+                orders[key] = {target: nearest_values(values, target) for target in ladders.get(round_name, ())}
+            self.nearest[(round_name, category)] = orders[key]
+        
+        self.aired = {}
+        for round_name, pairs in appearances.items():
+            pairs = sorted(pairs)
+            self.aired[round_name] = ([date for date, _ in pairs], [category for _, category in pairs])
+        
+        self.viable = {}
+        self.viable_sets = {}
+        for difficulty, ranges in DIFFICULTY_RANGES.items():
+            for round_key, round_name in ROUND_NAMES.items():
+                ladder = ranges[round_key]
+                # Need at least 5 unique questions for a proper category
+                needed = max(5, len(ladder))
+                enough = [cat for cat, count in unique_counts[round_name].items() if count >= needed]
+                rungs = {cat: sum(value in self.buckets[(round_name, cat)] for value in ladder) for cat in enough}
+                # Prefer categories holding every value on this difficulty's ladder. Some rungs
+                # barely exist in the archive (e.g. $1,200 in Jeopardy!), so if too few do, settle
+                # for the most rungs that enough categories hold; the rest come from the nearest value
+                for required in range(len(ladder), -1, -1):
+                    viable = [cat for cat in enough if rungs[cat] >= required]
+                    if len(viable) >= MIN_LADDER_CATEGORIES:
+                        break
+                self.viable[(difficulty, round_name)] = viable
+                self.viable_sets[(difficulty, round_name)] = set(viable)
+    
+    def viable_categories(self, difficulty, round_name):
+        """Return the categories that can fill a round at this difficulty."""
+        return self.viable.get((difficulty, round_name), [])
+    
+    def keyword_categories(self, keyword):
+        """Categories whose name contains keyword (as whole words, in order)."""
+        words = category_words(keyword)
+        if not words:
+            return []
+        categories = min((self.keywords.get(word, []) for word in words), key=len)
+        if len(words) > 1:
+            phrase = ' '.join(words)
+            categories = [c for c in categories if phrase in ' '.join(category_words(c))]
+        return categories
+    
+    def aired_categories(self, round_name, start_date=None, end_date=None):
+        """Categories that appeared in a round between start_date and end_date (inclusive)."""
+        dates, categories = self.aired.get(round_name, ([], []))
+        lo = bisect.bisect_left(dates, start_date) if start_date else 0
+        hi = bisect.bisect_right(dates, end_date) if end_date else len(dates)
+        return list(dict.fromkeys(categories[lo:hi]))
+    
+    def candidate_categories(self, difficulty, round_name, filters=None):
+        """Viable categories for a round that also pass the filters' keyword and air dates."""
+        if filters is None or not (filters.keyword or filters.start_date or filters.end_date):
+            return self.viable_categories(difficulty, round_name)
+        
+        lists = []
+        if filters.keyword:
+            lists.append(self.keyword_categories(filters.keyword))
+        if filters.start_date or filters.end_date:
+            lists.append(self.aired_categories(round_name, filters.start_date, filters.end_date))
+        
+        # Walk the shortest list and check membership in the others
+        lists.sort(key=len)
+        others = [set(other) for other in lists[1:]]
+        others.append(self.viable_sets.get((difficulty, round_name), set()))
+        return [c for c in lists[0] if all(c in other for other in others)]
+
+
+class BoardFilters:
+    """
+    Limits on the clues a board is built from.
+    start_date/end_date ('YYYY-MM-DD', inclusive) apply to every clue; keyword
+    must appear in each Jeopardy/Double Jeopardy category name; rounds lists
+    the board rounds to generate (default: all of BOARD_ROUNDS).
+    """
+    
+    def __init__(self, start_date=None, end_date=None, keyword=None, rounds=None):
+        self.start_date = start_date or None
+        self.end_date = end_date or None
+        self.keyword = keyword or None
+        self.rounds = tuple(rounds) if rounds else BOARD_ROUNDS
+        invalid = [r for r in self.rounds if r not in BOARD_ROUNDS]
+        if invalid:
+            raise ValueError(f"Invalid rounds: {', '.join(invalid)}. Choose from: {', '.join(BOARD_ROUNDS)}")
+    
+    def key(self):
+        """Hashable summary, for caching boards built with these filters."""
+        return (self.start_date, self.end_date, self.keyword, self.rounds)
+    
+    def allows_date(self, air_date):
+        if self.start_date and (air_date or '') < self.start_date:
+            return False
+        if self.end_date and (air_date or '') > self.end_date:
+            return False
+        return True
 
 
-def select_unique_questions_for_category(questions, target_values):
+class Bitset:
+    """Fixed-size set of ids backed by a bytearray (one bit per id)."""
+    
+    __slots__ = ('bits',)
+    
+    def __init__(self, size):
+        self.bits = bytearray((size + 7) // 8)
+    
+    def add(self, i):
+        self.bits[i >> 3] |= 1 << (i & 7)
+    
+    def __contains__(self, i):
+        return (self.bits[i >> 3] >> (i & 7)) & 1 == 1
+    
+    def count(self):
+        return sum(bin(byte).count('1') for byte in self.bits)
+
+
+class BoardSession:
+    """
+    What one session (e.g. a league season) has already played: clue ids and
+    category ids from a BoardIndex, and Final Jeopardy pool positions.
+    """
+    
+    def __init__(self, index, finals):
+        self.clues = Bitset(len(index.questions))
+        self.categories = Bitset(len(index.category_names))
+        self.finals = Bitset(len(finals))
+        # Boards for one session are built one at a time so they can't pick the same clues
+        self.lock = threading.Lock()
+    
+    def stats(self):
+        return {
+            'clues': self.clues.count(),
+            'categories': self.categories.count(),
+            'finals': self.finals.count()
+        }
+
+
+def iter_random_order(items, rng=random):
+    """Yield items in random order without copying them (lazy Fisher-Yates shuffle)."""
+    swaps = {}
+    n = len(items)
+    for i in range(n):
+        j = rng.randrange(i, n)
+        yield items[swaps.get(j, j)]
+        swaps[j] = swaps.get(i, i)
+
+
+def select_unique_questions_for_category(index, round_name, category, target_values,
+                                         session=None, filters=None, rng=random):
     """
     Select UNIQUE questions matching target values for a category.
-    Ensures no duplicate questions and proper value sequence.
+    Each target value is picked from its exact value bucket, falling back to the
+    closest value bucket that still has an unused question (index.nearest holds
+    that order). A bucket is sampled a few times before it is scanned.
+    With a session, clues it has already played are skipped and the chosen
+    clues and category are marked as played; filters limit clue air dates.
     Returns list of selected questions or None if not enough unique questions available.
     """
+    buckets = index.buckets[(round_name, category)]
     selected = []
-    used_questions = set()  # Track question text to avoid duplicates
+    used_ids = set()
+    
+    def allowed(qid):
+        if qid in used_ids:
+            return False
+        if session is not None and qid in session.clues:
+            return False
+        return filters is None or filters.allows_date(index.questions[qid].air_date)
     
+    nearest = index.nearest[(round_name, category)]
     for target_value in target_values:
-        # Find questions with matching value that haven't been used
-        matching = [
-            q for q in questions 
-            if get_value_from_string(q['value']) == target_value 
-            and q['question'] not in used_questions
-        ]
-        
-        if matching:
-            chosen = random.choice(matching)
-            selected.append(chosen)
-            used_questions.add(chosen['question'])
-        else:
-            # If exact value not found or all used, try to find closest unused value
-            unused = [q for q in questions if q['question'] not in used_questions]
-            if unused:
-                closest = min(unused, key=lambda q: abs(get_value_from_string(q['value']) - target_value))
-                selected.append(closest)
-                used_questions.add(closest['question'])
+        chosen = None
+        order = nearest.get(target_value)
+        if order is None:
+            order = nearest_values(sorted(buckets), target_value)
+        for value in order:
+            bucket = buckets[value]
+            for _ in range(PICK_TRIES):
+                qid = rng.choice(bucket)
+                if allowed(qid):
+                    chosen = qid
+                    break
             else:
-                # Not enough unique questions in this category
-                return None
-    
-    # Verify we got the right number of unique questions
-    if len(selected) != len(target_values):
-        return None
+                available = [qid for qid in bucket if allowed(qid)]
+                if available:
+                    chosen = rng.choice(available)
+            if chosen is not None:
+                break
+        
+        if chosen is None:
+            # Not enough unique questions in this category
+            return None
+        
+        used_ids.add(chosen)
+        selected.append(index.questions[chosen])
     
-    # Double-check for duplicates
-    question_texts = [q['question'] for q in selected]
-    if len(question_texts) != len(set(question_texts)):
-        return None
+    if session is not None:
+        for qid in used_ids:
+            session.clues.add(qid)
+        session.categories.add(index.category_ids[category])
     
     return selected
 
 
-def select_categories_for_round(by_category, round_name, target_values, num_categories=6):
+def build_category(category, selected_questions, target_values):
+    """Board JSON for one category."""
+    category_obj = {
+        "name": normalize_text(category, True),
+        "questions": []
+    }
+    
+    # Sort selected questions by their assigned target value to ensure proper ordering
+    for i, q in enumerate(selected_questions):
+        question, answer = clue_text(q)
+        question_obj = {
+            "value": target_values[i],  # Use the target value for consistency
+            "question": question,
+            "answer": answer
+        }
+        
+        # Preserve image if present
+        if q.image:
+            question_obj['image'] = q.image
+        
+        category_obj["questions"].append(question_obj)
+    
+    return category_obj
+
+
+def select_categories_for_round(index, difficulty, round_name, target_values, num_categories=6,
+                                session=None, filters=None, rng=random):
     """
     Select random categories with enough UNIQUE questions for a round.
-    Uses a seed based on current time to ensure different results each run.
+    Candidates come from the index's precomputed viable list for this difficulty.
+    With a session or filters, candidates are drawn until num_categories of them
+    can be filled with unplayed clues that pass the filters.
     """
-    # Filter categories that have enough unique questions in this round
-    viable_categories = []
+    if session is not None or filters is not None:
+        return select_constrained_categories(
+            index, difficulty, round_name, target_values, num_categories, session, filters, rng
+        )
     
-    for cat, rounds in by_category.items():
-        if round_name not in rounds:
-            continue
-        
-        questions = rounds[round_name]
-        
-        # Check if category has enough unique questions
-        unique_questions = len(set(q['question'] for q in questions))
-        
-        # Need at least 5 unique questions for a proper category
-        if unique_questions >= 5 and len(questions) >= len(target_values):
-            viable_categories.append(cat)
+    viable_categories = index.viable_categories(difficulty, round_name)
     
     if len(viable_categories) < num_categories:
         print(f"Warning: Only {len(viable_categories)} viable categories available for {round_name}")
         num_categories = min(num_categories, len(viable_categories))
     
     # Randomly select categories (this will be different each run due to random.choice)
-    selected_categories = random.sample(viable_categories, num_categories)
+    selected_categories = rng.sample(viable_categories, num_categories)
     
     round_data = []
     for category in selected_categories:
-        questions = by_category[category][round_name]
-        selected_questions = select_unique_questions_for_category(questions, target_values)
+        selected_questions = select_unique_questions_for_category(
+            index, round_name, category, target_values, rng=rng
+        )
         
         if selected_questions:
-            category_obj = {
-                "name": fix_text(category.upper()),
-                "questions": []
-            }
-            
-            # Sort selected questions by their assigned target value to ensure proper ordering
-            for i, q in enumerate(selected_questions):
-                question_obj = {
-                    "value": target_values[i],  # Use the target value for consistency
-                    "question": fix_text(q['question'].upper()),
-                    "answer": fix_text(q['answer'])
-                }
-                
-                # Preserve image if present
-                if 'image' in q and q['image']:
-                    question_obj['image'] = q['image']
-                
-                category_obj["questions"].append(question_obj)
-            
-            round_data.append(category_obj)
+            round_data.append(build_category(category, selected_questions, target_values))
+    
+    return round_data
+
+
+def select_constrained_categories(index, difficulty, round_name, target_values, num_categories,
+                                  session=None, filters=None, rng=random):
+    """Fill a round from the filtered candidates, skipping categories the session has played."""
+    candidates = index.candidate_categories(difficulty, round_name, filters)
+    
+    round_data = []
+    for category in iter_random_order(candidates, rng):
+        if session is not None and index.category_ids[category] in session.categories:
+            continue
+        selected_questions = select_unique_questions_for_category(
+            index, round_name, category, target_values, session=session, filters=filters, rng=rng
+        )
+        if selected_questions:
+            round_data.append(build_category(category, selected_questions, target_values))
+            if len(round_data) == num_categories:
+                break
+    
+    if len(round_data) < num_categories:
+        print(f"Warning: Only {len(round_data)} categories match the filters for {round_name}")
+    return round_data
+
+
+def select_themed_categories(index, difficulty, round_name, target_values, num_categories, candidates,
+                             used=None, session=None, filters=None, rng=random):
+    """
+    Fill a round from theme candidates, ranked best first (and already viable for difficulty).
+    The round is drawn at random from the best 3 * num_categories, falling back to
+    the rest in rank order. Categories in used (e.g. picked for another round)
+    are skipped, and the ones chosen here are added to it.
+    """
+    if filters is not None and (filters.keyword or filters.start_date or filters.end_date):
+        allowed = set(index.candidate_categories(difficulty, round_name, filters))
+        candidates = [c for c in candidates if c in allowed]
+    
+    pool = num_categories * 3
+    round_data = []
+    for category in itertools.chain(iter_random_order(candidates[:pool], rng), candidates[pool:]):
+        if used is not None and category in used:
+            continue
+        if session is not None and index.category_ids[category] in session.categories:
+            continue
+        selected_questions = select_unique_questions_for_category(
+            index, round_name, category, target_values, session=session, filters=filters, rng=rng
+        )
+        if selected_questions:
+            round_data.append(build_category(category, selected_questions, target_values))
+            if used is not None:
+                used.add(category)
+            if len(round_data) == num_categories:
+                break
     
+    if len(round_data) < num_categories:
+        print(f"Warning: Only {len(round_data)} categories near the theme for {round_name}")
     return round_data
 
 
-def add_daily_doubles(round_data, num_doubles, min_value_index=2):
+def add_daily_doubles(round_data, num_doubles, min_value_index=2, rng=random):
     """Add daily double flags to random questions (avoiding first two rows)."""
     # Get all valid question positions (category, question_index)
     valid_positions = []
@@ -196,7 +639,7 @@ def add_daily_doubles(round_data, num_doubles, min_value_index=2):
         num_doubles = len(valid_positions)
     
     # Randomly select positions for daily doubles
-    dd_positions = random.sample(valid_positions, num_doubles)
+    dd_positions = rng.sample(valid_positions, num_doubles)
     
     for cat_idx, q_idx in dd_positions:
         round_data[cat_idx]['questions'][q_idx]['daily-double'] = "true"
@@ -204,77 +647,352 @@ def add_daily_doubles(round_data, num_doubles, min_value_index=2):
     return round_data
 
 
-def select_final_jeopardy(archive_data):
-    """Select a random Final Jeopardy question."""
-    final_questions = [q for q in archive_data 
-                      if 'round' in q and 'Final' in q['round']
-                      and 'category' in q and 'question' in q and 'answer' in q]
+class FinalJeopardyPool:
+    """
+    Final Jeopardy candidates extracted once from the archive, sorted by air date.
+    Picks are O(1) at random, O(log n) within an air-date window, and category
+    keywords are looked up in a word index instead of scanning every clue.
+    """
+    
+    def __init__(self, archive_data):
+        finals = [q for q in compact_archive(archive_data) if 'Final' in q.round]
+        finals.sort(key=lambda q: q.air_date or '')
+        
+        self.clues = finals
+        self.air_dates = [q.air_date or '' for q in finals]
+        
+        # Category word -> pool positions (ascending, so also in air-date order)
+        self.keywords = defaultdict(list)
+        for position, q in enumerate(finals):
+            for word in set(re.findall(r'\w+', q.category.lower())):
+                self.keywords[word].append(position)
+    
+    def __len__(self):
+        return len(self.clues)
     
-    if not final_questions:
+    def pick(self, start_date=None, end_date=None, keyword=None, seen=None, max_tries=16, rng=random):
+        """
+        Pick a random clue aired between start_date and end_date ('YYYY-MM-DD',
+        inclusive) whose category contains keyword. Pool positions in seen are
+        skipped, and the chosen position is added to it.
+        Returns None if nothing matches.
+        """
+        lo = bisect.bisect_left(self.air_dates, start_date) if start_date else 0
+        hi = bisect.bisect_right(self.air_dates, end_date) if end_date else len(self.clues)
+        
+        if keyword:
+            words = re.findall(r'\w+', keyword.lower())
+            if not words:
+                return None
+            positions = min((self.keywords.get(word, []) for word in words), key=len)
+            positions = positions[bisect.bisect_left(positions, lo):bisect.bisect_left(positions, hi)]
+            phrase = ' '.join(words)
+            if len(words) > 1:
+                positions = [p for p in positions
+                             if phrase in ' '.join(re.findall(r'\w+', self.clues[p].category.lower()))]
+            candidates = positions
+        else:
+            candidates = range(lo, max(lo, hi))
+        
+        if not candidates:
+            return None
+        
+        for _ in range(max_tries):
+            position = rng.choice(candidates)
+            if seen is None or position not in seen:
+                break
+        else:
+            # Mostly seen already; fall back to scanning the candidates
+            unseen = [p for p in candidates if p not in seen]
+            if not unseen:
+                return None
+            position = rng.choice(unseen)
+        
+        if seen is not None:
+            seen.add(position)
+        return self.clues[position]
+
+
+def select_final_jeopardy(archive_data, pool=None, start_date=None, end_date=None, keyword=None, seen=None,
+                          rng=random):
+    """
+    Select a random Final Jeopardy question.
+    Pass a prebuilt FinalJeopardyPool to avoid scanning the archive; the other
+    arguments are optional constraints (see FinalJeopardyPool.pick).
+    """
+    if pool is None:
+        pool = FinalJeopardyPool(archive_data)
+    
+    selected = pool.pick(start_date=start_date, end_date=end_date, keyword=keyword, seen=seen, rng=rng)
+    
+    if selected is None:
         return {
             "category": "RANDOM TRIVIA",
             "question": "THIS IS A PLACEHOLDER FINAL JEOPARDY QUESTION",
             "answer": "What is a placeholder answer?"
         }
     
-    selected = random.choice(final_questions)
+    question, answer = clue_text(selected)
     final_obj = {
-        "category": fix_text(selected['category'].upper()),
-        "question": fix_text(selected['question'].upper()),
-        "answer": fix_text(selected['answer'])
+        "category": normalize_text(selected.category, True),
+        "question": question,
+        "answer": answer
     }
     
     # Preserve image if present
-    if 'image' in selected and selected['image']:
-        final_obj['image'] = selected['image']
+    if selected.image:
+        final_obj['image'] = selected.image
     
     return final_obj
 
 
-def generate_board(archive_data, difficulty='medium'):
-    """Generate a complete Jeopardy board with specified difficulty."""
+def generate_board(archive_data, difficulty='medium', by_category=None, verbose=True, index=None,
+                   finals=None, final_options=None, session=None, filters=None, rng=random, themes=None):
+    """
+    Generate a complete Jeopardy board with specified difficulty.
+    Pass a prebuilt BoardIndex (or at least a by_category from organize_by_category)
+    and FinalJeopardyPool to skip reprocessing the archive, and verbose=False to
+    silence progress output. final_options are passed on to select_final_jeopardy.
+    A BoardSession excludes (and records) clues, categories and Final Jeopardy
+    clues already played; BoardFilters limit air dates, category keywords and rounds.
+    All randomness comes from rng; pass a random.Random(seed) to make the board
+    reproducible regardless of other threads (the default is the global random module).
+    themes maps 'jeopardy' and 'double-jeopardy' to ranked candidate categories
+    (see select_themed_categories); no category is used in both rounds.
+    """
     if difficulty not in DIFFICULTY_RANGES:
         raise ValueError(f"Invalid difficulty. Choose from: {', '.join(DIFFICULTY_RANGES.keys())}")
     
-    print(f"\nGenerating {difficulty} difficulty board...")
-    print(f"Description: {DIFFICULTY_RANGES[difficulty]['description']}")
+    log = print if verbose else (lambda *args, **kwargs: None)
+    
+    log(f"\nGenerating {difficulty} difficulty board...")
+    log(f"Description: {DIFFICULTY_RANGES[difficulty]['description']}")
+    
+    # Index questions by category, round and value
+    if index is None:
+        if by_category is None:
+            by_category = organize_by_category(archive_data)
+        index = BoardIndex(by_category)
     
-    # Organize questions by category
-    by_category = organize_by_category(archive_data)
+    rounds = filters.rounds if filters is not None else BOARD_ROUNDS
+    board = {}
+    themed = set()
+    
+    def select_round(round_key, target_values):
+        if themes is not None:
+            return select_themed_categories(
+                index, difficulty, ROUND_NAMES[round_key], target_values, 6, themes.get(round_key, []),
+                used=themed, session=session, filters=filters, rng=rng
+            )
+        return select_categories_for_round(
+            index, difficulty, ROUND_NAMES[round_key], target_values, num_categories=6,
+            session=session, filters=filters, rng=rng
+        )
     
     # Generate Jeopardy round
-    print("\nGenerating Jeopardy round...")
-    jeopardy_values = DIFFICULTY_RANGES[difficulty]['jeopardy']
-    jeopardy_round = select_categories_for_round(
-        by_category, 'Jeopardy!', jeopardy_values, num_categories=6
-    )
-    jeopardy_round = add_daily_doubles(jeopardy_round, num_doubles=1, min_value_index=2)
-    print(f"Selected {len(jeopardy_round)} categories with unique questions")
+    if 'jeopardy' in rounds:
+        log("\nGenerating Jeopardy round...")
+        jeopardy_values = DIFFICULTY_RANGES[difficulty]['jeopardy']
+        jeopardy_round = select_round('jeopardy', jeopardy_values)
+        board['jeopardy'] = add_daily_doubles(jeopardy_round, num_doubles=1, min_value_index=2, rng=rng)
+        log(f"Selected {len(jeopardy_round)} categories with unique questions")
     
     # Generate Double Jeopardy round
-    print("\nGenerating Double Jeopardy round...")
-    double_jeopardy_values = DIFFICULTY_RANGES[difficulty]['double-jeopardy']
-    double_jeopardy_round = select_categories_for_round(
-        by_category, 'Double Jeopardy!', double_jeopardy_values, num_categories=6
-    )
-    double_jeopardy_round = add_daily_doubles(double_jeopardy_round, num_doubles=2, min_value_index=2)
-    print(f"Selected {len(double_jeopardy_round)} categories with unique questions")
-    
-    # Generate Final Jeopardy
-    print("\nGenerating Final Jeopardy...")
-    final_jeopardy = select_final_jeopardy(archive_data)
-    print(f"Category: {final_jeopardy['category']}")
-    
-    # Assemble board
-    board = {
-        "jeopardy": jeopardy_round,
-        "double-jeopardy": double_jeopardy_round,
-        "final-jeopardy": final_jeopardy
-    }
+    if 'double-jeopardy' in rounds:
+        log("\nGenerating Double Jeopardy round...")
+        double_jeopardy_values = DIFFICULTY_RANGES[difficulty]['double-jeopardy']
+        double_jeopardy_round = select_round('double-jeopardy', double_jeopardy_values)
+        board['double-jeopardy'] = add_daily_doubles(
+            double_jeopardy_round, num_doubles=2, min_value_index=2, rng=rng
+        )
+        log(f"Selected {len(double_jeopardy_round)} categories with unique questions")
+    
+    # Generate Final Jeopardy (board air dates apply unless final_options set their own)
+    if 'final-jeopardy' in rounds:
+        log("\nGenerating Final Jeopardy...")
+        final_options = dict(final_options or {})
+        if filters is not None:
+            final_options.setdefault('start_date', filters.start_date)
+            final_options.setdefault('end_date', filters.end_date)
+        if session is not None:
+            final_options.setdefault('seen', session.finals)
+        board['final-jeopardy'] = select_final_jeopardy(archive_data, pool=finals, rng=rng, **final_options)
+        log(f"Category: {board['final-jeopardy']['category']}")
     
     return board
 
 
+class BoardEngine:
+    """
+    Long-lived board generator for servers.
+    Loads, organizes and indexes the archive once, then builds boards in-process.
+    """
+    
+    def __init__(self, archive_data, fix_text_upfront=False):
+        # Keep only compact clues so the raw archive dicts can be freed
+        if fix_text_upfront:
+            self.archive_data = fix_archive_text(archive_data)
+        else:
+            self.archive_data = compact_archive(archive_data)
+        self.index = BoardIndex(organize_by_category(self.archive_data))
+        self.finals = FinalJeopardyPool(self.archive_data)
+        # Session id -> BoardSession (least recently used last to go)
+        self.sessions = OrderedDict()
+        self.sessions_lock = threading.Lock()
+    
+    @classmethod
+    def from_file(cls, filepath='jeopardy_questions_archive.json', stream=False, fix_text_upfront=False):
+        """
+        Load an archive file and build an engine for it.
+        With stream=True the archive is streamed into compact clues to lower peak memory.
+        With fix_text_upfront=True all clue text is run through fix_text at load time.
+        """
+        archive_data = stream_archive(filepath) if stream else load_archive(filepath)
+        return cls(archive_data, fix_text_upfront=fix_text_upfront)
+    
+    def session(self, session_id):
+        """The BoardSession for session_id, created on first use."""
+        with self.sessions_lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = BoardSession(self.index, self.finals)
+                while len(self.sessions) > MAX_SESSIONS:
+                    self.sessions.popitem(last=False)
+            else:
+                self.sessions.move_to_end(session_id)
+            return session
+    
+    def generate(self, difficulty='medium', verbose=False, session_id=None, final_options=None, filters=None,
+                 seed=None, themes=None):
+        """
+        Generate a board from the prebuilt index.
+        With a session_id, no clue, category or Final Jeopardy clue is repeated within that session.
+        final_options may set start_date, end_date and keyword for Final Jeopardy.
+        filters is an optional BoardFilters, and themes optional ranked candidates per round.
+        Each board draws from its own random.Random, so the same seed (and options)
+        always gives the same board, even with other boards being built concurrently.
+        """
+        rng = random.Random(seed)
+        if session_id is None:
+            return generate_board(self.archive_data, difficulty, index=self.index, verbose=verbose,
+                                  finals=self.finals, final_options=final_options, filters=filters, rng=rng,
+                                  themes=themes)
+        
+        session = self.session(session_id)
+        with session.lock:
+            return generate_board(self.archive_data, difficulty, index=self.index, verbose=verbose,
+                                  finals=self.finals, final_options=final_options,
+                                  session=session, filters=filters, rng=rng, themes=themes)
+    
+    def warm_up(self):
+        """Build one board per difficulty so the first real request is fast."""
+        for difficulty in DIFFICULTY_RANGES:
+            self.generate(difficulty)
+
+
+# Per-process engine for batch generation (inherited on fork, loaded once per worker otherwise)
+_BATCH_ENGINE = None
+
+
+def derive_board_seed(master_seed, difficulty, board_number):
+    """Derive a stable per-board seed from the batch's master seed."""
+    return random.Random(f"{master_seed}:{difficulty}:{board_number}").getrandbits(32)
+
+
+def _init_batch_worker(archive_path, stream, fix_text_upfront):
+    """Pool initializer: make sure this process has an engine."""
+    global _BATCH_ENGINE
+    if _BATCH_ENGINE is None:
+        _BATCH_ENGINE = BoardEngine.from_file(archive_path, stream=stream, fix_text_upfront=fix_text_upfront)
+
+
+def _generate_batch_board(job):
+    """
+    Pool task: build one board from its seed and serialize it, either as a
+    board file (indented) or as one JSON-lines record (indent None).
+    """
+    board_number, difficulty, seed, indent, filters = job
+    board = _BATCH_ENGINE.generate(difficulty, seed=seed, filters=filters)
+    if indent is None:
+        board = {'difficulty': difficulty, 'number': board_number, 'seed': seed, 'board': board}
+    return board_number, difficulty, seed, json.dumps(board, indent=indent, ensure_ascii=False)
+
+
+def generate_batch(archive_path, difficulties, count, master_seed,
+                   output_dir=None, jsonl_path=None, workers=None, stream=False, fix_text_upfront=False,
+                   filters=None):
+    """
+    Generate count boards for each difficulty across a process pool, each
+    limited by filters (a BoardFilters) if given.
+    The archive is loaded and indexed once; boards stream to output_dir
+    (one JSON file each) or to a single JSON-lines file as they complete.
+    Returns the number of boards written.
+    """
+    global _BATCH_ENGINE
+    
+    if (output_dir is None) == (jsonl_path is None):
+        raise ValueError("Specify exactly one of output_dir or jsonl_path")
+    
+    indent = 4 if output_dir else None
+    jobs = [
+        (board_number, difficulty, derive_board_seed(master_seed, difficulty, board_number), indent, filters)
+        for difficulty in difficulties
+        for board_number in range(count)
+    ]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    
+    # Load once in the parent; forked workers share it copy-on-write
+    _BATCH_ENGINE = BoardEngine.from_file(archive_path, stream=stream, fix_text_upfront=fix_text_upfront)
+    
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        jsonl_file = None
+    else:
+        jsonl_file = open(jsonl_path, 'w', encoding='utf-8')
+    
+    start = time.perf_counter()
+    written = 0
+    pool = None
+    finished = False
+    try:
+        if workers == 1:
+            results = map(_generate_batch_board, jobs)
+        else:
+            if 'fork' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('fork')
+            else:
+                context = multiprocessing.get_context()
+            pool = context.Pool(workers, initializer=_init_batch_worker, initargs=(archive_path, stream, fix_text_upfront))
+            results = pool.imap(_generate_batch_board, jobs, chunksize=max(1, min(64, len(jobs) // (workers * 4))))
+        
+        for board_number, difficulty, seed, board_json in results:
+            if jsonl_file:
+                jsonl_file.write(board_json + '\n')
+            else:
+                filepath = os.path.join(output_dir, f'board_random_{difficulty}_{board_number:05d}.json')
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    f.write(board_json)
+            
+            written += 1
+            if written % 1000 == 0:
+                print(f"  {written}/{len(jobs)} boards ({written / (time.perf_counter() - start):.0f} boards/s)")
+        finished = True
+    finally:
+        if pool:
+            if finished:
+                pool.close()
+                pool.join()
+            else:
+                # A worker or a write failed; don't leave the forked workers running
+                pool.terminate()
+        if jsonl_file:
+            jsonl_file.close()
+    
+    elapsed = time.perf_counter() - start
+    print(f"Generated {written} boards with {workers} worker(s) in {elapsed:.1f}s")
+    return written
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Generate a random Jeopardy board from the archive dataset'
@@ -293,7 +1011,7 @@ def main():
     parser.add_argument(
         '--archive',
         default='jeopardy_questions_archive.json',
-        help='Path to archive file (default: jeopardy_questions_archive.json)'
+        help='Path to archive file, JSON or compiled .bin (default: jeopardy_questions_archive.json)'
     )
     parser.add_argument(
         '--seed',
@@ -301,25 +1019,101 @@ def main():
         default=None,
         help='Random seed for reproducible boards (default: None for truly random)'
     )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Stream the JSON archive (needs ijson) to lower peak memory'
+    )
+    parser.add_argument(
+        '--from-date',
+        default=None,
+        help='Only use clues aired on or after this date (YYYY-MM-DD)'
+    )
+    parser.add_argument(
+        '--to-date',
+        default=None,
+        help='Only use clues aired on or before this date (YYYY-MM-DD)'
+    )
+    parser.add_argument(
+        '--keyword',
+        default=None,
+        help='Only use Jeopardy/Double Jeopardy categories whose name contains this keyword'
+    )
+    parser.add_argument(
+        '--rounds',
+        default=None,
+        help=f'Comma-separated board rounds to generate (default: {",".join(BOARD_ROUNDS)})'
+    )
+    parser.add_argument(
+        '--count',
+        type=int,
+        default=None,
+        help='Batch mode: number of boards to generate per difficulty'
+    )
+    parser.add_argument(
+        '--difficulties',
+        default=None,
+        help='Batch mode: comma-separated difficulty levels (default: --difficulty)'
+    )
+    parser.add_argument(
+        '--output-dir',
+        default=None,
+        help='Batch mode: directory to write one JSON file per board'
+    )
+    parser.add_argument(
+        '--jsonl',
+        default=None,
+        help='Batch mode: JSON-lines file to write all boards to'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Batch mode: number of worker processes (default: CPU count)'
+    )
+    parser.add_argument(
+        '--fix-text-upfront',
+        action='store_true',
+        help='Batch mode: run all clue text through ftfy in parallel before generating'
+    )
     
     args = parser.parse_args()
     
     # Set random seed if provided, otherwise use system time for true randomness
     if args.seed is not None:
-        random.seed(args.seed)
-        print(f"Using random seed: {args.seed}")
+        seed = args.seed
+        print(f"Using random seed: {seed}")
     else:
         # Explicitly use system time to ensure different results each run
-        import time
         seed = int(time.time() * 1000000) % (2**32)
-        random.seed(seed)
         print(f"Using random seed: {seed} (auto-generated)")
     
+    filters = None
+    if args.from_date or args.to_date or args.keyword or args.rounds:
+        try:
+            filters = BoardFilters(args.from_date, args.to_date, args.keyword,
+                                   args.rounds.split(',') if args.rounds else None)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    if args.count is not None:
+        difficulties = (args.difficulties or args.difficulty).split(',')
+        invalid = [d for d in difficulties if d not in DIFFICULTY_RANGES]
+        if invalid:
+            parser.error(f"invalid difficulties: {', '.join(invalid)}")
+        if (args.output_dir is None) == (args.jsonl is None):
+            parser.error("batch mode needs exactly one of --output-dir or --jsonl")
+        
+        generate_batch(args.archive, difficulties, args.count, seed,
+                       output_dir=args.output_dir, jsonl_path=args.jsonl, workers=args.workers,
+                       stream=args.stream, fix_text_upfront=args.fix_text_upfront, filters=filters)
+        return
+    
     # Load archive
-    archive_data = load_archive(args.archive)
+    archive_data = stream_archive(args.archive) if args.stream else load_archive(args.archive)
     
     # Generate board
-    board = generate_board(archive_data, args.difficulty)
+    board = generate_board(archive_data, args.difficulty, filters=filters, rng=random.Random(seed))
     
     # Save to file
     print(f"\nSaving board to {args.output}...")
@@ -328,9 +1122,12 @@ def main():
     
     print(f"\n✓ Successfully generated {args.difficulty} difficulty board!")
     print(f"  Output: {args.output}")
-    print(f"  Jeopardy Round: {len(board['jeopardy'])} categories")
-    print(f"  Double Jeopardy Round: {len(board['double-jeopardy'])} categories")
-    print(f"  Final Jeopardy: {board['final-jeopardy']['category']}")
+    if 'jeopardy' in board:
+        print(f"  Jeopardy Round: {len(board['jeopardy'])} categories")
+    if 'double-jeopardy' in board:
+        print(f"  Double Jeopardy Round: {len(board['double-jeopardy'])} categories")
+    if 'final-jeopardy' in board:
+        print(f"  Final Jeopardy: {board['final-jeopardy']['category']}")
     print("\nYou can now load this board in the Jeopardy game!")
 
 
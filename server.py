@@ -5,20 +5,400 @@ This allows the "Generate Random Board" button to actually generate new boards.
 """
 
 import http.server
-import socketserver
 import json
-import subprocess
 import os
-import pickle
-import numpy as np
-from urllib.parse import urlparse, parse_qs
+import random
+import argparse
+import time
+import threading
+from urllib.parse import urlparse, parse_qs, unquote
+
+from random_board_generator import BoardEngine, BoardFilters, resolve_archive_path, normalize_text
+from vector_index import IVFIndex, VectorIndex, normalize_rows
+from lexical_index import LexicalIndex, LEXICAL_INDEX_FILE
+from clue_index import ClueIndex, clue_index_exists
+from theme_board import ThemeSelector, THEME_CANDIDATES
+from query_encoder import QueryEncoder
+from embedding_store import load_embedding_store, store_exists
+from serving import AdmissionLimiter, PoolSaturated, add_pool_arguments
+from board_pool import BoardPool, SeedCache, DEFAULT_POOL_SIZE
+from http_cache import CachingHandler, precompress
+from board_catalog import BoardCatalog
+from board_writer import BoardWriter
+from metrics import METRICS, lru_cache_stats
 
 PORT = 8000
+ARCHIVE_FILE = 'jeopardy_questions_archive.json'
+
+# Stream the JSON archive instead of json.load-ing it (lower peak memory, needs ijson)
+STREAM_ARCHIVE = False
+
+# Run all clue text through ftfy at startup instead of on first use
+FIX_TEXT_UPFRONT = False
 
 # Global variable to store embeddings data
 EMBEDDINGS_DATA = None
 
-class JeopardyHandler(http.server.SimpleHTTPRequestHandler):
+# Embeddings load in the background at startup; searches wait for this
+EMBEDDINGS_LOADER = None
+EMBEDDINGS_READY = threading.Event()
+EMBEDDINGS_ERROR = None
+# Set once the store and lexical index are open, before the model has loaded
+LEXICAL_READY = threading.Event()
+EMBEDDINGS_WAIT_SECONDS = 30
+
+# Semantic search index settings
+IVF_INDEX_FILE = 'category_ivf.npz'
+SEARCH_NPROBE = 8
+QUANTIZE_EMBEDDINGS = False
+
+# Hybrid search: candidates taken from each of the lexical and semantic rankings,
+# and the reciprocal rank fusion constant used to merge them
+HYBRID_CANDIDATES = 100
+RRF_K = 60
+SEARCH_MODES = ('lexical', 'semantic', 'hybrid')
+
+# Search results per request: ?top_k= defaults to this and must lie in 1..MAX_TOP_K
+DEFAULT_TOP_K = 20
+MAX_TOP_K = 200
+
+# Query embedding cache size and micro-batching window (seconds)
+QUERY_CACHE_SIZE = 1024
+QUERY_BATCH_WINDOW = 0.005
+# Seconds a search waits for its query to be encoded before answering 503
+QUERY_ENCODE_TIMEOUT = 10.0
+
+# Guards building EMBEDDINGS_DATA['themes'] (needs both the embeddings and the board engine)
+THEME_SELECTOR_LOCK = threading.Lock()
+
+# Long-lived board generator (archive loaded once at startup)
+BOARD_ENGINE = None
+
+# Caps concurrent board generation and search (replaced in main() from CLI options)
+API_LIMITER = AdmissionLimiter()
+
+# Ready-made /api/generate-board responses, refilled in the background
+BOARD_POOL = None
+
+# Recently generated responses by seed, so ?seed= replays are a lookup
+SEED_CACHE = SeedCache()
+
+# Saved boards for /api/boards (started on first use or in main())
+BOARD_CATALOG = None
+BOARD_CATALOG_LOCK = threading.Lock()
+
+# Write-behind queue for /api/save-board (started on first use or in main())
+BOARD_WRITER = None
+BOARD_WRITER_LOCK = threading.Lock()
+
+
+def register_metrics():
+    """Expose this server's caches, admission limiter and save queue on /api/metrics."""
+    METRICS.register_cache('seed', lambda: SEED_CACHE.stats())
+    METRICS.register_cache('board_pool', lambda: BOARD_POOL.stats() if BOARD_POOL else None)
+    METRICS.register_cache('query_embedding', lambda: (
+        EMBEDDINGS_DATA['encoder'].stats() if EMBEDDINGS_DATA and 'encoder' in EMBEDDINGS_DATA else None
+    ))
+    METRICS.register_cache('board_catalog', lambda: BOARD_CATALOG.stats() if BOARD_CATALOG else None)
+    METRICS.register_cache('fix_text', lru_cache_stats(normalize_text))
+    
+    METRICS.register_value('api_limiter_in_flight', lambda: API_LIMITER.in_flight,
+                           'Generate/search calls running or waiting for an admission slot.')
+    METRICS.register_value('api_limiter_rejected_total', lambda: API_LIMITER.rejected,
+                           'Generate/search calls answered 503 because the admission limiter was full.', kind='counter')
+    METRICS.register_value('board_writer_pending',
+                           lambda: BOARD_WRITER.stats()['pending'] if BOARD_WRITER else None,
+                           'Saved boards queued but not yet written.')
+    METRICS.register_value('board_writer_saved_total',
+                           lambda: BOARD_WRITER.stats()['saved'] if BOARD_WRITER else None,
+                           'Boards written to disk.', kind='counter')
+    METRICS.register_value('board_writer_errors_total',
+                           lambda: BOARD_WRITER.stats()['errors'] if BOARD_WRITER else None,
+                           'Boards that failed to write.', kind='counter')
+    METRICS.register_value('board_writer_callback_errors_total',
+                           lambda: BOARD_WRITER.stats()['callback_errors'] if BOARD_WRITER else None,
+                           'Boards written whose catalog update failed afterwards.', kind='counter')
+    METRICS.register_value('board_sessions', lambda: len(BOARD_ENGINE.sessions) if BOARD_ENGINE else None,
+                           'Board sessions currently tracked.')
+
+
+def load_board_engine():
+    """Load the archive into the board engine and warm it up."""
+    global BOARD_ENGINE
+    
+    if not os.path.exists(resolve_archive_path(ARCHIVE_FILE)):
+        print(f"Warning: {ARCHIVE_FILE} not found. Board generation is disabled.")
+        return None
+    
+    start = time.perf_counter()
+    engine = BoardEngine.from_file(ARCHIVE_FILE, stream=STREAM_ARCHIVE, fix_text_upfront=FIX_TEXT_UPFRONT)
+    loaded = time.perf_counter()
+    print(f"✓ Loaded board engine in {loaded - start:.2f}s")
+    METRICS.set_gauge('archive_load_seconds', loaded - start, 'Seconds taken to load and index the archive.')
+    
+    engine.warm_up()
+    print(f"✓ Warmed up board engine in {time.perf_counter() - loaded:.2f}s")
+    
+    BOARD_ENGINE = engine
+    return engine
+
+
+def board_cache_key(seed, difficulty, final_options=None, filters=None, theme=None):
+    """SEED_CACHE key: everything besides the seed that shapes a board."""
+    return (seed, difficulty, tuple(sorted((final_options or {}).items())), filters.key() if filters else None,
+            theme)
+
+
+def generate_board_response(difficulty, session_id=None, final_options=None, filters=None, seed=None,
+                            theme=None):
+    """
+    Generate a board and serialize the /api/generate-board response body.
+    The response includes the board's seed; boards outside a session are
+    remembered in SEED_CACHE (as precompress()ed variants) so the seed can be replayed. With a theme, the
+    rounds are filled from the categories nearest to it (embeddings must be loaded).
+    """
+    if seed is None:
+        seed = random.getrandbits(32)
+    
+    themes = theme_candidates(theme, difficulty) if theme else None
+    response = {
+        'success': True,
+        'message': f'Generated {difficulty} board' + (f' for theme "{theme}"' if theme else ''),
+        'seed': seed,
+        'board': BOARD_ENGINE.generate(difficulty, session_id=session_id, final_options=final_options,
+                                       filters=filters, seed=seed, themes=themes)
+    }
+    if theme:
+        response['theme'] = theme
+    body = json.dumps(response, separators=(',', ':')).encode('utf-8')
+    # Session boards depend on what the session has played, so they can't be replayed
+    if session_id is None:
+        # Pooled and replayed bodies are sent again, so compress them once here
+        body = precompress(body)
+        SEED_CACHE.put(board_cache_key(seed, difficulty, final_options, filters, theme), body)
+    return body
+
+
+def start_board_pool(size=DEFAULT_POOL_SIZE):
+    """Start pre-generating boards for every difficulty."""
+    global BOARD_POOL
+    if BOARD_ENGINE is None or size <= 0:
+        return None
+    BOARD_POOL = BoardPool(generate_board_response, ['easy', 'medium', 'hard'], high_water=size).start()
+    return BOARD_POOL
+
+
+def get_board_catalog():
+    """Start the saved-board catalog once and return it."""
+    global BOARD_CATALOG
+    with BOARD_CATALOG_LOCK:
+        if BOARD_CATALOG is None:
+            start = time.perf_counter()
+            BOARD_CATALOG = BoardCatalog().start()
+            print(f"✓ Cataloged {len(BOARD_CATALOG.entries)} saved boards in {time.perf_counter() - start:.2f}s")
+    return BOARD_CATALOG
+
+
+def get_board_writer():
+    """Start the board writer once and return it."""
+    global BOARD_WRITER
+    with BOARD_WRITER_LOCK:
+        if BOARD_WRITER is None:
+            catalog = get_board_catalog()
+            BOARD_WRITER = BoardWriter(on_saved=catalog.record_save).start()
+    return BOARD_WRITER
+
+
+def load_lexical_index(num_categories):
+    """Load the BM25 index written by generate_embeddings.py, or None if it is missing or stale."""
+    if not os.path.exists(LEXICAL_INDEX_FILE):
+        print(f"Warning: {LEXICAL_INDEX_FILE} not found; lexical search is disabled until generate_embeddings.py is rerun")
+        return None
+    lexical = LexicalIndex.load(LEXICAL_INDEX_FILE)
+    if lexical.num_docs != num_categories:
+        print(f"Warning: lexical index covers {lexical.num_docs} categories but there are {num_categories}; ignoring it")
+        return None
+    return lexical
+
+
+def load_clue_index(model_name):
+    """Open the clue-level index written by generate_embeddings.py --clues, or None."""
+    if not clue_index_exists():
+        return None
+    clue_index = ClueIndex()
+    if clue_index.model_name != model_name:
+        print(f"Warning: clue index uses {clue_index.model_name} but categories use {model_name}; ignoring it")
+        return None
+    print(f"✓ Opened clue index ({len(clue_index)} clues)")
+    return clue_index
+
+
+def load_embeddings():
+    """Open the embedding store and lexical index, then load the query model and build the search index."""
+    global EMBEDDINGS_DATA, EMBEDDINGS_ERROR
+    
+    try:
+        if not store_exists():
+            EMBEDDINGS_ERROR = 'Embeddings file not found. Please run generate_embeddings.py first.'
+            print(f"Warning: {EMBEDDINGS_ERROR}")
+            return None
+        
+        print("Loading embeddings...")
+        start = time.perf_counter()
+        data = load_embedding_store()
+        data['lexical'] = load_lexical_index(len(data['categories']))
+        
+        # Lexical searches only need the store and the BM25 index
+        EMBEDDINGS_DATA = data
+        LEXICAL_READY.set()
+        
+        # Also load the model for encoding queries
+        from sentence_transformers import SentenceTransformer
+        data['model'] = SentenceTransformer(data['model_name'])
+        data['encoder'] = QueryEncoder(
+            data['model'], cache_size=QUERY_CACHE_SIZE, batch_window=QUERY_BATCH_WINDOW,
+            timeout=QUERY_ENCODE_TIMEOUT
+        )
+        
+        data['clue_index'] = load_clue_index(data['model_name'])
+        
+        # Search the (memory-mapped, pre-normalized) embeddings in place
+        ivf = IVFIndex.load(IVF_INDEX_FILE) if os.path.exists(IVF_INDEX_FILE) else None
+        data['index'] = VectorIndex(
+            data['embeddings'], quantize=QUANTIZE_EMBEDDINGS, ivf=ivf, normalized=data['normalized']
+        )
+        
+        elapsed = time.perf_counter() - start
+        print(f"✓ Loaded embeddings for {len(data['categories'])} categories in {elapsed:.2f}s")
+        METRICS.set_gauge('embeddings_load_seconds', elapsed,
+                          'Seconds taken to open the embeddings and load the query model.')
+        
+        if BOARD_ENGINE is not None:
+            get_theme_selector()
+        return data
+    except Exception as e:
+        EMBEDDINGS_ERROR = f'Failed to load embeddings: {e}'
+        print(f"Error loading embeddings: {e}")
+        return None
+    finally:
+        LEXICAL_READY.set()
+        EMBEDDINGS_READY.set()
+
+
+def category_result(row, **scores):
+    """Search result for category row, with its scores."""
+    category = EMBEDDINGS_DATA['categories'][row]
+    result = {
+        'name': category['name'],
+        'questions': category['questions'],
+        'round': category['round']
+    }
+    result.update(scores)
+    return result
+
+
+def parse_top_k(params):
+    """?top_k= from parsed query params; ValueError unless it is an integer in 1..MAX_TOP_K."""
+    top_k = params.get('top_k', [''])[0]
+    if not top_k:
+        return DEFAULT_TOP_K
+    try:
+        top_k = int(top_k)
+    except ValueError:
+        top_k = 0
+    if not 1 <= top_k <= MAX_TOP_K:
+        raise ValueError(f'top_k must be an integer between 1 and {MAX_TOP_K}')
+    return top_k
+
+
+def lexical_search(query, top_k):
+    """Return the top_k categories for query by BM25 score; the model is never touched."""
+    rows, scores = EMBEDDINGS_DATA['lexical'].search(query, top_k)
+    return [category_result(row, bm25=float(score)) for row, score in zip(rows, scores)]
+
+
+def search_categories(query, top_k, exact=False):
+    """Return the top_k categories most similar to query."""
+    # Encode the query (cached, and batched with concurrent misses)
+    query_embedding = EMBEDDINGS_DATA['encoder'].encode(query)
+    
+    # Get top-k results by cosine similarity
+    top_indices, similarities = EMBEDDINGS_DATA['index'].search(
+        query_embedding, top_k, nprobe=SEARCH_NPROBE, exact=exact
+    )
+    
+    return [category_result(idx, similarity=float(similarity))
+            for idx, similarity in zip(top_indices, similarities)]
+
+
+def hybrid_search(query, top_k, exact=False):
+    """
+    Merge the lexical and semantic rankings with reciprocal rank fusion.
+    Every result carries its cosine similarity and BM25 score (0 if it only matched semantically).
+    """
+    depth = max(top_k, HYBRID_CANDIDATES)
+    lexical_rows, bm25_scores = EMBEDDINGS_DATA['lexical'].search(query, depth)
+    
+    query_embedding = normalize_rows(EMBEDDINGS_DATA['encoder'].encode(query))
+    index = EMBEDDINGS_DATA['index']
+    semantic_rows, _ = index.search(query_embedding, depth, nprobe=SEARCH_NPROBE, exact=exact)
+    
+    fused = {}
+    for ranking in (lexical_rows, semantic_rows):
+        for rank, row in enumerate(ranking.tolist()):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (RRF_K + rank + 1)
+    
+    best = sorted(fused, key=fused.get, reverse=True)[:top_k]
+    bm25 = dict(zip(lexical_rows.tolist(), bm25_scores.tolist()))
+    similarities = index.scores(query_embedding, best) if best else []
+    return [
+        category_result(row, similarity=float(similarity), bm25=bm25.get(row, 0.0), score=fused[row])
+        for row, similarity in zip(best, similarities)
+    ]
+
+
+def get_theme_selector():
+    """Precompute theme viability once the embeddings and board engine are both loaded."""
+    with THEME_SELECTOR_LOCK:
+        selector = EMBEDDINGS_DATA.get('themes')
+        if selector is None:
+            start = time.perf_counter()
+            selector = EMBEDDINGS_DATA['themes'] = ThemeSelector(BOARD_ENGINE.index, EMBEDDINGS_DATA['categories'])
+            print(f"✓ Precomputed theme viability for {len(selector.row_categories)} categories "
+                  f"in {time.perf_counter() - start:.2f}s")
+    return selector
+
+
+def theme_candidates(theme, difficulty):
+    """Viable categories per round, nearest to theme first: one top-k search plus mask lookups."""
+    query_embedding = EMBEDDINGS_DATA['encoder'].encode(theme)
+    rows, _ = EMBEDDINGS_DATA['index'].search(query_embedding, THEME_CANDIDATES, nprobe=SEARCH_NPROBE)
+    return get_theme_selector().candidates(rows, difficulty)
+
+
+def search_clues(query, top_k, exact=False):
+    """Return the top_k clues most similar to query."""
+    query_embedding = EMBEDDINGS_DATA['encoder'].encode(query)
+    clue_index = EMBEDDINGS_DATA['clue_index']
+    rows, similarities = clue_index.search(query_embedding, top_k, nprobe=SEARCH_NPROBE, exact=exact)
+    
+    results = []
+    for row, similarity in zip(rows, similarities):
+        result = clue_index.clues[row]
+        result['similarity'] = float(similarity)
+        results.append(result)
+    return results
+
+
+def start_embeddings_loader():
+    """Load embeddings on a background thread so the server can start serving."""
+    global EMBEDDINGS_LOADER
+    EMBEDDINGS_LOADER = threading.Thread(target=load_embeddings, daemon=True)
+    EMBEDDINGS_LOADER.start()
+    return EMBEDDINGS_LOADER
+
+
+class JeopardyHandler(CachingHandler):
     def do_GET(self):
         parsed_path = urlparse(self.path)
         
@@ -28,10 +408,28 @@ class JeopardyHandler(http.server.SimpleHTTPRequestHandler):
         # Handle the semantic search API endpoint
         elif parsed_path.path == '/api/search-categories':
             self.handle_search_categories()
+        # Handle the clue-level semantic search API endpoint
+        elif parsed_path.path == '/api/search-clues':
+            self.handle_search_clues()
+        # Handle the saved board list/get API endpoints
+        elif parsed_path.path == '/api/boards':
+            self.handle_list_boards()
+        elif parsed_path.path.startswith('/api/boards/'):
+            self.handle_get_board(unquote(parsed_path.path[len('/api/boards/'):]))
+        # Handle the Prometheus metrics endpoint
+        elif parsed_path.path == '/api/metrics':
+            self.send_metrics()
         else:
             # Serve static files normally
             super().do_GET()
     
+    def do_HEAD(self):
+        """Handle HEAD requests: metrics headers, otherwise static files."""
+        if urlparse(self.path).path == '/api/metrics':
+            self.send_metrics()
+        else:
+            super().do_HEAD()
+    
     def do_POST(self):
         """Handle POST requests."""
         parsed_path = urlparse(self.path)
@@ -43,7 +441,7 @@ class JeopardyHandler(http.server.SimpleHTTPRequestHandler):
             self.send_error_response(404, 'Not found')
     
     def handle_generate_board(self):
-        """Generate a new random board using the Python script."""
+        """Generate a new random board with the in-process board engine."""
         try:
             # Parse query parameters
             parsed_path = urlparse(self.path)
@@ -54,45 +452,82 @@ class JeopardyHandler(http.server.SimpleHTTPRequestHandler):
             if difficulty not in ['easy', 'medium', 'hard']:
                 difficulty = 'medium'
             
-            output_file = f'boards/board_random_{difficulty}.json'
-            
-            print(f"Generating {difficulty} board...")
-            
-            # Run the random board generator script
-            result = subprocess.run(
-                ['python3', 'random_board_generator.py', 
-                 '--difficulty', difficulty, 
-                 '--output', output_file],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.returncode != 0:
-                raise Exception(f"Board generation failed: {result.stderr}")
-            
-            print(f"✓ Generated {difficulty} board successfully")
+            # Optional session (no repeated clues, categories or Final Jeopardy) and constraints
+            session_id = params.get('session', [None])[0]
+            final_options = {
+                option: params[param][0]
+                for param, option in (('final_from', 'start_date'), ('final_to', 'end_date'),
+                                      ('final_keyword', 'keyword'))
+                if params.get(param, [''])[0]
+            }
+            theme = params.get('theme', [''])[0].strip() or None
+            seed = params.get('seed', [''])[0]
+            if seed:
+                try:
+                    seed = int(seed)
+                except ValueError:
+                    self.send_error_response(400, 'seed must be an integer')
+                    return
+            else:
+                seed = None
+            
+            filters = None
+            if any(params.get(param, [''])[0] for param in ('from', 'to', 'keyword', 'rounds')):
+                rounds = params.get('rounds', [''])[0]
+                try:
+                    filters = BoardFilters(
+                        start_date=params.get('from', [None])[0],
+                        end_date=params.get('to', [None])[0],
+                        keyword=params.get('keyword', [None])[0],
+                        rounds=rounds.split(',') if rounds else None
+                    )
+                except ValueError as e:
+                    self.send_error_response(400, str(e))
+                    return
             
-            # Read the generated board file
-            with open(output_file, 'r', encoding='utf-8') as f:
-                board_data = json.load(f)
+            if BOARD_ENGINE is None:
+                self.send_error_response(500, f'Board generation unavailable: {ARCHIVE_FILE} not loaded')
+                return
+
+            # Themed boards need the category embeddings
+            if theme:
+                if EMBEDDINGS_LOADER is None and not EMBEDDINGS_READY.is_set():
+                    load_embeddings()
+                if not EMBEDDINGS_READY.wait(EMBEDDINGS_WAIT_SECONDS):
+                    self.send_error_response(503, 'Embeddings are still loading, please try again shortly')
+                    return
+                if EMBEDDINGS_DATA is None or 'index' not in EMBEDDINGS_DATA:
+                    self.send_error_response(500, f'Themed boards unavailable: {EMBEDDINGS_ERROR}')
+                    return
+
+            # Serve a pre-generated board if one is ready, otherwise build it now
+            start = time.perf_counter()
+            if seed is not None and session_id is None:
+                body = SEED_CACHE.get(board_cache_key(seed, difficulty, final_options, filters, theme))
+                source = 'seed cache'
+                if body is None:
+                    body = API_LIMITER.run(generate_board_response, difficulty, None, final_options, filters,
+                                           seed, theme)
+                    source = 'generated'
+            elif session_id or final_options or filters or theme or seed is not None:
+                body = API_LIMITER.run(generate_board_response, difficulty, session_id, final_options, filters,
+                                       seed, theme)
+                source = 'generated'
+            else:
+                body = BOARD_POOL.take(difficulty) if BOARD_POOL else None
+                source = 'pool'
+                if body is None:
+                    body = API_LIMITER.run(generate_board_response, difficulty)
+                    source = 'generated'
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            
+            print(f"✓ Served {difficulty} board in {elapsed_ms:.1f}ms ({source})")
             
             # Send success response with the board data
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
+            self.send_body(body, headers={'Access-Control-Allow-Origin': '*'})
             
-            response = {
-                'success': True,
-                'message': f'Generated {difficulty} board',
-                'board': board_data
-            }
-            
-            self.wfile.write(json.dumps(response).encode('utf-8'))
-            
-        except subprocess.TimeoutExpired:
-            self.send_error_response(500, 'Board generation timed out')
+        except PoolSaturated as e:
+            self.send_busy_response(e)
         except Exception as e:
             print(f"Error generating board: {e}")
             self.send_error_response(500, str(e))
@@ -111,63 +546,127 @@ class JeopardyHandler(http.server.SimpleHTTPRequestHandler):
         
         self.wfile.write(json.dumps(response).encode('utf-8'))
     
-    def handle_search_categories(self):
-        """Handle semantic search for categories."""
-        global EMBEDDINGS_DATA
+    def send_busy_response(self, error):
+        """Send a 503 telling the client when to retry."""
+        self.send_response(503)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Retry-After', str(error.retry_after))
+        self.end_headers()
         
+        response = {
+            'success': False,
+            'error': str(error)
+        }
+        
+        self.wfile.write(json.dumps(response).encode('utf-8'))
+    
+    def handle_search_categories(self):
+        """Handle lexical, semantic or hybrid search for categories."""
         try:
             # Parse query parameters
             parsed_path = urlparse(self.path)
             params = parse_qs(parsed_path.query)
             query = params.get('q', [''])[0]
-            top_k = int(params.get('top_k', ['20'])[0])
+            try:
+                top_k = parse_top_k(params)
+            except ValueError as e:
+                self.send_error_response(400, str(e))
+                return
+            exact = params.get('exact', ['false'])[0].lower() in ('1', 'true')
+            mode = params.get('mode', ['hybrid'])[0].lower()
             
             if not query:
                 self.send_error_response(400, 'Query parameter "q" is required')
                 return
+            if mode not in SEARCH_MODES:
+                self.send_error_response(400, f'Invalid mode: {mode} (expected lexical, semantic or hybrid)')
+                return
             
-            # Load embeddings if not already loaded
+            # Wait for the background loader (or load now if it was never started)
+            if EMBEDDINGS_LOADER is None and not EMBEDDINGS_READY.is_set():
+                load_embeddings()
+            if not LEXICAL_READY.wait(EMBEDDINGS_WAIT_SECONDS):
+                self.send_error_response(503, 'Embeddings are still loading, please try again shortly')
+                return
             if EMBEDDINGS_DATA is None:
-                print("Loading embeddings...")
-                if not os.path.exists('category_embeddings.pkl'):
-                    self.send_error_response(500, 'Embeddings file not found. Please run generate_embeddings.py first.')
+                self.send_error_response(500, EMBEDDINGS_ERROR)
+                return
+            
+            has_lexical = EMBEDDINGS_DATA.get('lexical') is not None
+            if mode == 'hybrid':
+                if not has_lexical:
+                    mode = 'semantic'
+                elif not EMBEDDINGS_READY.is_set() or 'index' not in EMBEDDINGS_DATA:
+                    # Answer lexically rather than wait for (or fail on) the model
+                    mode = 'lexical'
+            
+            if mode == 'lexical':
+                if not has_lexical:
+                    self.send_error_response(500, 'Lexical index not found. Please rerun generate_embeddings.py.')
                     return
-                
-                with open('category_embeddings.pkl', 'rb') as f:
-                    EMBEDDINGS_DATA = pickle.load(f)
-                
-                # Also load the model for encoding queries
-                from sentence_transformers import SentenceTransformer
-                EMBEDDINGS_DATA['model'] = SentenceTransformer(EMBEDDINGS_DATA['model_name'])
-                print(f"✓ Loaded embeddings for {len(EMBEDDINGS_DATA['categories'])} categories")
+                # Cheap enough to answer without going through the admission limiter
+                results = lexical_search(query, top_k)
+            else:
+                if not EMBEDDINGS_READY.wait(EMBEDDINGS_WAIT_SECONDS):
+                    self.send_error_response(503, 'Embeddings are still loading, please try again shortly')
+                    return
+                if 'index' not in EMBEDDINGS_DATA:
+                    self.send_error_response(500, EMBEDDINGS_ERROR)
+                    return
+                search = hybrid_search if mode == 'hybrid' else search_categories
+                results = API_LIMITER.run(search, query, top_k, exact)
+            
+            # Send response
+            response = {
+                'success': True,
+                'query': query,
+                'mode': mode,
+                'results': results,
+                'count': len(results)
+            }
             
-            # Encode the query
-            query_embedding = EMBEDDINGS_DATA['model'].encode([query])[0]
+            body = json.dumps(response, separators=(',', ':')).encode('utf-8')
+            self.send_body(body, headers={'Access-Control-Allow-Origin': '*'})
             
-            # Compute cosine similarity
-            embeddings = EMBEDDINGS_DATA['embeddings']
-            similarities = np.dot(embeddings, query_embedding) / (
-                np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query_embedding)
-            )
+        except PoolSaturated as e:
+            self.send_busy_response(e)
+        except Exception as e:
+            print(f"Error in category search: {e}")
+            import traceback
+            traceback.print_exc()
+            self.send_error_response(500, str(e))
+    
+    def handle_search_clues(self):
+        """Handle semantic search over individual clues."""
+        try:
+            parsed_path = urlparse(self.path)
+            params = parse_qs(parsed_path.query)
+            query = params.get('q', [''])[0]
+            try:
+                top_k = parse_top_k(params)
+            except ValueError as e:
+                self.send_error_response(400, str(e))
+                return
+            exact = params.get('exact', ['false'])[0].lower() in ('1', 'true')
             
-            # Get top-k results
-            top_indices = np.argsort(similarities)[::-1][:top_k]
+            if not query:
+                self.send_error_response(400, 'Query parameter "q" is required')
+                return
             
-            results = []
-            for idx in top_indices:
-                category = EMBEDDINGS_DATA['categories'][idx]
-                results.append({
-                    'name': category['name'],
-                    'questions': category['questions'],
-                    'round': category['round'],
-                    'similarity': float(similarities[idx])
-                })
+            if EMBEDDINGS_LOADER is None and not EMBEDDINGS_READY.is_set():
+                load_embeddings()
+            if not EMBEDDINGS_READY.wait(EMBEDDINGS_WAIT_SECONDS):
+                self.send_error_response(503, 'Embeddings are still loading, please try again shortly')
+                return
+            if EMBEDDINGS_DATA is None or 'index' not in EMBEDDINGS_DATA:
+                self.send_error_response(500, EMBEDDINGS_ERROR)
+                return
+            if EMBEDDINGS_DATA.get('clue_index') is None:
+                self.send_error_response(500, 'Clue index not found. Please run generate_embeddings.py --clues.')
+                return
             
-            # Send response
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
+            results = API_LIMITER.run(search_clues, query, top_k, exact)
             
             response = {
                 'success': True,
@@ -176,14 +675,51 @@ class JeopardyHandler(http.server.SimpleHTTPRequestHandler):
                 'count': len(results)
             }
             
-            self.wfile.write(json.dumps(response).encode('utf-8'))
+            body = json.dumps(response, separators=(',', ':')).encode('utf-8')
+            self.send_body(body, headers={'Access-Control-Allow-Origin': '*'})
             
+        except PoolSaturated as e:
+            self.send_busy_response(e)
         except Exception as e:
-            print(f"Error in semantic search: {e}")
+            print(f"Error in clue search: {e}")
             import traceback
             traceback.print_exc()
             self.send_error_response(500, str(e))
     
+    def handle_list_boards(self):
+        """List saved boards with their sizes, mtimes and category names."""
+        try:
+            body = get_board_catalog().list_response()
+            self.send_body(body, headers={'Access-Control-Allow-Origin': '*', 'Cache-Control': 'no-cache'})
+        except Exception as e:
+            print(f"Error listing boards: {e}")
+            self.send_error_response(500, str(e))
+    
+    def handle_get_board(self, name):
+        """Return a saved board's JSON."""
+        try:
+            result = get_board_catalog().get(name)
+            if result is None:
+                self.send_error_response(404, f'Board not found: {name}')
+                return
+            
+            body, (mtime_ns, size) = result
+            etag = f'W/"{mtime_ns:x}-{size:x}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            
+            self.send_body(body, headers={
+                'Access-Control-Allow-Origin': '*',
+                'Cache-Control': 'no-cache',
+                'ETag': etag
+            })
+        except Exception as e:
+            print(f"Error reading board: {e}")
+            self.send_error_response(500, str(e))
+    
     def handle_save_board(self):
         """Handle saving a board to the boards directory."""
         try:
@@ -206,34 +742,26 @@ class JeopardyHandler(http.server.SimpleHTTPRequestHandler):
             if filename.endswith('.json'):
                 filename = filename[:-5]
             
-            # Create boards directory if it doesn't exist
-            boards_dir = 'boards'
-            if not os.path.exists(boards_dir):
-                os.makedirs(boards_dir)
-            
-            # Full filepath
-            filepath = os.path.join(boards_dir, f'{filename}.json')
-            
-            # Save the board
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(board, f, indent=4, ensure_ascii=False)
-            
-            print(f"✓ Saved board to: {filepath}")
+            # Queue the board; the writer thread saves it atomically in the background
+            filepath = get_board_writer().save(filename, board)
             
-            # Send success response
-            self.send_response(200)
+            # Accepted, not yet on disk: the writer thread saves it shortly
+            self.send_response(202)
             self.send_header('Content-Type', 'application/json')
             self.send_header('Access-Control-Allow-Origin', '*')
             self.end_headers()
             
             response = {
                 'success': True,
-                'message': 'Board saved successfully',
+                'status': 'queued',
+                'message': 'Board queued for saving',
                 'filepath': filepath
             }
             
             self.wfile.write(json.dumps(response).encode('utf-8'))
             
+        except PoolSaturated as e:
+            self.send_busy_response(e)
         except Exception as e:
             print(f"Error saving board: {e}")
             import traceback
@@ -247,15 +775,55 @@ class JeopardyHandler(http.server.SimpleHTTPRequestHandler):
 
 
 def main():
+    global API_LIMITER, STREAM_ARCHIVE, FIX_TEXT_UPFRONT
+    
+    parser = argparse.ArgumentParser(description='Jeopardy game server')
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=PORT,
+        help=f'Port to listen on (default: {PORT})'
+    )
+    add_pool_arguments(parser)
+    parser.add_argument(
+        '--board-pool-size',
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help=f'Ready-made boards to keep per difficulty, 0 to disable (default: {DEFAULT_POOL_SIZE})'
+    )
+    parser.add_argument(
+        '--stream-archive',
+        action='store_true',
+        help='Stream the JSON archive at startup to lower peak memory (needs ijson)'
+    )
+    parser.add_argument(
+        '--fix-text-upfront',
+        action='store_true',
+        help='Run all clue text through ftfy in parallel at startup (slower start, faster boards)'
+    )
+    args = parser.parse_args()
+    
+    STREAM_ARCHIVE = args.stream_archive
+    FIX_TEXT_UPFRONT = args.fix_text_upfront
+    
     # Change to the script directory
     os.chdir(os.path.dirname(os.path.abspath(__file__)))
     
-    with socketserver.TCPServer(("", PORT), JeopardyHandler) as httpd:
+    API_LIMITER = AdmissionLimiter(concurrency=args.concurrency, max_in_flight=args.max_in_flight)
+    register_metrics()
+    
+    # Load the archive once so board requests don't pay for it
+    load_board_engine()
+    start_board_pool(args.board_pool_size)
+    start_embeddings_loader()
+    get_board_writer()
+    
+    with http.server.ThreadingHTTPServer(("", args.port), JeopardyHandler) as httpd:
         print(f"\n{'='*60}")
         print(f"  🎮 Jeopardy Game Server Running!")
         print(f"{'='*60}")
-        print(f"\n  Server address: http://localhost:{PORT}")
-        print(f"\n  Open your browser to: http://localhost:{PORT}/index.html")
+        print(f"\n  Server address: http://localhost:{args.port}")
+        print(f"\n  Open your browser to: http://localhost:{args.port}/index.html")
         print(f"\n  Press Ctrl+C to stop the server")
         print(f"\n{'='*60}\n")
         
@@ -264,6 +832,15 @@ def main():
         except KeyboardInterrupt:
             print("\n\n  Server stopped.")
             print(f"{'='*60}\n")
+        finally:
+            if BOARD_POOL:
+                BOARD_POOL.stop()
+            if BOARD_WRITER:
+                # Don't lose boards that were accepted but not yet written
+                print("  Writing queued boards...")
+                BOARD_WRITER.stop()
+            if BOARD_CATALOG:
+                BOARD_CATALOG.stop()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Shared request-handling helpers for server.py and board_server.py.
+
+Both servers run on http.server.ThreadingHTTPServer so static files are never
+stuck behind a slow API call. CPU-heavy work (board generation, search) is
+admitted through an AdmissionLimiter, which caps how many of those requests
+run and wait at once and tells callers to back off when it is full. It only
+limits concurrency: the work still runs on the handler thread, under the GIL.
+"""
+
+import threading
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_IN_FLIGHT = 16
+DEFAULT_RETRY_AFTER = 1
+
+
+class PoolSaturated(Exception):
+    """Raised when the limiter already has max_in_flight requests."""
+
+    def __init__(self, retry_after):
+        super().__init__(f'Server is busy, retry in {retry_after}s')
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """
+    Admission control for CPU-bound request work.
+    run() calls fn on the caller's thread, at most concurrency at a time; at most
+    max_in_flight calls run or wait at once, and more raise PoolSaturated.
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 retry_after=DEFAULT_RETRY_AFTER):
+        self.concurrency = concurrency
+        self.max_in_flight = max(max_in_flight, concurrency)
+        self.retry_after = retry_after
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def run(self, fn, *args, **kwargs):
+        """Wait for a free slot, then run fn and return its result."""
+        with self.lock:
+            if self.in_flight >= self.max_in_flight:
+                self.rejected += 1
+                raise PoolSaturated(self.retry_after)
+            self.in_flight += 1
+
+        try:
+            with self.slots:
+                return fn(*args, **kwargs)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def add_pool_arguments(parser):
+    """Add --concurrency/--max-in-flight options to a server's argument parser."""
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f'Board generation and search requests running at once (default: {DEFAULT_CONCURRENCY})'
+    )
+    parser.add_argument(
+        '--max-in-flight',
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        help=f'Max concurrent API requests before answering 503 (default: {DEFAULT_MAX_IN_FLIGHT})'
+    )
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Tests for board_catalog.py: directory-mtime rescans and the board body cache.
+"""
+
+import json
+import os
+
+import pytest
+
+from board_catalog import BoardCatalog, board_name, summarize_board
+
+# Well outside the racy window, so the catalog trusts these mtimes
+OLD_MTIME = 1_600_000_000
+
+
+def make_board(name):
+    return {
+        'jeopardy': [{'name': f'{name} ONE', 'questions': []}, {'name': f'{name} TWO', 'questions': []}],
+        'double-jeopardy': [{'name': f'{name} DOUBLE', 'questions': []}],
+        'final-jeopardy': {'category': f'{name} FINAL', 'question': 'q', 'answer': 'a'}
+    }
+
+
+def write_board(directory, name, board=None, mtime=OLD_MTIME):
+    path = directory / f'{name}.json'
+    path.write_text(json.dumps(board or make_board(name)), encoding='utf-8')
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def age_directory(directory, mtime=OLD_MTIME):
+    os.utime(directory, (mtime, mtime))
+
+
+@pytest.fixture
+def boards(tmp_path):
+    directory = tmp_path / 'boards'
+    directory.mkdir()
+    write_board(directory, 'alpha')
+    write_board(directory, 'beta', mtime=OLD_MTIME + 10)
+    age_directory(directory)
+    return directory
+
+
+def test_board_name():
+    assert board_name('boards/alpha.json') == 'alpha'
+    assert board_name('../beta') == 'beta'
+
+
+def test_summarize_board():
+    assert summarize_board(make_board('X')) == {
+        'jeopardy': ['X ONE', 'X TWO'],
+        'double-jeopardy': ['X DOUBLE'],
+        'final-jeopardy': 'X FINAL'
+    }
+    assert summarize_board(['not', 'a', 'board']) == {}
+
+
+def test_refresh_loads_boards_newest_first(boards):
+    catalog = BoardCatalog(str(boards))
+    assert catalog.refresh() == 2
+    assert [e['name'] for e in catalog.list()] == ['beta', 'alpha']
+    assert catalog.list()[1]['categories']['final-jeopardy'] == 'alpha FINAL'
+
+
+def test_refresh_skips_rescan_while_directory_mtime_is_unchanged(boards):
+    catalog = BoardCatalog(str(boards))
+    catalog.refresh()
+    # A new file whose directory mtime is put back isn't noticed...
+    write_board(boards, 'gamma')
+    age_directory(boards)
+    assert catalog.refresh() == 0
+    assert catalog.get('gamma') is None
+
+    # ...until the directory mtime moves
+    age_directory(boards, OLD_MTIME + 100)
+    assert catalog.refresh() == 1
+    assert 'gamma' in {e['name'] for e in catalog.list()}
+
+
+def test_refresh_picks_up_removed_boards(boards):
+    catalog = BoardCatalog(str(boards))
+    catalog.refresh()
+    (boards / 'alpha.json').unlink()
+    age_directory(boards, OLD_MTIME + 100)
+    assert catalog.refresh() == 1
+    assert [e['name'] for e in catalog.list()] == ['beta']
+    assert catalog.get('alpha') is None
+
+
+def test_recent_directory_mtime_is_not_trusted(boards):
+    catalog = BoardCatalog(str(boards))
+    write_board(boards, 'gamma')
+    catalog.refresh()
+    assert catalog.dir_mtime_ns is None
+    write_board(boards, 'delta')
+    assert catalog.refresh() == 1
+
+
+def test_unreadable_board_is_retried(boards):
+    (boards / 'broken.json').write_text('{"jeopardy": [', encoding='utf-8')
+    age_directory(boards, OLD_MTIME + 100)
+    catalog = BoardCatalog(str(boards))
+    catalog.refresh()
+    entry = next(e for e in catalog.list() if e['name'] == 'broken')
+    assert entry['categories'] == {}
+
+    # Finished in place; the unchanged directory mtime doesn't stop the retry
+    write_board(boards, 'broken', make_board('fixed'), mtime=OLD_MTIME + 50)
+    age_directory(boards, OLD_MTIME + 100)
+    assert catalog.refresh() == 1
+    entry = next(e for e in catalog.list() if e['name'] == 'broken')
+    assert entry['categories']['final-jeopardy'] == 'fixed FINAL'
+
+
+def test_get_caches_body_until_file_changes(boards):
+    catalog = BoardCatalog(str(boards))
+    catalog.refresh()
+    body, key = catalog.get('alpha')
+    assert json.loads(body) == make_board('alpha')
+    assert catalog.get('alpha.json') == (body, key)
+    assert (catalog.stats()['hits'], catalog.stats()['misses']) == (1, 1)
+
+    # Rewritten in place: the directory mtime doesn't change, but get() stats the file
+    write_board(boards, 'alpha', make_board('ALPHA 2'), mtime=OLD_MTIME + 20)
+    age_directory(boards)
+    body, new_key = catalog.get('alpha')
+    assert new_key != key
+    assert json.loads(body) == make_board('ALPHA 2')
+    entry = next(e for e in catalog.list() if e['name'] == 'alpha')
+    assert entry['categories']['jeopardy'] == ['ALPHA 2 ONE', 'ALPHA 2 TWO']
+
+
+def test_record_save_updates_catalog_and_body_cache(boards):
+    catalog = BoardCatalog(str(boards))
+    catalog.refresh()
+    listing = catalog.list_response()
+    assert catalog.list_response() is listing
+
+    board = make_board('saved')
+    body = json.dumps(board).encode('utf-8')
+    (boards / 'saved.json').write_bytes(body)
+    catalog.record_save('saved', board, body)
+
+    assert catalog.get('saved')[0] is body
+    assert catalog.stats()['hits'] == 1
+    listing = json.loads(catalog.list_response())
+    assert listing['count'] == 3
+    assert listing['boards'][0]['name'] == 'saved'
+
+
+def test_body_cache_is_bounded(boards):
+    catalog = BoardCatalog(str(boards), body_cache_size=1)
+    catalog.refresh()
+    catalog.get('alpha')
+    catalog.get('beta')
+    assert catalog.stats()['cached_bodies'] == 1
+    assert list(catalog.bodies) == ['beta']
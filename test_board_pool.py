@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for board_pool.py: background refill of ready-made boards and the seed LRU.
+"""
+
+import itertools
+import threading
+import time
+
+from board_pool import BoardPool, SeedCache
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def counting_generator():
+    counter = itertools.count()
+    return lambda difficulty: f'{difficulty} {next(counter)}'.encode('utf-8')
+
+
+def test_pool_fills_every_difficulty_to_high_water():
+    pool = BoardPool(counting_generator(), ['easy', 'hard'], high_water=3).start()
+    try:
+        wait_for(lambda: pool.stats()['ready'] == {'easy': 3, 'hard': 3})
+        time.sleep(0.05)
+        assert pool.stats()['ready'] == {'easy': 3, 'hard': 3}
+    finally:
+        pool.stop()
+
+
+def test_take_counts_hits_and_misses_and_triggers_refill():
+    pool = BoardPool(counting_generator(), ['easy'], high_water=2)
+    assert pool.take('easy') is None
+    assert pool.take('unknown') is None
+
+    pool.start()
+    try:
+        wait_for(lambda: pool.stats()['ready']['easy'] == 2)
+        body = pool.take('easy')
+        assert body.startswith(b'easy ')
+        assert pool.take('easy') != body
+        wait_for(lambda: pool.stats()['ready']['easy'] == 2)
+        stats = pool.stats()
+        assert (stats['hits'], stats['misses'], stats['high_water']) == (2, 2, 2)
+    finally:
+        pool.stop()
+
+
+def test_refill_waits_after_generate_fails():
+    calls = []
+
+    def generate(difficulty):
+        calls.append(difficulty)
+        raise RuntimeError('archive missing')
+
+    pool = BoardPool(generate, ['easy'], high_water=2).start()
+    try:
+        wait_for(lambda: len(calls) == 1)
+        time.sleep(0.05)
+        assert len(calls) == 1
+        assert pool.take('easy') is None
+        wait_for(lambda: len(calls) == 2)
+    finally:
+        pool.stop()
+
+
+def test_stop_ends_refill_thread():
+    pool = BoardPool(counting_generator(), ['easy'], high_water=1).start()
+    wait_for(lambda: pool.stats()['ready']['easy'] == 1)
+    pool.stop()
+    pool.thread.join(timeout=5)
+    assert not pool.thread.is_alive()
+
+
+def test_seed_cache_evicts_least_recently_used():
+    cache = SeedCache(max_size=2)
+    cache.put((1, 'easy'), b'one')
+    cache.put((2, 'easy'), b'two')
+    assert cache.get((1, 'easy')) == b'one'
+    cache.put((3, 'easy'), b'three')
+
+    assert cache.get((2, 'easy')) is None
+    assert cache.get((1, 'easy')) == b'one'
+    assert cache.get((3, 'easy')) == b'three'
+    assert cache.stats() == {'hits': 3, 'misses': 1, 'size': 2, 'max_size': 2}
+
+
+def test_seed_cache_is_thread_safe():
+    cache = SeedCache(max_size=50)
+
+    def worker(offset):
+        for i in range(500):
+            cache.put((offset, i), b'x')
+            cache.get((offset, i - 1))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats()['size'] == 50
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for board_writer.py: write-behind coalescing, atomic writes and backpressure.
+"""
+
+import json
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import server
+from board_writer import BoardWriter, write_atomic
+from serving import PoolSaturated, DEFAULT_RETRY_AFTER
+
+
+def make_board(final):
+    return {'jeopardy': [], 'double-jeopardy': [], 'final-jeopardy': {'category': final}}
+
+
+def read_board(directory, name):
+    return json.loads((directory / f'{name}.json').read_text(encoding='utf-8'))
+
+
+def test_write_atomic_replaces_file_and_leaves_no_temp(tmp_path):
+    path = tmp_path / 'board.json'
+    path.write_bytes(b'old')
+    write_atomic(str(path), b'new')
+    assert path.read_bytes() == b'new'
+    assert [p.name for p in tmp_path.iterdir()] == ['board.json']
+
+
+def test_queued_saves_of_the_same_board_are_coalesced(tmp_path):
+    saved = []
+    writer = BoardWriter(str(tmp_path), on_saved=lambda name, board, body: saved.append((name, board)))
+    # Not started yet, so every save stays queued
+    for i in range(5):
+        assert writer.save('autosave', make_board(f'v{i}')) == str(tmp_path / 'autosave.json')
+    writer.save('other', make_board('other'))
+    assert writer.stats()['pending'] == 2
+
+    writer.start()
+    assert writer.stop(timeout=5)
+    assert saved == [('autosave', make_board('v4')), ('other', make_board('other'))]
+    assert read_board(tmp_path, 'autosave') == make_board('v4')
+    stats = writer.stats()
+    assert (stats['pending'], stats['saved'], stats['coalesced'], stats['errors']) == (0, 2, 4, 0)
+
+
+def test_full_queue_raises_pool_saturated(tmp_path):
+    writer = BoardWriter(str(tmp_path), max_pending=1, save_timeout=0.05)
+    writer.save('first', make_board('first'))
+    # Re-saving a queued board needs no room
+    writer.save('first', make_board('again'))
+    with pytest.raises(PoolSaturated) as excinfo:
+        writer.save('second', make_board('second'))
+    assert excinfo.value.retry_after == DEFAULT_RETRY_AFTER
+
+
+def test_full_queue_waits_for_writer(tmp_path):
+    writer = BoardWriter(str(tmp_path), max_pending=1, save_timeout=5)
+    writer.save('first', make_board('first'))
+    threading.Timer(0.05, writer.start).start()
+    writer.save('second', make_board('second'))
+    assert writer.stop(timeout=5)
+    assert read_board(tmp_path, 'second') == make_board('second')
+
+
+def test_write_and_callback_errors_are_counted(tmp_path):
+    def on_saved(name, board, body):
+        raise RuntimeError('catalog unavailable')
+
+    writer = BoardWriter(str(tmp_path), on_saved=on_saved).start()
+    writer.save('ok', make_board('ok'))
+    writer.save('bad', {'unserializable': object()})
+    assert writer.stop(timeout=5)
+    stats = writer.stats()
+    assert (stats['saved'], stats['errors'], stats['callback_errors']) == (1, 1, 1)
+    assert read_board(tmp_path, 'ok') == make_board('ok')
+    assert not (tmp_path / 'bad.json').exists()
+
+
+def post_board(httpd, name):
+    data = json.dumps({'filename': name, 'board': make_board(name)}).encode('utf-8')
+    request = urllib.request.Request(f'http://127.0.0.1:{httpd.server_port}/api/save-board', data=data,
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, json.loads(e.read())
+
+
+def test_save_endpoint_answers_503_when_writer_is_backed_up(tmp_path, monkeypatch):
+    writer = BoardWriter(str(tmp_path), max_pending=1, save_timeout=0.05)
+    monkeypatch.setattr(server, 'BOARD_WRITER', writer)
+    monkeypatch.setattr(server.JeopardyHandler, 'log_message', lambda *args: None)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), server.JeopardyHandler)
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    try:
+        status, _, response = post_board(httpd, '../first.json')
+        assert status == 202
+        assert response['status'] == 'queued'
+        assert response['filepath'] == str(tmp_path / 'first.json')
+
+        status, headers, response = post_board(httpd, 'second')
+        assert status == 503
+        assert headers['Retry-After'] == str(DEFAULT_RETRY_AFTER)
+        assert response['success'] is False
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for clue_index.py: int8 scan plus float re-rank against exact float32 search,
+and server.py's top_k validation.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+import server
+from clue_index import CLUE_MANIFEST_FILE, ClueIndex, ClueIndexWriter, clue_index_exists
+from vector_index import normalize_rows
+
+NUM_CLUES = 3000
+DIMENSION = 48
+TOP_K = 10
+
+
+def make_clues(count):
+    return [{'category': f'CATEGORY {i // 5}', 'round': 'Jeopardy!', 'value': '$200',
+             'question': f'question {i}', 'answer': f'answer {i}', 'air_date': '2001-01-01'}
+            for i in range(count)]
+
+
+@pytest.fixture(scope='module')
+def clue_data(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('clues')
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((NUM_CLUES, DIMENSION)).astype(np.float32)
+    clues = make_clues(NUM_CLUES)
+
+    writer = ClueIndexWriter('test-model', str(directory))
+    # Uneven chunks, as the last chunk of a real build would be
+    for start in range(0, NUM_CLUES, 700):
+        writer.add(clues[start:start + 700], embeddings[start:start + 700])
+    writer.close()
+
+    queries = normalize_rows(rng.standard_normal((20, DIMENSION)))
+    return directory, normalize_rows(embeddings), queries
+
+
+def exact_top_k(vectors, query, top_k):
+    return set(np.argsort(-(vectors @ query))[:top_k].tolist())
+
+
+def recall(index, vectors, queries, **search_options):
+    found = 0
+    for query in queries:
+        rows, _ = index.search(query, TOP_K, **search_options)
+        found += len(exact_top_k(vectors, query, TOP_K) & set(rows.tolist()))
+    return found / (len(queries) * TOP_K)
+
+
+def test_writer_produces_consistent_index(clue_data):
+    directory, _, _ = clue_data
+    assert clue_index_exists(str(directory))
+    assert not list(directory.glob('*.tmp'))
+    manifest = json.loads((directory / CLUE_MANIFEST_FILE).read_text(encoding='utf-8'))
+    assert manifest == {'model_name': 'test-model', 'count': NUM_CLUES, 'dimension': DIMENSION}
+
+    index = ClueIndex(str(directory))
+    assert len(index) == NUM_CLUES
+    assert index.clues[1234]['question'] == 'question 1234'
+
+
+def test_reranked_exact_scan_matches_float32(clue_data):
+    directory, vectors, queries = clue_data
+    index = ClueIndex(str(directory))
+    assert recall(index, vectors, queries, exact=True) == 1.0
+
+    for query in queries[:5]:
+        rows, scores = index.search(query, TOP_K, exact=True)
+        assert list(scores) == sorted(scores, reverse=True)
+        np.testing.assert_allclose(scores, vectors[rows] @ query, atol=2e-3)
+
+
+def test_rerank_recovers_int8_misses(clue_data):
+    directory, vectors, queries = clue_data
+    index = ClueIndex(str(directory))
+    # Ranking by the int8 scores alone misses some near ties; the re-rank doesn't
+    assert recall(index, vectors, queries, exact=True, candidates=TOP_K) < 1.0
+    assert recall(index, vectors, queries, exact=True) == 1.0
+
+
+def test_ivf_search_recall(clue_data):
+    directory, vectors, queries = clue_data
+    index = ClueIndex(str(directory))
+    num_lists = len(index.index.ivf.centroids)
+    assert recall(index, vectors, queries, nprobe=num_lists) == 1.0
+    assert recall(index, vectors, queries, nprobe=num_lists // 2) >= 0.8
+
+
+def test_inconsistent_index_is_rejected(clue_data, tmp_path):
+    directory, _, _ = clue_data
+    for path in directory.iterdir():
+        (tmp_path / path.name).write_bytes(path.read_bytes())
+    manifest = json.loads((tmp_path / CLUE_MANIFEST_FILE).read_text(encoding='utf-8'))
+    manifest['count'] -= 1
+    (tmp_path / CLUE_MANIFEST_FILE).write_text(json.dumps(manifest), encoding='utf-8')
+    with pytest.raises(ValueError):
+        ClueIndex(str(tmp_path))
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, server.DEFAULT_TOP_K),
+    ('', server.DEFAULT_TOP_K),
+    ('1', 1),
+    ('50', 50),
+    (str(server.MAX_TOP_K), server.MAX_TOP_K),
+])
+def test_parse_top_k(value, expected):
+    params = {} if value is None else {'top_k': [value]}
+    assert server.parse_top_k(params) == expected
+
+
+@pytest.mark.parametrize('value', ['0', '-3', str(server.MAX_TOP_K + 1), 'ten', '2.5'])
+def test_parse_top_k_rejects_out_of_range(value):
+    with pytest.raises(ValueError):
+        server.parse_top_k({'top_k': [value]})
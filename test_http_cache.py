@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Tests for http_cache.py: precompressed API bodies and static file caching.
+"""
+
+import gzip
+import json
+import functools
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import http_cache
+from http_cache import CachingHandler, precompress
+
+BODY = json.dumps({'board': ['clue %d' % i for i in range(500)]}).encode('utf-8')
+
+
+class BodyHandler(CachingHandler):
+    """Answers every GET with whatever body the server was given."""
+
+    def do_GET(self):
+        self.send_body(self.server.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StaticHandler(CachingHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(handler):
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    return httpd
+
+
+@pytest.fixture
+def body_server():
+    httpd = serve(BodyHandler)
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def static_server(tmp_path):
+    (tmp_path / 'board.json').write_bytes(BODY)
+    (tmp_path / 'tiny.txt').write_bytes(b'tiny')
+    httpd = serve(functools.partial(StaticHandler, directory=str(tmp_path)))
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def fetch(httpd, path='/', headers=None):
+    request = urllib.request.Request(f'http://127.0.0.1:{httpd.server_port}{path}', headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_precompress_keeps_raw_and_smaller_variants():
+    variants = precompress(BODY)
+    assert variants[None] is BODY
+    assert gzip.decompress(variants['gzip']) == BODY
+    assert set(variants) == {None} | set(http_cache.ENCODINGS)
+
+
+def test_precompress_skips_small_bodies():
+    assert precompress(b'{}') == {None: b'{}'}
+
+
+def test_precompressed_body_is_not_recompressed(body_server, monkeypatch):
+    body_server.body = precompress(BODY)
+    calls = []
+    monkeypatch.setattr(http_cache, 'compress', lambda *args: calls.append(args))
+
+    for _ in range(3):
+        status, headers, data = fetch(body_server, headers={'Accept-Encoding': 'gzip'})
+        assert status == 200
+        assert headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(data) == BODY
+    status, headers, data = fetch(body_server)
+    assert headers['Content-Encoding'] is None
+    assert data == BODY
+    assert calls == []
+
+
+def test_plain_body_is_compressed_per_request(body_server):
+    body_server.body = BODY
+    status, headers, data = fetch(body_server, headers={'Accept-Encoding': 'gzip'})
+    assert headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(data) == BODY
+
+
+def test_static_etag_differs_per_encoding(static_server):
+    status, gzip_headers, data = fetch(static_server, '/board.json', {'Accept-Encoding': 'gzip'})
+    assert status == 200
+    assert gzip_headers['Content-Encoding'] == 'gzip'
+    assert gzip_headers['ETag'].endswith('-gzip"')
+    assert gzip_headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(data) == BODY
+
+    status, plain_headers, data = fetch(static_server, '/board.json', {'Accept-Encoding': 'identity'})
+    assert status == 200
+    assert plain_headers['Content-Encoding'] is None
+    assert data == BODY
+    assert plain_headers['ETag'] == gzip_headers['ETag'].replace('-gzip"', '"')
+
+
+@pytest.mark.parametrize('accept_encoding', ['gzip', 'identity'])
+def test_static_revalidation_returns_304_with_variant_etag(static_server, accept_encoding):
+    _, headers, _ = fetch(static_server, '/board.json', {'Accept-Encoding': accept_encoding})
+    etag = headers['ETag']
+
+    status, headers, data = fetch(static_server, '/board.json',
+                                  {'Accept-Encoding': accept_encoding, 'If-None-Match': etag})
+    assert status == 304
+    assert data == b''
+    assert headers['ETag'] == etag
+    assert headers['Vary'] == 'Accept-Encoding'
+
+
+def test_static_revalidation_accepts_any_variant_etag(static_server):
+    _, gzip_headers, _ = fetch(static_server, '/board.json', {'Accept-Encoding': 'gzip'})
+    status, headers, _ = fetch(static_server, '/board.json', {'If-None-Match': 'W/' + gzip_headers['ETag']})
+    assert status == 304
+    assert headers['ETag'] == gzip_headers['ETag'].replace('-gzip"', '"')
+
+
+def test_static_file_change_invalidates_etag(static_server, tmp_path):
+    _, headers, _ = fetch(static_server, '/board.json')
+    (tmp_path / 'board.json').write_bytes(BODY + b' ')
+    status, new_headers, data = fetch(static_server, '/board.json', {'If-None-Match': headers['ETag']})
+    assert status == 200
+    assert new_headers['ETag'] != headers['ETag']
+    assert data == BODY + b' '
+
+
+def test_small_static_file_is_sent_uncompressed(static_server):
+    status, headers, data = fetch(static_server, '/tiny.txt', {'Accept-Encoding': 'gzip'})
+    assert status == 200
+    assert headers['Content-Encoding'] is None
+    assert data == b'tiny'
+    assert not headers['ETag'].endswith('-gzip"')
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for lexical_index.py (BM25) and its reciprocal rank fusion with semantic search in server.py.
+"""
+
+import numpy as np
+import pytest
+
+import server
+from lexical_index import LexicalIndex, LexicalIndexBuilder, NAME_WEIGHT, tokenize
+from vector_index import VectorIndex
+
+# (name, clue text) per category row
+CATEGORIES = [
+    ('ANCIENT HISTORY', 'Rome fell in 476'),
+    ('MUSIC', 'A history of jazz and the blues'),
+    ('SCIENCE', 'The atom is the smallest unit of an element'),
+    ('OPERA', 'Verdi wrote Aida for the opening of the Suez Canal'),
+]
+
+
+def build_index(categories=CATEGORIES):
+    builder = LexicalIndexBuilder()
+    for row, (name, text) in enumerate(categories):
+        builder.add(row, name, weight=NAME_WEIGHT)
+        builder.add(row, text)
+    return builder.build(len(categories))
+
+
+def test_tokenize_drops_stopwords_and_case():
+    assert tokenize('The History of ROME, in 476!') == ['history', 'rome', '476']
+
+
+def test_name_match_outranks_clue_text_match():
+    rows, scores = build_index().search('history', 10)
+    assert rows.tolist() == [0, 1]
+    assert scores[0] > scores[1] > 0
+
+
+def test_rarer_terms_weigh_more():
+    rows, _ = build_index().search('jazz element', 10)
+    assert set(rows.tolist()) == {1, 2}
+    rows, scores = build_index().search('opera history', 10)
+    # Both 'opera' and 'history' match names, but 'history' also appears in clue text
+    assert rows[0] == 3
+    assert scores[0] > scores[1]
+
+
+def test_stopwords_and_unknown_terms_match_nothing():
+    index = build_index()
+    for query in ('the of and', 'zeppelin', ''):
+        rows, scores = index.search(query, 10)
+        assert len(rows) == 0 and len(scores) == 0
+    assert index.search('the history', 10)[0].tolist() == index.search('history', 10)[0].tolist()
+
+
+def test_top_k_limits_results():
+    rows, _ = build_index().search('history the rome jazz atom', 2)
+    assert len(rows) == 2
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = build_index()
+    path = str(tmp_path / 'bm25.npz')
+    index.save(path)
+    loaded = LexicalIndex.load(path)
+    assert loaded.num_docs == len(CATEGORIES)
+    assert loaded.terms == index.terms
+    for query in ('history', 'opera suez', 'atom'):
+        expected_rows, expected_scores = index.search(query, 10)
+        rows, scores = loaded.search(query, 10)
+        assert rows.tolist() == expected_rows.tolist()
+        np.testing.assert_allclose(scores, expected_scores)
+
+
+class FixedEncoder:
+    """Stands in for QueryEncoder: every query embeds to the same vector."""
+
+    def __init__(self, embedding):
+        self.embedding = np.asarray(embedding, dtype=np.float32)
+
+    def encode(self, query):
+        return self.embedding
+
+
+@pytest.fixture
+def search_data(monkeypatch):
+    embeddings = np.eye(len(CATEGORIES), dtype=np.float32)
+    data = {
+        'categories': [{'name': name, 'questions': [], 'round': 'Jeopardy!'} for name, _ in CATEGORIES],
+        'lexical': build_index(),
+        # Semantic ranking: OPERA, MUSIC, ANCIENT HISTORY, SCIENCE
+        'encoder': FixedEncoder([0.1, 0.5, 0.05, 1.0]),
+        'index': VectorIndex(embeddings)
+    }
+    monkeypatch.setattr(server, 'EMBEDDINGS_DATA', data)
+    return data
+
+
+def rrf(*ranks):
+    return sum(1.0 / (server.RRF_K + rank) for rank in ranks)
+
+
+def test_hybrid_search_fuses_rankings(search_data):
+    results = server.hybrid_search('history', 10)
+    # Lexical ranking: ANCIENT HISTORY, MUSIC
+    assert [r['name'] for r in results] == ['ANCIENT HISTORY', 'MUSIC', 'OPERA', 'SCIENCE']
+    assert [r['score'] for r in results] == pytest.approx([rrf(1, 3), rrf(2, 2), rrf(1), rrf(4)])
+
+    bm25_rows, bm25_scores = search_data['lexical'].search('history', 10)
+    assert [r['bm25'] for r in results] == pytest.approx(bm25_scores.tolist() + [0.0, 0.0])
+    similarities = search_data['index'].scores(server.normalize_rows(search_data['encoder'].embedding), [0, 1, 3, 2])
+    assert [r['similarity'] for r in results] == pytest.approx(similarities.tolist())
+
+
+def test_hybrid_search_returns_semantic_results_without_lexical_matches(search_data):
+    results = server.hybrid_search('zeppelin', 2)
+    assert [r['name'] for r in results] == ['OPERA', 'MUSIC']
+    assert all(r['bm25'] == 0.0 for r in results)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Tests for random_board_generator.py on small synthetic archives.
+"""
+
+import json
+import random
+
+from random_board_generator import (
+    Bitset, BoardEngine, BoardFilters, BoardIndex, MIN_LADDER_CATEGORIES, ROUND_NAMES, derive_board_seed,
+    generate_batch, organize_by_category, nearest_values, select_unique_questions_for_category
+)
+
+EASY_J = [100, 200, 300, 400, 500]
+MEDIUM_J = [200, 400, 600, 800, 1000]
+
+
+def clue(category, round_name, value, question, air_date='2001-01-01'):
+    return {
+        'category': category,
+        'round': round_name,
+        'value': f'${value:,}' if value is not None else None,
+        'question': question,
+        'answer': f'answer to {question}',
+        'air_date': air_date
+    }
+
+
+def make_archive(ladders, per_value=1):
+    """One Jeopardy! category per ladder entry (name -> values), per_value clues per value."""
+    archive = []
+    for category, values in ladders.items():
+        for value in values:
+            for i in range(per_value):
+                archive.append(clue(category, 'Jeopardy!', value, f'{category} {value} #{i}'))
+    return archive
+
+
+def build_index(archive):
+    return BoardIndex(organize_by_category(archive))
+
+
+def test_viability_follows_each_difficulty_ladder():
+    ladders = {f'EASY {i}': EASY_J for i in range(MIN_LADDER_CATEGORIES)}
+    ladders.update({f'MEDIUM {i}': MEDIUM_J for i in range(MIN_LADDER_CATEGORIES)})
+    index = build_index(make_archive(ladders))
+
+    easy = index.viable_categories('easy', ROUND_NAMES['jeopardy'])
+    medium = index.viable_categories('medium', ROUND_NAMES['jeopardy'])
+    assert sorted(easy) == sorted(f'EASY {i}' for i in range(MIN_LADDER_CATEGORIES))
+    assert sorted(medium) == sorted(f'MEDIUM {i}' for i in range(MIN_LADDER_CATEGORIES))
+
+
+def test_viability_falls_back_to_most_ladder_values():
+    # Nothing holds $1,200, so hard settles for the categories holding $400-$1,000
+    ladders = {f'MEDIUM {i}': MEDIUM_J for i in range(MIN_LADDER_CATEGORIES)}
+    ladders['LOW'] = EASY_J
+    index = build_index(make_archive(ladders))
+
+    hard = index.viable_categories('hard', ROUND_NAMES['jeopardy'])
+    assert sorted(hard) == sorted(f'MEDIUM {i}' for i in range(MIN_LADDER_CATEGORIES))
+
+
+def test_categories_with_too_few_unique_clues_are_never_viable():
+    archive = make_archive({f'MEDIUM {i}': MEDIUM_J for i in range(MIN_LADDER_CATEGORIES)})
+    # Five clues, but only two distinct question texts
+    archive += [clue('REPEATS', 'Jeopardy!', value, f'same {value % 2}') for value in MEDIUM_J]
+    index = build_index(archive)
+    for difficulty in ('easy', 'medium', 'hard'):
+        assert 'REPEATS' not in index.viable_categories(difficulty, ROUND_NAMES['jeopardy'])
+
+
+def test_nearest_values_order():
+    assert nearest_values((200, 400, 600, 800, 1000), 500) == (400, 600, 200, 800, 1000)
+    assert nearest_values((200, 1000), 1200) == (1000, 200)
+
+
+def test_nearest_order_is_precomputed_for_every_ladder_value():
+    index = build_index(make_archive({'MEDIUM': MEDIUM_J}))
+    nearest = index.nearest[(ROUND_NAMES['jeopardy'], 'MEDIUM')]
+    assert set(EASY_J + MEDIUM_J + [1200]) <= set(nearest)
+    assert nearest[100] == (200, 400, 600, 800, 1000)
+    assert nearest[1200] == (1000, 800, 600, 400, 200)
+
+
+def test_selection_prefers_exact_values_and_never_repeats():
+    index = build_index(make_archive({'MEDIUM': MEDIUM_J}, per_value=3))
+    round_name = ROUND_NAMES['jeopardy']
+    for seed in range(20):
+        selected = select_unique_questions_for_category(index, round_name, 'MEDIUM', MEDIUM_J,
+                                                        rng=random.Random(seed))
+        assert [q.value for q in selected] == MEDIUM_J
+        assert len({q.question for q in selected}) == len(MEDIUM_J)
+
+
+def test_selection_falls_back_to_nearest_value():
+    index = build_index(make_archive({'MEDIUM': MEDIUM_J}))
+    selected = select_unique_questions_for_category(index, ROUND_NAMES['jeopardy'], 'MEDIUM', EASY_J,
+                                                    rng=random.Random(1))
+    # Every clue is used exactly once; $100 can only come from $200
+    assert sorted(q.value for q in selected) == MEDIUM_J
+    assert selected[0].value == 200
+
+
+def test_selection_fails_when_category_runs_out():
+    index = build_index(make_archive({'SMALL': [200, 400, 600, 800, 1000]}))
+    assert select_unique_questions_for_category(index, ROUND_NAMES['jeopardy'], 'SMALL', MEDIUM_J + [1200],
+                                                rng=random.Random(0)) is None
+
+
+def make_full_archive(categories=16, shows=8):
+    """Jeopardy!, Double Jeopardy! and Final Jeopardy! clues spread over several air dates."""
+    archive = []
+    for show in range(shows):
+        air_date = f'{1990 + show}-06-01'
+        for c in range(categories):
+            for value in MEDIUM_J:
+                archive.append(clue(f'SHOW {show} CAT {c}', 'Jeopardy!', value, f'j {show} {c} {value}', air_date))
+                archive.append(clue(f'SHOW {show} DOUBLE {c}', 'Double Jeopardy!', value * 2,
+                                    f'dj {show} {c} {value}', air_date))
+        archive.append(clue(f'FINAL {show}', 'Final Jeopardy!', None, f'final {show}', air_date))
+    return archive
+
+
+def write_archive(tmp_path, archive):
+    path = tmp_path / 'archive.json'
+    path.write_text(json.dumps(archive), encoding='utf-8')
+    return str(path)
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_batch_is_deterministic_across_worker_counts(tmp_path):
+    archive_path = write_archive(tmp_path, make_full_archive())
+    runs = []
+    for workers in (1, 2):
+        jsonl_path = str(tmp_path / f'boards_{workers}.jsonl')
+        assert generate_batch(archive_path, ['easy', 'hard'], 3, 42, jsonl_path=jsonl_path, workers=workers) == 6
+        runs.append(read_jsonl(jsonl_path))
+    assert runs[0] == runs[1]
+
+    engine = BoardEngine(make_full_archive())
+    for record in runs[0]:
+        assert record['seed'] == derive_board_seed(42, record['difficulty'], record['number'])
+        assert record['board'] == engine.generate(record['difficulty'], seed=record['seed'])
+
+
+def test_batch_jsonl_records_are_escaped_json(tmp_path):
+    archive = make_full_archive()
+    for c in archive:
+        c['question'] = c['question'] + ' "quoted" \\ line\nbreak'
+    archive_path = write_archive(tmp_path, archive)
+    jsonl_path = str(tmp_path / 'boards.jsonl')
+    generate_batch(archive_path, ['medium'], 2, 7, jsonl_path=jsonl_path, workers=1)
+    records = read_jsonl(jsonl_path)
+    assert [(r['difficulty'], r['number']) for r in records] == [('medium', 0), ('medium', 1)]
+    assert any('"QUOTED"' in q['question'] for r in records for q in r['board']['jeopardy'][0]['questions'])
+
+
+def test_batch_applies_filters(tmp_path):
+    archive_path = write_archive(tmp_path, make_full_archive())
+    jsonl_path = str(tmp_path / 'boards.jsonl')
+    filters = BoardFilters(start_date='1992-01-01', end_date='1993-12-31', rounds=['jeopardy', 'final-jeopardy'])
+    generate_batch(archive_path, ['medium'], 3, 1, jsonl_path=jsonl_path, workers=2, filters=filters)
+    for record in read_jsonl(jsonl_path):
+        board = record['board']
+        assert set(board) == {'jeopardy', 'final-jeopardy'}
+        for category in board['jeopardy']:
+            assert category['name'].startswith(('SHOW 2 ', 'SHOW 3 '))
+        assert board['final-jeopardy']['category'] in ('FINAL 2', 'FINAL 3')
+
+
+def test_batch_writes_one_file_per_board(tmp_path):
+    archive_path = write_archive(tmp_path, make_full_archive())
+    output_dir = tmp_path / 'boards'
+    generate_batch(archive_path, ['easy'], 2, 5, output_dir=str(output_dir), workers=1)
+    assert sorted(p.name for p in output_dir.iterdir()) == ['board_random_easy_00000.json',
+                                                           'board_random_easy_00001.json']
+
+
+def test_same_seed_replays_the_same_board():
+    engine = BoardEngine(make_full_archive())
+    for difficulty in ('easy', 'medium', 'hard'):
+        assert engine.generate(difficulty, seed=123) == engine.generate(difficulty, seed=123)
+    assert engine.generate('medium', seed=1) != engine.generate('medium', seed=2)
+
+
+def test_seeded_boards_are_independent_of_global_random():
+    engine = BoardEngine(make_full_archive())
+    random.seed(1)
+    first = engine.generate('medium', seed=99)
+    random.seed(2)
+    random.random()
+    assert engine.generate('medium', seed=99) == first
+
+
+def test_bitset():
+    bits = Bitset(20)
+    for i in (0, 7, 8, 19):
+        bits.add(i)
+    bits.add(7)
+    assert [i for i in range(20) if i in bits] == [0, 7, 8, 19]
+    assert bits.count() == 4
+
+
+def board_clues(board):
+    return [q['question'] for key in ('jeopardy', 'double-jeopardy') for c in board.get(key, []) for q in c['questions']]
+
+
+def test_session_never_repeats_until_exhausted():
+    # 14 categories per round and 7 Final Jeopardy clues
+    engine = BoardEngine(make_full_archive(categories=2, shows=7))
+    boards = [engine.generate('medium', session_id='league', seed=i) for i in range(4)]
+
+    assert [len(b['jeopardy']) for b in boards] == [6, 6, 2, 0]
+    assert [len(b['double-jeopardy']) for b in boards] == [6, 6, 2, 0]
+    clues = [q for b in boards for q in board_clues(b)]
+    assert len(clues) == len(set(clues)) == 14 * 5 * 2
+    names = [c['name'] for b in boards for c in b['jeopardy'] + b['double-jeopardy']]
+    assert len(names) == len(set(names))
+
+    finals = [b['final-jeopardy']['category'] for b in boards]
+    assert len(set(finals)) == 4
+    more = [engine.generate('medium', session_id='league')['final-jeopardy']['category'] for _ in range(4)]
+    assert len(set(finals + more[:3])) == 7
+    assert more[3] == 'RANDOM TRIVIA'
+
+    stats = engine.session('league').stats()
+    assert stats == {'clues': 140, 'categories': 28, 'finals': 7}
+
+
+def test_sessions_are_independent():
+    engine = BoardEngine(make_full_archive(categories=2, shows=7))
+    first = engine.generate('medium', session_id='a', seed=5)
+    assert engine.generate('medium', session_id='b', seed=5) == first
+    assert engine.generate('medium', session_id='a', seed=5) != first
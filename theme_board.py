@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Candidate categories for themed boards (/api/generate-board?theme=...).
+
+ThemeSelector maps each row of the category embedding store to the board
+engine's category and precomputes, for every difficulty and round, a boolean
+mask of the rows that can fill that round's value ladder. A theme is then one
+top-k vector search plus a mask lookup per hit; the archive is never rescanned.
+"""
+
+from collections import defaultdict
+
+import numpy as np
+
+from random_board_generator import ROUND_NAMES
+
+# Nearest categories fetched per theme, before the viability masks are applied
+THEME_CANDIDATES = 256
+
+
+class ThemeSelector:
+    """
+    row_categories: embedding row -> BoardIndex categories stored under that row's name
+        (several when archive names differ only in surrounding whitespace, none if
+        the name has no board clues)
+    viable: (difficulty, round name) -> bool mask over embedding rows (any of the row's categories viable)
+    """
+
+    def __init__(self, index, categories):
+        # The embedding store strips category names; the board index keeps them as archived
+        names = defaultdict(list)
+        for name in index.category_names:
+            names[name.strip()].append(name)
+        self.row_categories = [tuple(names.get(categories[row]['name'], ())) for row in range(len(categories))]
+        self.viable_sets = index.viable_sets
+        self.viable = {
+            key: np.array([any(category in viable for category in row) for row in self.row_categories], dtype=bool)
+            for key, viable in index.viable_sets.items()
+        }
+
+    def candidates(self, rows, difficulty):
+        """Ranked viable categories per board round for search hits rows (best first)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        candidates = {}
+        for round_key, round_name in ROUND_NAMES.items():
+            key = (difficulty, round_name)
+            viable = self.viable_sets[key]
+            candidates[round_key] = [category for row in rows[self.viable[key][rows]]
+                                     for category in self.row_categories[row] if category in viable]
+        return candidates
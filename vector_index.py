@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Vector index for semantic category search.
+
+VectorIndex keeps a pre-normalized float32 (or int8-quantized) embedding
+matrix and answers cosine top-k queries with argpartition instead of a full
+sort. An optional IVF index (k-means clusters built by generate_embeddings.py)
+restricts each query to the rows in its nearest clusters.
+"""
+
+import numpy as np
+
+# Rows scored per step when the matrix is int8, to bound the float32 scratch space
+QUANTIZED_CHUNK_ROWS = 65536
+
+# Rows assigned to clusters per step when building an IVF index
+ASSIGN_CHUNK_ROWS = 65536
+
+
+def normalize_rows(matrix):
+    """Return a float32 copy of matrix with unit-length rows."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def quantize_rows(matrix):
+    """Quantize unit-length float rows to int8 with a per-row float32 scale."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    scales = np.abs(matrix).max(axis=1)
+    scales[scales == 0] = 1.0
+    scales = (scales / 127.0).astype(np.float32)
+    return np.round(matrix / scales[:, None]).astype(np.int8), scales
+
+
+def top_k_indices(scores, top_k):
+    """Indices of the top_k highest scores, best first."""
+    top_k = min(top_k, len(scores))
+    if top_k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if top_k < len(scores):
+        candidates = np.argpartition(scores, -top_k)[-top_k:]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+class IVFIndex:
+    """
+    Inverted-file index: rows grouped by their nearest k-means centroid.
+    Rows for list i are list_rows[list_offsets[i]:list_offsets[i + 1]].
+    """
+
+    def __init__(self, centroids, list_offsets, list_rows):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.list_offsets = np.asarray(list_offsets, dtype=np.int64)
+        self.list_rows = np.asarray(list_rows, dtype=np.int64)
+
+    @property
+    def num_rows(self):
+        return len(self.list_rows)
+
+    @classmethod
+    def build(cls, embeddings, num_lists=None, iterations=10, seed=0, sample_size=None):
+        """
+        Cluster embeddings with spherical k-means. Rows may be float or int8
+        (only their direction matters). With sample_size, centroids are trained
+        on a random sample and all rows are then assigned in chunks, so large
+        (e.g. memory-mapped) matrices are never copied whole.
+        """
+        num_rows = len(embeddings)
+        if num_lists is None:
+            num_lists = int(np.sqrt(num_rows))
+        num_lists = max(1, min(num_lists, num_rows))
+
+        rng = np.random.default_rng(seed)
+        if sample_size is not None and sample_size < num_rows:
+            sample = normalize_rows(embeddings[np.sort(rng.choice(num_rows, sample_size, replace=False))])
+        else:
+            sample = normalize_rows(embeddings)
+        centroids = sample[rng.choice(len(sample), min(num_lists, len(sample)), replace=False)]
+        num_lists = len(centroids)
+
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=num_lists)
+            # Keep the old centroid for empty lists
+            sums[counts == 0] = centroids[counts == 0]
+            centroids = normalize_rows(sums)
+
+        assignments = np.concatenate([
+            np.argmax(normalize_rows(embeddings[start:start + ASSIGN_CHUNK_ROWS]) @ centroids.T, axis=1)
+            for start in range(0, num_rows, ASSIGN_CHUNK_ROWS)
+        ])
+        list_rows = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=num_lists)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)])
+        return cls(centroids, list_offsets, list_rows)
+
+    def save(self, filepath):
+        """Save the index as an .npz file."""
+        np.savez(filepath, centroids=self.centroids,
+                 list_offsets=self.list_offsets, list_rows=self.list_rows)
+
+    @classmethod
+    def load(cls, filepath):
+        """Load an index saved with save()."""
+        with np.load(filepath) as data:
+            return cls(data['centroids'], data['list_offsets'], data['list_rows'])
+
+    def candidates(self, query, nprobe):
+        """Row ids in the nprobe lists whose centroids are closest to query."""
+        lists = top_k_indices(self.centroids @ query, nprobe)
+        return np.concatenate([
+            self.list_rows[self.list_offsets[i]:self.list_offsets[i + 1]] for i in lists
+        ])
+
+
+class VectorIndex:
+    """
+    Cosine-similarity search over a fixed embedding matrix.
+    With quantize=True rows are stored as int8 with a per-row scale (4x smaller).
+    Pass normalized=True for unit-length float32 rows to search them in place.
+    """
+
+    def __init__(self, embeddings, quantize=False, ivf=None, normalized=False):
+        if normalized and not quantize:
+            # Already unit length (e.g. a memory-mapped store); use it without copying
+            matrix = np.asarray(embeddings, dtype=np.float32)
+        else:
+            matrix = normalize_rows(embeddings)
+        self.num_rows = len(matrix)
+        self.quantized = quantize
+        if quantize:
+            self.matrix, self.scales = quantize_rows(matrix)
+        else:
+            self.scales = None
+            self.matrix = matrix
+        self.ivf = self._check_ivf(ivf)
+
+    @classmethod
+    def from_quantized(cls, matrix, scales, ivf=None):
+        """Search an already-quantized int8 matrix (e.g. memory-mapped) with its per-row scales."""
+        index = cls.__new__(cls)
+        index.num_rows = len(matrix)
+        index.quantized = True
+        index.matrix = matrix
+        index.scales = np.asarray(scales, dtype=np.float32)
+        index.ivf = index._check_ivf(ivf)
+        return index
+
+    def _check_ivf(self, ivf):
+        if ivf is not None and ivf.num_rows != self.num_rows:
+            print(f"Warning: IVF index covers {ivf.num_rows} rows but there are {self.num_rows} embeddings; ignoring it")
+            return None
+        return ivf
+
+    def scores(self, query, rows=None):
+        """Cosine similarity of query (unit length) against all rows, or just rows."""
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        if not self.quantized:
+            return matrix @ query
+
+        scales = self.scales if rows is None else self.scales[rows]
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), QUANTIZED_CHUNK_ROWS):
+            chunk = matrix[start:start + QUANTIZED_CHUNK_ROWS].astype(np.float32)
+            scores[start:start + QUANTIZED_CHUNK_ROWS] = chunk @ query
+        return scores * scales
+
+    def search(self, query, top_k, nprobe=8, exact=False):
+        """
+        Return (row ids, similarities) of the top_k rows for query, best first.
+        Uses the IVF index when present unless exact=True.
+        """
+        query = normalize_rows(query)
+        rows = None
+        if self.ivf is not None and not exact:
+            rows = self.ivf.candidates(query, nprobe)
+            if len(rows) < top_k:
+                rows = None
+
+        scores = self.scores(query, rows)
+        best = top_k_indices(scores, top_k)
+        ids = best if rows is None else rows[best]
+        return ids, scores[best]